@@ -331,6 +331,7 @@ class ActiveFilters(t.MutableSet[str]):
             {"href": href, c.ATT_XMT: "filter:CompositeFilterDescription"}
         )
         self._target.append(elt)
+        self._model._loader.mark_dirty(self._target)
         self._diagram.invalidate_cache()
 
     def discard(self, value: str) -> None:
@@ -343,6 +344,7 @@ class ActiveFilters(t.MutableSet[str]):
             filter_name = self._get_filter_name(filter)
             if filter_name is not None and value == filter_name:
                 self._target.remove(filter)
+                self._model._loader.mark_dirty(self._target)
                 self._diagram.invalidate_cache()
                 break
 
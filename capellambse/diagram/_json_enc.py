@@ -4,7 +4,12 @@
 """Module that handles converting diagrams to the intermediary JSON format."""
 from __future__ import annotations
 
-__all__ = ["DiagramJSONEncoder"]
+__all__ = [
+    "DiagramJSONEncoder",
+    "encode_element",
+    "encode_metadata",
+    "iter_encoded_elements",
+]
 
 import collections.abc as cabc
 import json
@@ -20,99 +25,127 @@ class DiagramJSONEncoder(json.JSONEncoder):
 
     def default(self, o: object) -> object:
         if isinstance(o, diagram.Diagram):
-            return self.__encode_diagram(o)
-        if isinstance(o, diagram.Box):
-            return self.__encode_box(o)
-        if isinstance(o, diagram.Edge):
-            return self.__encode_edge(o)
-        if isinstance(o, diagram.Circle):
-            return self.__encode_circle(o)
+            return {
+                **encode_metadata(o),
+                "contents": [e for e in o if not e.hidden],
+            }
+        if isinstance(o, (diagram.Box, diagram.Edge, diagram.Circle)):
+            return encode_element(o)
         if isinstance(o, diagram.RGB):
             return str(o)
         if isinstance(o, cabc.Sequence):
             return list(o)
         return super().default(o)
 
-    @staticmethod
-    def __encode_diagram(o: diagram.Diagram) -> object:
-        return {
-            "name": o.name,
-            "uuid": o.uuid,
-            "class": o.styleclass,
-            "x": (
-                _intround(o.viewport.pos.x) if o.viewport is not None else 0
-            ),
-            "y": (
-                _intround(o.viewport.pos.y) if o.viewport is not None else 0
-            ),
-            "width": (
-                _intround(o.viewport.size.x) if o.viewport is not None else 0
-            ),
-            "height": (
-                _intround(o.viewport.size.y) if o.viewport is not None else 0
-            ),
-            "contents": [e for e in o if not e.hidden],
-        }
-
-    @staticmethod
-    def __encode_box(o: diagram.Box) -> object:
-        children = [
-            c.uuid
-            for c in o.children
-            if isinstance(c, diagram.Box) and not c.port
-        ]
-        ports = [p.uuid for p in o.children if p.port]
-        jsonobj: dict[str, object] = {
-            "type": o.JSON_TYPE,
-            "id": o.uuid,
-            "class": o.styleclass,
-            "x": _intround(o.pos.x),
-            "y": _intround(o.pos.y),
-            "width": _intround(o.size.x),
-            "height": _intround(o.size.y),
-            "context": sorted(o.context),
-        }
-        if o.label is not None and not o.hidelabel:
-            jsonobj["label"] = _encode_label(o.label)
-        if o.styleoverrides:
-            jsonobj["style"] = _encode_styleoverrides(o.styleoverrides)
-        if o.features:
-            jsonobj["features"] = o.features
-        if o.parent:
-            jsonobj["parent"] = o.parent.uuid
-        if children:
-            jsonobj["children"] = children
-        if ports:
-            jsonobj["ports"] = ports
-
-        return jsonobj
-
-    @staticmethod
-    def __encode_edge(o: diagram.Edge) -> object:
-        jsonobj: dict[str, object] = {
-            "type": o.JSON_TYPE,
-            "id": o.uuid,
-            "class": o.styleclass,
-            "points": [[_intround(x), _intround(y)] for x, y in o.points],
-            "labels": [_encode_label(i) for i in o.labels if not i.hidden],
-        }
-
-        if o.styleoverrides:
-            jsonobj["style"] = _encode_styleoverrides(o.styleoverrides)
-        return jsonobj
-
-    @staticmethod
-    def __encode_circle(o: diagram.Circle) -> object:
-        jsonobj: dict[str, object] = {
-            "type": o.JSON_TYPE,
-            "id": o.uuid,
-            "class": o.styleclass,
-            "center": [_intround(p) for p in o.center],
-            "radius": _intround(o.radius),
-        }
-        if o.styleoverrides:
-            jsonobj["style"] = _encode_styleoverrides(o.styleoverrides)
-        return jsonobj
+
+def encode_metadata(o: diagram.Diagram) -> dict[str, t.Any]:
+    """Encode everything except the contents of a diagram.
+
+    The result is the same as that of :class:`DiagramJSONEncoder`
+    after decoding it again, but without the ``contents`` key.
+    """
+    return {
+        "name": o.name,
+        "uuid": o.uuid,
+        "class": o.styleclass,
+        "x": _intround(o.viewport.pos.x) if o.viewport is not None else 0,
+        "y": _intround(o.viewport.pos.y) if o.viewport is not None else 0,
+        "width": (
+            _intround(o.viewport.size.x) if o.viewport is not None else 0
+        ),
+        "height": (
+            _intround(o.viewport.size.y) if o.viewport is not None else 0
+        ),
+    }
+
+
+def iter_encoded_elements(
+    o: diagram.Diagram,
+) -> cabc.Iterator[dict[str, t.Any]]:
+    """Encode the visible elements of a diagram one at a time.
+
+    This yields the same objects as the ``contents`` of a diagram that
+    was encoded with :class:`DiagramJSONEncoder` and decoded again, in
+    the same order, without building the JSON string in between.
+    """
+    for element in o:
+        if not element.hidden:
+            yield encode_element(element)
+
+
+def encode_element(o: diagram.DiagramElement) -> dict[str, t.Any]:
+    """Encode a single diagram element into a JSON-compatible dict.
+
+    The result only contains JSON-native types, i.e. it is equal to
+    what ``json.loads`` returns for the output of
+    :class:`DiagramJSONEncoder`. It is newly created on every call and
+    can therefore be modified freely.
+    """
+    if isinstance(o, diagram.Box):
+        return _encode_box(o)
+    if isinstance(o, diagram.Edge):
+        return _encode_edge(o)
+    if isinstance(o, diagram.Circle):
+        return _encode_circle(o)
+    raise TypeError(f"Cannot encode {type(o).__name__} as diagram element")
+
+
+def _encode_box(o: diagram.Box) -> dict[str, t.Any]:
+    children = [
+        c.uuid for c in o.children if isinstance(c, diagram.Box) and not c.port
+    ]
+    ports = [p.uuid for p in o.children if p.port]
+    jsonobj: dict[str, t.Any] = {
+        "type": o.JSON_TYPE,
+        "id": o.uuid,
+        "class": o.styleclass,
+        "x": _intround(o.pos.x),
+        "y": _intround(o.pos.y),
+        "width": _intround(o.size.x),
+        "height": _intround(o.size.y),
+        "context": sorted(o.context),
+    }
+    if o.label is not None and not o.hidelabel:
+        jsonobj["label"] = _encode_label(o.label)
+    if o.styleoverrides:
+        jsonobj["style"] = _encode_styleoverrides(o.styleoverrides)
+    if o.features:
+        jsonobj["features"] = list(o.features)
+    if o.parent:
+        jsonobj["parent"] = o.parent.uuid
+    if children:
+        jsonobj["children"] = children
+    if ports:
+        jsonobj["ports"] = ports
+
+    return jsonobj
+
+
+def _encode_edge(o: diagram.Edge) -> dict[str, t.Any]:
+    jsonobj: dict[str, t.Any] = {
+        "type": o.JSON_TYPE,
+        "id": o.uuid,
+        "class": o.styleclass,
+        "points": [[_intround(x), _intround(y)] for x, y in o.points],
+        "labels": [_encode_label(i) for i in o.labels if not i.hidden],
+    }
+
+    if o.styleoverrides:
+        jsonobj["style"] = _encode_styleoverrides(o.styleoverrides)
+    return jsonobj
+
+
+def _encode_circle(o: diagram.Circle) -> dict[str, t.Any]:
+    jsonobj: dict[str, t.Any] = {
+        "type": o.JSON_TYPE,
+        "id": o.uuid,
+        "class": o.styleclass,
+        "center": [_intround(p) for p in o.center],
+        "radius": _intround(o.radius),
+    }
+    if o.styleoverrides:
+        jsonobj["style"] = _encode_styleoverrides(o.styleoverrides)
+    return jsonobj
 
 
 def _encode_label(o: diagram.Box | str) -> object:
@@ -0,0 +1,334 @@
+# SPDX-FileCopyrightText: Copyright DB Netz AG and the capellambse contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Export many diagrams at once, using multiple processes.
+
+Every worker process loads its own copy of the model, and the diagrams
+are distributed over the workers. The rendered diagrams are collected
+in the main process and written to a
+:class:`~capellambse.filehandler.FileHandler`.
+
+This module can also be used from the command line::
+
+    python -m capellambse.export -m path/to/model.aird -f svg -o out/
+"""
+from __future__ import annotations
+
+__all__ = ["ExportResult", "export_diagrams"]
+
+import collections.abc as cabc
+import concurrent.futures
+import os
+import pathlib
+import sys
+import time
+import typing as t
+
+import capellambse
+from capellambse import filehandler
+from capellambse.model import diagram
+
+ModelSpec = t.Union[str, os.PathLike[str], cabc.Mapping[str, t.Any]]
+"""A picklable description of how to load a model.
+
+This is either a value understood by
+:func:`~capellambse.cli_helpers.loadcli`, or a mapping with the keyword
+arguments for :class:`~capellambse.model.MelodyModel`.
+"""
+
+_worker_model: capellambse.MelodyModel | None = None
+
+
+class ExportResult(t.NamedTuple):
+    """The outcome of exporting a single diagram in one format."""
+
+    uuid: str
+    name: str
+    format: str
+    filename: str | None
+    """The name of the written file, or None if the export failed."""
+    duration: float
+    """Seconds spent rendering and converting the diagram."""
+    error: str | None = None
+
+
+def export_diagrams(
+    model: ModelSpec,
+    target: filehandler.FileHandler,
+    formats: cabc.Sequence[str] = ("svg",),
+    *,
+    uuids: cabc.Iterable[str] | None = None,
+    workers: int | None = None,
+    render_params: cabc.Mapping[str, t.Any] | None = None,
+    progress: cabc.Callable[[ExportResult], None] | None = None,
+) -> list[ExportResult]:
+    """Render diagrams in a pool of worker processes.
+
+    Each diagram is rendered only once, and then converted into all
+    requested formats. The files are named ``<uuid><ext>``, where
+    ``ext`` is the format's ``filename_extension``, and contain what
+    the format stores in the diagram cache. This is the same scheme
+    that is used by the ``diagram_cache`` of
+    :class:`~capellambse.model.MelodyModel`, so the output can directly
+    be used as a (read-only) diagram cache.
+
+    Parameters
+    ----------
+    model
+        How to load the model. Every worker process loads its own copy.
+    target
+        The file handler to write the rendered diagrams to. All files
+        are written in a single write transaction.
+    formats
+        The names of the formats to export each diagram in, as
+        registered in the ``capellambse.diagram.formats`` entry point
+        group. Only formats that can be stored in the diagram cache are
+        supported, and no two of them may share a filename extension.
+    uuids
+        Only export the diagrams with these UUIDs. By default, all
+        diagrams of the model are exported.
+    workers
+        The number of worker processes. Defaults to the number of CPUs.
+        If set to 1, diagrams are exported in the current process.
+    render_params
+        Additional parameters to pass to
+        :meth:`~capellambse.model.diagram.AbstractDiagram.render`.
+    progress
+        A callable that is called with each result as soon as it is
+        available.
+
+    Returns
+    -------
+    list[ExportResult]
+        One result for each exported diagram and format.
+
+    Raises
+    ------
+    capellambse.model.diagram.UnknownOutputFormat
+        If one of the ``formats`` is not known.
+    ValueError
+        If one of the ``formats`` cannot be written to a file, or if
+        several formats would be written to the same file.
+    """
+    extensions: dict[str, str] = {}
+    for fmt in formats:
+        conv = diagram._find_format_converter(fmt)
+        if not isinstance(conv, diagram.WritableDiagramFormat):
+            raise ValueError(f"Format cannot be written to files: {fmt}")
+        ext = conv.filename_extension
+        if ext in extensions:
+            raise ValueError(
+                f"Formats {extensions[ext]!r} and {fmt!r} would both"
+                f" be written to {ext!r} files"
+            )
+        extensions[ext] = fmt
+    params = dict(render_params or {})
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    results: list[ExportResult] = []
+    with target.write_transaction() as unused:
+        if unused:
+            raise ValueError(
+                "Arguments not understood by file handler: "
+                + ", ".join(unused)
+            )
+
+        def collect(
+            exported: list[tuple[ExportResult, bytes | None]],
+        ) -> None:
+            for result, content in exported:
+                if content is not None:
+                    assert result.filename is not None
+                    with target.open(result.filename, "wb") as f:
+                        f.write(content)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+
+        if workers == 1:
+            _init_worker(model)
+            try:
+                if uuids is None:
+                    uuids = _list_diagrams()
+                for uuid in uuids:
+                    collect(_export_diagram(uuid, formats, params))
+            finally:
+                _release_worker()
+            return results
+
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(model,)
+        ) as pool:
+            if uuids is None:
+                uuids = pool.submit(_list_diagrams).result()
+            futures = [
+                pool.submit(_export_diagram, i, formats, params) for i in uuids
+            ]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    collect(future.result())
+            except BaseException:
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+    return results
+
+
+def _init_worker(model: ModelSpec) -> None:
+    global _worker_model
+    if isinstance(model, cabc.Mapping):
+        _worker_model = capellambse.MelodyModel(**model)
+    else:
+        _worker_model = capellambse.loadcli(model)
+
+
+def _release_worker() -> None:
+    global _worker_model
+    _worker_model = None
+
+
+def _list_diagrams() -> list[str]:
+    assert _worker_model is not None
+    return [i.uuid for i in _worker_model.diagrams]
+
+
+def _export_diagram(
+    uuid: str,
+    formats: cabc.Sequence[str],
+    params: dict[str, t.Any],
+) -> list[tuple[ExportResult, bytes | None]]:
+    assert _worker_model is not None
+    try:
+        diag = _worker_model.diagrams.by_uuid(uuid)
+    except KeyError:
+        return [
+            (ExportResult(uuid, "", fmt, None, 0.0, "No such diagram"), None)
+            for fmt in formats
+        ]
+
+    # pylint: disable=broad-except
+    start = time.perf_counter()
+    try:
+        rendered = diag.render(None, **params)
+    except Exception as err:
+        duration = time.perf_counter() - start
+        error = f"{type(err).__name__}: {err}"
+        return [
+            (ExportResult(uuid, diag.name, fmt, None, duration, error), None)
+            for fmt in formats
+        ]
+    render_time = time.perf_counter() - start
+
+    exported: list[tuple[ExportResult, bytes | None]] = []
+    for fmt in formats:
+        start = time.perf_counter()
+        conv = diagram._find_format_converter(fmt)
+        assert isinstance(conv, diagram.WritableDiagramFormat)
+        try:
+            content = conv.to_cache(rendered)
+        except Exception as err:
+            duration = render_time + time.perf_counter() - start
+            error = f"{type(err).__name__}: {err}"
+            result = ExportResult(uuid, diag.name, fmt, None, duration, error)
+            exported.append((result, None))
+            continue
+
+        duration = render_time + time.perf_counter() - start
+        filename = uuid + conv.filename_extension
+        exported.append(
+            (ExportResult(uuid, diag.name, fmt, filename, duration), content)
+        )
+    return exported
+
+
+try:
+    import click
+except ImportError:
+
+    def _main() -> None:
+        """Display a dependency error."""
+        print("Error: Please install 'click' and retry", file=sys.stderr)
+        raise SystemExit(1)
+
+else:
+
+    @click.command()
+    @click.option(
+        "-m",
+        "--model",
+        required=True,
+        help="The model to export, in any form accepted by 'loadcli'.",
+    )
+    @click.option(
+        "-o",
+        "--output",
+        type=click.Path(file_okay=False, path_type=pathlib.Path),
+        required=True,
+        help="The directory to write the diagrams to.",
+    )
+    @click.option(
+        "-f",
+        "--format",
+        "formats",
+        multiple=True,
+        default=["svg"],
+        show_default=True,
+        help="The format to export to. Can be given multiple times.",
+    )
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        default=None,
+        help="Number of worker processes.  [default: number of CPUs]",
+    )
+    @click.option(
+        "-u",
+        "--uuid",
+        "uuids",
+        multiple=True,
+        help="Only export this diagram. Can be given multiple times.",
+    )
+    def _main(
+        model: str,
+        output: pathlib.Path,
+        formats: tuple[str, ...],
+        jobs: int | None,
+        uuids: tuple[str, ...],
+    ) -> None:
+        """Export diagrams of a model using multiple processes."""
+        output.mkdir(parents=True, exist_ok=True)
+        target = filehandler.get_filehandler(output)
+        done = 0
+
+        def progress(result: ExportResult) -> None:
+            nonlocal done
+            done += 1
+            status = result.filename or f"FAILED: {result.error}"
+            click.echo(
+                f"[{done}] {result.duration:7.3f}s {result.format}"
+                f" {result.name!r} -> {status}",
+                err=True,
+            )
+
+        start = time.perf_counter()
+        results = export_diagrams(
+            model,
+            target,
+            formats,
+            uuids=uuids or None,
+            workers=jobs,
+            progress=progress,
+        )
+        failed = sum(1 for i in results if i.error is not None)
+        click.echo(
+            f"Exported {len(results) - failed} of {len(results)} files"
+            f" in {time.perf_counter() - start:.1f}s",
+            err=True,
+        )
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    _main()
@@ -24,6 +24,7 @@ import shutil
 import subprocess
 import tempfile
 import textwrap
+import threading
 import typing as t
 import urllib.parse
 import weakref
@@ -35,6 +36,8 @@ from . import FileHandler, TransactionClosedError
 
 LOGGER = logging.getLogger(__name__)
 
+_T = t.TypeVar("_T")
+
 _git_object_name = re.compile("(^|/)([0-9a-fA-F]{4,}|(.+_)?HEAD)$")
 
 
@@ -54,6 +57,31 @@ class _TreeEntry(t.NamedTuple):
         return f"{self.mode} {self.type} {self.object}\t{self.file}"
 
 
+class _LFSPointer(t.NamedTuple):
+    oid: str
+    size: int
+
+    @classmethod
+    def fromstring(cls, pointer: bytes) -> _LFSPointer | None:
+        """Parse a Git-LFS pointer file.
+
+        Returns None if the given data is not a valid pointer.
+        """
+        if not pointer.startswith(b"version https://git-lfs.github.com/"):
+            return None
+
+        fields: dict[bytes, bytes] = {}
+        for line in pointer.splitlines():
+            key, _, value = line.partition(b" ")
+            fields[key] = value
+
+        oid = fields.get(b"oid", b"")
+        size = fields.get(b"size", b"")
+        if not oid.startswith(b"sha256:") or not size.isdigit():
+            return None
+        return cls(oid[len(b"sha256:") :].decode("ascii"), int(size))
+
+
 class _ProcessWriter(t.BinaryIO):
     def __init__(
         self,
@@ -129,10 +157,39 @@ class _WritableIndexFile(_ProcessWriter):
         self.callback(hash.decode("ascii").strip())
 
 
+class _BufferedIndexFile(t.BinaryIO):
+    """A file that is kept in memory until it is closed."""
+
+    def __init__(self, cb: cabc.Callable[[bytes], None]) -> None:
+        self.callback = cb
+        self.buffer = io.BytesIO()
+        self.write = self.buffer.write  # type: ignore[assignment]
+
+    def write(self, s: bytes) -> int:
+        return len(s)  # stub
+
+    def close(self) -> None:
+        if self.buffer.closed:
+            return
+        content = self.buffer.getvalue()
+        self.buffer.close()
+        self.callback(content)
+
+    @property
+    def closed(self) -> bool:
+        return self.buffer.closed
+
+    def __enter__(self) -> _BufferedIndexFile:
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+
 class _WritableLFSFile(_ProcessWriter):
     def __init__(
         self,
-        cb: cabc.Callable[[str], None],
+        indexfile: t.BinaryIO,
         cwd: pathlib.Path,
         env: dict[str, str],
         filename: pathlib.PurePosixPath,
@@ -140,9 +197,7 @@ class _WritableLFSFile(_ProcessWriter):
         super().__init__(
             ["git", "lfs", "clean", "--", filename], cwd=cwd, env=env
         )
-        self.__indexfile = _WritableIndexFile(  # type: ignore[abstract]
-            cb, cwd, env, filename
-        )
+        self.__indexfile = indexfile
 
     def close(self) -> None:
         assert self.process.stdin is not None
@@ -158,6 +213,54 @@ class _WritableLFSFile(_ProcessWriter):
             self.__indexfile.close()
 
 
+class _FastImportWriter(_ProcessWriter):
+    """Streams blobs and a commit into a ``git fast-import`` process."""
+
+    def __init__(self, cwd: pathlib.Path, env: dict[str, str]) -> None:
+        super().__init__(
+            ["git", "fast-import", "--quiet", "--done"], cwd=cwd, env=env
+        )
+        self.__last_mark = 0
+
+    def new_mark(self) -> str:
+        """Allocate a new mark to refer to an object in the stream."""
+        self.__last_mark += 1
+        return f":{self.__last_mark}"
+
+    def blob(self, content: bytes) -> str:
+        """Write a blob into the stream and return its mark."""
+        mark = self.new_mark()
+        self.write(b"blob\nmark %s\ndata %d\n" % (mark.encode(), len(content)))
+        self.write(content)
+        self.write(b"\n")
+        return mark
+
+    def finish(self) -> bytes:
+        """End the stream and return everything git printed."""
+        assert self.process.stdin is not None
+        assert self.process.stdout is not None
+
+        if not self.process.stdin.closed:
+            self.write(b"done\n")
+        output, _ = self.process.communicate()
+        super().close()
+        return output
+
+    def close(self) -> None:
+        self.finish()
+
+
+def _quote_fast_import_path(path: pathlib.PurePosixPath) -> str:
+    """Quote a path for use in a ``git fast-import`` stream, if needed."""
+    path_str = str(path)
+    if not path_str.startswith('"') and "\n" not in path_str:
+        return path_str
+    escaped = (
+        path_str.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+    return f'"{escaped}"'
+
+
 class _GitTransaction:
     __old_sha: str
     __unclosed_error = textwrap.dedent(
@@ -192,6 +295,7 @@ class _GitTransaction:
         remote_branch: str | None = None,
         push: bool = True,
         push_options: cabc.Sequence[str] = (),
+        fast_import: bool = False,
         **kw: t.Any,
     ) -> None:
         """Create a transaction that records all changes as a new commit.
@@ -226,6 +330,12 @@ class _GitTransaction:
         push_options
             Additional git push options.  See ``--push-option`` in
             ``git-push(1)``. Ignored if ``push`` is ``False``.
+        fast_import
+            Stream all written files, the updated trees and the commit
+            into a single ``git fast-import`` process, instead of
+            spawning separate processes for every blob, tree and commit
+            object. Each written file is kept in memory until it is
+            closed, and then passed on to ``fast-import``.
 
         Raises
         ------
@@ -236,6 +346,8 @@ class _GitTransaction:
               originally given revision) looks like a git object
         """
         self.__updates: dict[pathlib.PurePosixPath, str] = {}
+        self.__fast_import_writer: _FastImportWriter | None = None
+        self.fast_import = fast_import
         self.__outer_context = outer_transactor(**kw)
         self.__handler = filehandler
         self.__dry_run = dry_run
@@ -264,7 +376,7 @@ class _GitTransaction:
 
         self.__targetref = targetref
         self.__open_files: cabc.MutableMapping[
-            tuple[int, pathlib.PurePosixPath], _ProcessWriter
+            tuple[int, pathlib.PurePosixPath], t.BinaryIO
         ] = weakref.WeakValueDictionary()
 
     def __enter__(self) -> cabc.Mapping[str, t.Any]:
@@ -282,24 +394,31 @@ class _GitTransaction:
 
     def __exit__(self, exc_type, exc_value, exc_trace):
         if exc_value is not None:
+            self.__close_fast_import()
             return self.__outer_context.__exit__(
                 exc_type, exc_value, exc_trace
             )
         try:
-            LOGGER.debug("Creating updated tree structures")
-            tree = self.__update_tree(
-                self.__read_tree(self.__old_sha),
-                self.__updates,
-            )
+            self.__check_open_files()
+            if self.fast_import:
+                LOGGER.debug("Streaming changes into git fast-import")
+                commit = self.__fast_import()
+            else:
+                LOGGER.debug("Creating updated tree structures")
+                tree = self.__update_tree(
+                    self.__read_tree(self.__old_sha),
+                    self.__updates,
+                )
 
-            LOGGER.debug("Creating commit object with tree %s", tree)
-            commit = self.__commit(tree)
+                LOGGER.debug("Creating commit object with tree %s", tree)
+                commit = self.__commit(tree)
             if self.__dry_run:
                 LOGGER.debug("Not updating branch pointers (dry_run=True)")
                 return None
 
             LOGGER.debug("Updating ref %r to %s", self.__targetref, commit)
             self.__update_target_ref(commit)
+            self.__handler._discard_lfs_prefetch()
 
             if not self.__push:
                 LOGGER.debug("Not pushing changes to remote (push=False)")
@@ -308,6 +427,7 @@ class _GitTransaction:
             LOGGER.debug("Pushing updated ref %r", self.__targetref)
             self.__push_updates("origin")
         finally:
+            self.__close_fast_import()
             del self.__old_sha
             self.__handler._transaction = None
             self.__outer_context.__exit__(exc_type, exc_value, exc_trace)
@@ -324,15 +444,36 @@ class _GitTransaction:
             The SHA sum (object name) of the new blob.
         """
         assert re.fullmatch("[0-9a-fA-F]+", new_sha)
+        self.__record(path, new_sha)
+
+    def record_content(
+        self, path: pathlib.PurePosixPath, content: bytes
+    ) -> None:
+        """Record the new content of a file in the current transaction.
+
+        The content is immediately streamed into ``git fast-import``.
+        This is only supported by the ``fast_import`` backend.
+
+        Parameters
+        ----------
+        path
+            The path of the blob, relative to the root of the repository.
+        content
+            The new content of the blob.
+        """
+        assert self.fast_import
+        self.__record(path, self.__get_fast_import_writer().blob(content))
+
+    def __record(self, path: pathlib.PurePosixPath, dataref: str) -> None:
         assert self.__handler._transaction is not None
         if path in self.__updates:
             LOGGER.warning(
                 "Path changed twice in the same transaction: %s", path
             )
-        self.__updates[path] = new_sha
+        self.__updates[path] = dataref
 
     def record_pending_update(
-        self, filename: pathlib.PurePosixPath, file: _ProcessWriter
+        self, filename: pathlib.PurePosixPath, file: t.BinaryIO
     ) -> None:
         self.__open_files[id(file), filename] = file
 
@@ -354,6 +495,58 @@ class _GitTransaction:
         LOGGER.debug("Created commit with hash %r", commit_hash)
         return commit_hash
 
+    def __get_fast_import_writer(self) -> _FastImportWriter:
+        if self.__fast_import_writer is None:
+            self.__fast_import_writer = self.__handler._spawn_fast_import()
+        return self.__fast_import_writer
+
+    def __close_fast_import(self) -> None:
+        writer, self.__fast_import_writer = self.__fast_import_writer, None
+        if writer is not None:
+            writer.close()
+
+    def __fast_import(self) -> str:
+        """Create the trees and the commit using ``git fast-import``.
+
+        The blobs of the written files have already been streamed into
+        the process. The commit is created on a temporary ref, which is
+        deleted again before ``fast-import`` exits. The new commit's
+        hash is returned.
+        """
+        idents: dict[bytes, bytes] = {}
+        for line in self.__handler._git(
+            "var", "-l", env=self.__gitenv
+        ).splitlines():
+            key, _, value = line.partition(b"=")
+            if key in (b"GIT_AUTHOR_IDENT", b"GIT_COMMITTER_IDENT"):
+                idents[key] = value
+
+        message = self.__commit_msg.encode("utf-8")
+        if not message.endswith(b"\n"):
+            message += b"\n"
+        tmpref = f"refs/capellambse/fast-import-{os.getpid()}-{id(self)}"
+
+        writer = self.__get_fast_import_writer()
+        mark = writer.new_mark()
+        writer.write(f"commit {tmpref}\nmark {mark}\n".encode("utf-8"))
+        writer.write(b"author " + idents[b"GIT_AUTHOR_IDENT"] + b"\n")
+        writer.write(b"committer " + idents[b"GIT_COMMITTER_IDENT"] + b"\n")
+        writer.write(b"data %d\n" % len(message))
+        writer.write(message)
+        writer.write(f"from {self.__old_sha}\n".encode("ascii"))
+        for path, dataref in self.__updates.items():
+            writer.write(
+                f"M 100644 {dataref} {_quote_fast_import_path(path)}\n".encode(
+                    "utf-8", errors="surrogateescape"
+                )
+            )
+        writer.write(f"\nget-mark {mark}\nreset {tmpref}\n\n".encode())
+
+        self.__fast_import_writer = None
+        commit_hash = writer.finish().decode("ascii").strip()
+        LOGGER.debug("Created commit with hash %r", commit_hash)
+        return commit_hash
+
     def __push_updates(self, remote: str) -> None:
         """Push the locally updated ``__target_ref`` to ``remote``."""
         self.__handler._git(
@@ -396,12 +589,8 @@ class _GitTransaction:
             commit,
         )
 
-    def __update_tree(
-        self,
-        old_tree: cabc.Mapping[str, _TreeEntry],
-        updates: cabc.Mapping[pathlib.PurePosixPath, str],
-    ) -> str:
-        """Apply ``updates`` to ``old_tree`` and create a new tree object."""
+    def __check_open_files(self) -> None:
+        """Warn loudly about files that are still open."""
         unclosed_files = 0
         for (_, filename), file in self.__open_files.items():
             if not file.closed:
@@ -409,6 +598,13 @@ class _GitTransaction:
                 LOGGER.warning("File is still open: %s", filename)
         if unclosed_files:
             LOGGER.critical(self.__unclosed_error, unclosed_files)
+
+    def __update_tree(
+        self,
+        old_tree: cabc.Mapping[str, _TreeEntry],
+        updates: cabc.Mapping[pathlib.PurePosixPath, str],
+    ) -> str:
+        """Apply ``updates`` to ``old_tree`` and create a new tree object."""
         tree = dict(old_tree)
 
         def groupkey(i: tuple[pathlib.PurePosixPath, str]) -> str:
@@ -445,6 +641,133 @@ class _GitTransaction:
         return tree_hash
 
 
+class _BatchProcess:
+    """A long-running git process that answers queries over its pipes.
+
+    The process is spawned lazily on the first query. Queries from
+    multiple threads are serialized using a lock, so that each request
+    is followed directly by its response on the pipes.
+
+    If a query fails half-way, the process is terminated, as the state
+    of the protocol is unknown at that point. The next query will
+    transparently spawn a new process.
+    """
+
+    def __init__(
+        self,
+        command: cabc.Sequence[str],
+        *,
+        cwd: pathlib.Path,
+        env: dict[str, str],
+    ) -> None:
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.lock = threading.Lock()
+        self.__process: subprocess.Popen[bytes] | None = None
+
+    def query(
+        self,
+        request: bytes,
+        reader: cabc.Callable[[t.BinaryIO], _T],
+    ) -> _T:
+        """Send a request to the process and read back its response.
+
+        Parameters
+        ----------
+        request
+            The raw bytes to write to the process' standard input.
+        reader
+            A callable that reads exactly one response from the
+            process' standard output and returns it.
+        """
+        with self.lock:
+            process = self.__start()
+            assert process.stdin is not None
+            assert process.stdout is not None
+            try:
+                process.stdin.write(request)
+                process.stdin.flush()
+                return reader(t.cast(t.BinaryIO, process.stdout))
+            except BaseException:
+                self.__stop()
+                raise
+
+    def close(self) -> None:
+        """Shut down the process, if it is running."""
+        with self.lock:
+            self.__stop()
+
+    def __start(self) -> subprocess.Popen[bytes]:
+        if self.__process is None or self.__process.poll() is not None:
+            # pylint: disable=consider-using-with
+            LOGGER.debug("Spawning long-running process: %r", self.command)
+            self.__process = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self.__process
+
+    def __stop(self) -> None:
+        process, self.__process = self.__process, None
+        if process is None:
+            return
+
+        assert process.stdin is not None
+        assert process.stdout is not None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+
+def _read_batch_blob(stdout: t.BinaryIO) -> bytes | None:
+    """Read one response of ``git cat-file --batch``.
+
+    Returns None if the requested object does not exist or is not a
+    blob.
+    """
+    header = stdout.readline()
+    if not header.endswith(b"\n"):
+        raise RuntimeError("git cat-file exited unexpectedly")
+    if header.endswith((b" missing\n", b" ambiguous\n")):
+        return None
+
+    _, type, size = header.split()
+    content = stdout.read(int(size))
+    if len(content) != int(size) or stdout.read(1) != b"\n":
+        raise RuntimeError("git cat-file exited unexpectedly")
+    if type != b"blob":
+        return None
+    return content
+
+
+def _read_check_attr(stdout: t.BinaryIO) -> bytes:
+    """Read one response of ``git check-attr --stdin -z``.
+
+    Returns the value of the (single) queried attribute.
+    """
+    fields: list[bytes] = []
+    while len(fields) < 3:
+        field = bytearray()
+        while (char := stdout.read(1)) != b"\0":
+            if not char:
+                raise RuntimeError("git check-attr exited unexpectedly")
+            field += char
+        fields.append(bytes(field))
+    return fields[2]
+
+
 class GitFileHandler(FileHandler):
     """File handler for ``git://`` and related protocols.
 
@@ -481,6 +804,25 @@ class GitFileHandler(FileHandler):
         Note that, when this is set to ``True`` (the default), existing
         non-shallow caches will be made shallow. However, when it is set
         to ``False``, shallow caches will not be unshallowed.
+    partial_clone
+        Make a partial clone, which initially only downloads commits and
+        trees, but no file contents. The contents of each file are then
+        downloaded on demand when it is opened for the first time. This
+        requires the server to support the ``blob:none`` filter (see
+        ``uploadpack.allowFilter`` in ``git-config(1)``).
+    sparse
+        Like ``partial_clone``, but additionally download the contents
+        of all files below ``subdir`` in a single batch while setting up
+        the file handler. Files outside of ``subdir`` are still
+        downloaded on demand.
+    prefetch_lfs
+        Download all Git-LFS files below ``subdir`` in a single batch
+        while setting up the file handler, instead of downloading each
+        file individually when it is opened for the first time. Opened
+        files are then read directly from the local LFS object store.
+    lfs_concurrency
+        The number of concurrent transfers to use for the LFS prefetch.
+        Defaults to the ``lfs.concurrenttransfers`` setting of Git-LFS.
 
     Attributes
     ----------
@@ -500,10 +842,16 @@ class GitFileHandler(FileHandler):
     known_hosts_file: str
     cache_dir: pathlib.Path
     shallow: bool
+    partial_clone: bool
+    sparse: bool
 
+    __catfile: _BatchProcess
+    __checkattr: _BatchProcess
     __fnz: object
     __has_lfs: bool
     __lfsfiles: dict[pathlib.PurePosixPath, bool]
+    __lfsmediadir: pathlib.Path | None
+    __lfsobjects: dict[pathlib.PurePosixPath, _LFSPointer]
     __repo: pathlib.Path
 
     def __init__(
@@ -519,6 +867,10 @@ class GitFileHandler(FileHandler):
         *,
         subdir: str | pathlib.PurePosixPath = "/",
         shallow: bool = True,
+        partial_clone: bool = False,
+        sparse: bool = False,
+        prefetch_lfs: bool = False,
+        lfs_concurrency: int | None = None,
     ) -> None:
         super().__init__(path, subdir=subdir)
         self.disable_cache = disable_cache
@@ -528,6 +880,8 @@ class GitFileHandler(FileHandler):
         self.known_hosts_file = known_hosts_file
         self.update_cache = update_cache
         self.shallow = shallow
+        self.partial_clone = partial_clone or sparse
+        self.sparse = sparse
 
         self.cache_dir = None  # type: ignore[assignment]
         self.__hash, self.revision = self.__resolve_remote_ref(revision)
@@ -536,15 +890,27 @@ class GitFileHandler(FileHandler):
         self.__init_worktree()
 
         self._transaction: _GitTransaction | None = None
+        self.__lfsmediadir = None
         try:
-            self._git("lfs", "env", silent=True)
+            lfsenv = self._git("lfs", "env", silent=True, encoding="utf-8")
         except subprocess.CalledProcessError:
             LOGGER.debug("LFS not installed, disabling related functionality")
             self.__has_lfs = False
         else:
             LOGGER.debug("LFS support detected")
             self.__has_lfs = True
+            for line in lfsenv.splitlines():
+                key, _, value = line.partition("=")
+                if key == "LocalMediaDir" and value:
+                    self.__lfsmediadir = pathlib.Path(value)
         self.__lfsfiles = {}
+        self.__lfsobjects = {}
+
+        if prefetch_lfs:
+            if self.__has_lfs and self.__lfsmediadir is not None:
+                self.__prefetch_lfs(lfs_concurrency)
+            else:
+                LOGGER.debug("Cannot prefetch LFS files without git-lfs")
 
     def open(
         self,
@@ -578,20 +944,41 @@ class GitFileHandler(FileHandler):
     def __open_writable(self, path: pathlib.PurePosixPath) -> t.BinaryIO:
         assert self._transaction is not None
 
-        cls: type[_WritableLFSFile] | type[_WritableIndexFile]
-        if self.__is_lfs(path):
-            cls = _WritableLFSFile
+        file: t.BinaryIO
+        if self._transaction.fast_import:
+            file = _BufferedIndexFile(  # type: ignore[abstract]
+                cb=functools.partial(self._transaction.record_content, path)
+            )
         else:
-            cls = _WritableIndexFile
-        file = cls(
-            cb=functools.partial(self._transaction.record_update, path),
-            cwd=self.cache_dir,
-            env=self.__get_git_env(),
-            filename=path,
-        )
+            file = _WritableIndexFile(  # type: ignore[abstract]
+                cb=functools.partial(self._transaction.record_update, path),
+                cwd=self.cache_dir,
+                env=self.__get_git_env(),
+                filename=path,
+            )
+        if self.__is_lfs(path):
+            file = _WritableLFSFile(  # type: ignore[abstract]
+                file,
+                cwd=self.cache_dir,
+                env=self.__get_git_env(),
+                filename=path,
+            )
         self._transaction.record_pending_update(path, file)
         return file
 
+    def _discard_lfs_prefetch(self) -> None:
+        """Forget the LFS pointers that were prefetched for ``revision``.
+
+        This must be called after moving the ``revision`` to a different
+        commit, as the files may have changed in the new commit.
+        """
+        self.__lfsobjects = {}
+
+    def _spawn_fast_import(self) -> _FastImportWriter:
+        return _FastImportWriter(  # type: ignore[abstract]
+            cwd=self.cache_dir, env=self.__get_git_env()
+        )
+
     def get_model_info(self) -> modelinfo.ModelInfo:
         def revparse(*args: str) -> str:
             return (
@@ -622,8 +1009,13 @@ class GitFileHandler(FileHandler):
 
     @staticmethod
     def __cleanup_worktree(
-        repo_root: pathlib.Path, worktree: pathlib.Path, /
+        repo_root: pathlib.Path,
+        worktree: pathlib.Path,
+        /,
+        *processes: _BatchProcess,
     ) -> None:
+        for process in processes:
+            process.close()
         LOGGER.debug("Removing worktree at %s", worktree)
         subprocess.run(
             ["git", "worktree", "remove", "-f", str(worktree)],
@@ -703,15 +1095,62 @@ class GitFileHandler(FileHandler):
             self._git("remote", "add", "--mirror=fetch", "origin", self.path)
             update_cache = True
 
+        if self.partial_clone:
+            self._git("config", "remote.origin.promisor", "true")
+            self._git(
+                "config", "remote.origin.partialclonefilter", "blob:none"
+            )
+
         if update_cache:
             LOGGER.debug("Updating cache at %s", self.cache_dir)
+            fetchspec = f"+{self.revision}"
+            if not _git_object_name.search(self.revision):
+                fetchspec += f":{self.revision}"
             shallow_opts: tuple[str, ...] = ()
             if self.shallow:
-                fetchspec = f"+{self.revision}"
-                if not _git_object_name.search(self.revision):
-                    fetchspec += f":{self.revision}"
                 shallow_opts = ("--depth=1", fetchspec)
-            self._git("fetch", self.path, *shallow_opts)
+            if self.partial_clone:
+                # Blobs can only be fetched lazily from a named remote
+                if not self.shallow:
+                    shallow_opts = (fetchspec,)
+                self._git(
+                    "fetch", "--filter=blob:none", "origin", *shallow_opts
+                )
+            else:
+                self._git("fetch", self.path, *shallow_opts)
+
+        if self.sparse:
+            self.__fetch_subdir_blobs()
+
+    def __fetch_subdir_blobs(self) -> None:
+        """Download all missing blobs below ``subdir`` in one batch."""
+        subdir = capellambse.helpers.normalize_pure_path(".", base=self.subdir)
+        if subdir.parts:
+            tree = f"{self.__hash}:{subdir}"
+        else:
+            tree = f"{self.__hash}^{{tree}}"
+        listing = self._git(
+            "rev-list", "--objects", "--missing=print", tree, encoding="utf-8"
+        )
+        missing = [i[1:] for i in listing.splitlines() if i.startswith("?")]
+        if not missing:
+            LOGGER.debug("All files below %s are already cached", subdir)
+            return
+
+        LOGGER.debug("Fetching %d files below %s", len(missing), subdir)
+        self._git(
+            "-c",
+            "fetch.negotiationAlgorithm=noop",
+            "fetch",
+            "--no-tags",
+            "--no-write-fetch-head",
+            "--recurse-submodules=no",
+            "--filter=blob:none",
+            "--stdin",
+            "origin",
+            input="".join(f"{i}\n" for i in missing),
+            encoding="utf-8",
+        )
 
     def __resolve_remote_ref(self, ref: str) -> tuple[str, str]:
         """Resolve the given ``ref`` on the remote."""
@@ -756,8 +1195,22 @@ class GitFileHandler(FileHandler):
         self.__repo = self.cache_dir
         self.cache_dir = worktree
 
+        env = self.__get_git_env()
+        self.__catfile = _BatchProcess(
+            ["git", "cat-file", "--batch"], cwd=worktree, env=env
+        )
+        self.__checkattr = _BatchProcess(
+            ["git", "check-attr", "--stdin", "-z", "--cached", "filter"],
+            cwd=worktree,
+            env=env,
+        )
         self.__fnz = weakref.finalize(  # pylint: disable=unused-private-member
-            self, self.__cleanup_worktree, self.__repo, worktree
+            self,
+            self.__cleanup_worktree,
+            self.__repo,
+            worktree,
+            self.__catfile,
+            self.__checkattr,
         )
 
         self._git("reset", "--mixed", self.revision)
@@ -774,13 +1227,9 @@ class GitFileHandler(FileHandler):
         except KeyError:
             pass
 
-        attrs = self._git("check-attr", "--all", "--cached", "-z", "--", path)
-        for _, attr, value in capellambse.helpers.ntuples(
-            3, attrs.split(b"\0")
-        ):
-            if attr == b"filter" and value == b"lfs":
-                break
-        else:
+        request = str(path).encode("utf-8", errors="surrogateescape")
+        value = self.__checkattr.query(request + b"\0", _read_check_attr)
+        if value != b"lfs":
             self.__lfsfiles[path] = False
             return False
 
@@ -792,12 +1241,83 @@ class GitFileHandler(FileHandler):
         return True
 
     def __open_from_index(self, filename: pathlib.PurePosixPath) -> bytes:
-        return self._git("cat-file", "blob", f"{self.revision}:{filename}")
+        object = f"{self.revision}:{filename}"
+        if "\n" in object:
+            # Can't be expressed in the line-based batch protocol
+            return self._git("cat-file", "blob", object)
+
+        request = object.encode("utf-8", errors="surrogateescape") + b"\n"
+        content = self.__catfile.query(request, _read_batch_blob)
+        if content is None:
+            raise FileNotFoundError(
+                f"File not found in revision {self.revision}: {filename}"
+            )
+        return content
 
     def __open_from_lfs(self, filename: pathlib.PurePosixPath) -> bytes:
+        pointer = self.__lfsobjects.get(filename)
+        if pointer is not None:
+            assert self.__lfsmediadir is not None
+            object = self.__lfsmediadir.joinpath(
+                pointer.oid[0:2], pointer.oid[2:4], pointer.oid
+            )
+            try:
+                content = object.read_bytes()
+            except OSError:
+                pass
+            else:
+                if len(content) == pointer.size:
+                    return content
+            LOGGER.debug("Prefetched LFS object unusable for %s", filename)
+
         lfsinfo = self.__open_from_index(filename)
         return self._git("lfs", "smudge", "--", filename, input=lfsinfo)
 
+    def __prefetch_lfs(self, concurrency: int | None) -> None:
+        """Download all LFS files below ``subdir`` in one batch."""
+        assert self.__lfsmediadir is not None
+        subdir = capellambse.helpers.normalize_pure_path(".", base=self.subdir)
+        pathspec = [str(subdir)] if subdir.parts else []
+        listing = self._git(
+            "ls-tree",
+            "-r",
+            "-l",
+            "-z",
+            "--full-tree",
+            self.revision,
+            "--",
+            *pathspec,
+        )
+
+        pointers: dict[pathlib.PurePosixPath, _LFSPointer] = {}
+        for entry in listing.split(b"\0"):
+            if not entry:
+                continue
+            info, _, file = entry.partition(b"\t")
+            _, type, object, size = info.split()
+            # Pointer files are guaranteed to be smaller than 1024 bytes
+            if type != b"blob" or not size.isdigit() or int(size) >= 1024:
+                continue
+            content = self.__catfile.query(object + b"\n", _read_batch_blob)
+            pointer = _LFSPointer.fromstring(content or b"")
+            if pointer is not None:
+                path = file.decode("utf-8", errors="surrogateescape")
+                pointers[pathlib.PurePosixPath(path)] = pointer
+
+        if not pointers:
+            LOGGER.debug("No LFS files found to prefetch")
+            return
+
+        LOGGER.debug("Prefetching %d LFS files", len(pointers))
+        config: tuple[str, ...] = ()
+        if concurrency is not None:
+            config = ("-c", f"lfs.concurrenttransfers={concurrency:d}")
+        include: tuple[str, ...] = ()
+        if pathspec:
+            include = (f"--include={subdir}/**",)
+        self._git(*config, "lfs", "fetch", *include)
+        self.__lfsobjects = pointers
+
     @t.overload
     def _git(
         self,
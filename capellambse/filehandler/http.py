@@ -11,10 +11,17 @@
 from __future__ import annotations
 
 import collections.abc as cabc
+import concurrent.futures
+import hashlib
+import io
 import itertools
+import json
+import logging
 import os
 import pathlib
 import re
+import tempfile
+import threading
 import typing as t
 import urllib.parse
 
@@ -24,6 +31,20 @@ from capellambse import helpers, loader
 
 from . import FileHandler
 
+LOGGER = logging.getLogger(__name__)
+
+
+def _atomic_write(path: pathlib.Path, content: bytes) -> None:
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=path.name, delete=False
+    ) as f:
+        try:
+            f.write(content)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
 
 class DownloadStream(t.BinaryIO):
     __stream: cabc.Iterator[bytes]
@@ -93,6 +114,7 @@ class HTTPFileHandler(FileHandler):
             | None
         ) = None,
         subdir: str | pathlib.PurePosixPath = "/",
+        cache_dir: str | os.PathLike | None = None,
     ) -> None:
         """Connect to a remote server through HTTP or HTTPS.
 
@@ -144,6 +166,14 @@ class HTTPFileHandler(FileHandler):
         subdir
             Prepend this path to all requested files. It is subject to
             the same file name escaping rules explained above.
+        cache_dir
+            A directory in which to persistently cache downloaded files.
+            Cached files are revalidated with the server on every
+            ``open()`` using conditional requests (``If-None-Match`` and
+            ``If-Modified-Since``), so that unchanged files only cost a
+            ``304 Not Modified`` round trip. Responses without an
+            ``ETag`` or ``Last-Modified`` header are not cached. If not
+            given, every ``open()`` streams the full file.
         """
         if not isinstance(path, str):
             raise TypeError(
@@ -165,6 +195,14 @@ class HTTPFileHandler(FileHandler):
         if username and password:
             self.session.auth = (username, password)
 
+        if cache_dir is not None:
+            self.cache_dir: pathlib.Path | None = pathlib.Path(cache_dir)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            self.cache_dir = None
+        self.__prefetched: dict[str, bytes] = {}
+        self.__prefetch_lock = threading.Lock()
+
     def get_model_info(self) -> loader.ModelInfo:
         assert isinstance(self.path, str)
         parts = urllib.parse.urlparse(self.path)
@@ -180,6 +218,65 @@ class HTTPFileHandler(FileHandler):
     ) -> t.BinaryIO:
         if "w" in mode:
             raise NotImplementedError("Cannot upload to HTTP(S) locations")
+        url = self.__url(filename)
+        with self.__prefetch_lock:
+            content = self.__prefetched.pop(url, None)
+        if content is not None:
+            return io.BytesIO(content)
+        if self.cache_dir is not None:
+            return io.BytesIO(self.__fetch(url))
+        return DownloadStream(  # type: ignore[abstract] # false-positive
+            self.session, url
+        )
+
+    def prefetch(
+        self,
+        filenames: cabc.Iterable[str | pathlib.PurePosixPath],
+        *,
+        max_workers: int = 10,
+    ) -> None:
+        """Download multiple files concurrently.
+
+        The files are downloaded using a pool of threads, which share
+        this handler's ``session``. If a ``cache_dir`` is configured,
+        the cache is updated as well. The next call to ``open()`` for
+        each of the files will then be served from memory, without
+        contacting the server again.
+
+        Parameters
+        ----------
+        filenames
+            The files to download.
+        max_workers
+            The maximum number of concurrent downloads. The default
+            matches the connection pool size of ``requests``.
+
+        Raises
+        ------
+        FileNotFoundError
+            If one of the files does not exist on the server. All other
+            files are still downloaded.
+        """
+        urls = list(dict.fromkeys(self.__url(i) for i in filenames))
+        if not urls:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+            futures = {url: pool.submit(self.__fetch, url) for url in urls}
+
+        errors: list[BaseException] = []
+        for url, future in futures.items():
+            try:
+                content = future.result()
+            except BaseException as err:  # pylint: disable=broad-except
+                errors.append(err)
+            else:
+                with self.__prefetch_lock:
+                    self.__prefetched[url] = content
+        if errors:
+            raise errors[0]
+
+    def __url(self, filename: str | pathlib.PurePosixPath) -> str:
         assert isinstance(self.path, str)
         fname = self.subdir / helpers.normalize_pure_path(filename)
         fname_str = str(fname).lstrip("/")
@@ -189,9 +286,73 @@ class HTTPFileHandler(FileHandler):
         }
         url = re.sub("%[sq]", lambda m: replace[m.group(0)], self.path)
         assert url != self.path
-        return DownloadStream(  # type: ignore[abstract] # false-positive
-            self.session, url
-        )
+        return url
+
+    def __fetch(self, url: str) -> bytes:
+        """Download the full contents of ``url``, using the cache."""
+        cached: tuple[dict[str, str], pathlib.Path] | None = None
+        headers: dict[str, str] = {}
+        if self.cache_dir is not None:
+            cached = self.__read_cache_entry(url)
+        if cached is not None:
+            if etag := cached[0].get("etag"):
+                headers["If-None-Match"] = etag
+            if last_modified := cached[0].get("last_modified"):
+                headers["If-Modified-Since"] = last_modified
+
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            try:
+                content = cached[1].read_bytes()
+            except OSError:
+                LOGGER.debug("Cached file vanished, refetching: %s", url)
+                response = self.session.get(url)
+            else:
+                LOGGER.debug("Using cached file for %s", url)
+                return content
+
+        if response.status_code == 404:
+            raise FileNotFoundError(url)
+        response.raise_for_status()
+        if self.cache_dir is not None:
+            self.__write_cache_entry(url, response)
+        return response.content
+
+    def __cache_key(self, url: str) -> pathlib.Path:
+        assert self.cache_dir is not None
+        digest = hashlib.sha256(url.encode("utf-8", errors="surrogatepass"))
+        return self.cache_dir / digest.hexdigest()
+
+    def __read_cache_entry(
+        self, url: str
+    ) -> tuple[dict[str, str], pathlib.Path] | None:
+        path = self.__cache_key(url)
+        try:
+            with path.with_suffix(".json").open("rb") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(meta, dict) or meta.get("url") != url:
+            return None
+        return meta, path
+
+    def __write_cache_entry(
+        self, url: str, response: requests.Response
+    ) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        path = self.__cache_key(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified}
+        try:
+            _atomic_write(path, response.content)
+            _atomic_write(
+                path.with_suffix(".json"), json.dumps(meta).encode("utf-8")
+            )
+        except OSError as err:
+            LOGGER.warning("Cannot write cache entry for %s: %s", url, err)
 
     def write_transaction(self, **kw: t.Any) -> t.NoReturn:
         raise NotImplementedError(
@@ -9,11 +9,15 @@ import collections.abc as cabc
 import functools
 import html
 import importlib.resources as imr
+import io
 import itertools
 import math
 import operator
+import os
 import pathlib
 import re
+import string
+import struct
 import typing as t
 
 import lxml.html
@@ -117,19 +121,171 @@ def normalize_pure_path(
 
 
 # Text processing and rendering
+try:
+    _LAYOUT_BASIC = ImageFont.Layout.BASIC
+except AttributeError:  # Pillow < 9.1
+    # Not known to newer type stubs, which mypy may or may not see
+    _LAYOUT_BASIC = getattr(ImageFont, "LAYOUT_BASIC")
+
+
 @functools.lru_cache(maxsize=8)
 def load_font(fonttype: str, size: int) -> ImageFont.FreeTypeFont:
     for name in (fonttype, fonttype.upper(), fonttype.lower()):
         try:
-            return ImageFont.truetype(name, size)
+            return ImageFont.truetype(name, size, layout_engine=_LAYOUT_BASIC)
         except OSError:
             pass
 
     with imr.open_binary("capellambse", FALLBACK_FONT) as fallback_font:
-        return ImageFont.truetype(fallback_font, size)
+        data = io.BytesIO(fallback_font.read())
+    return ImageFont.truetype(data, size, layout_engine=_LAYOUT_BASIC)
+
+
+class _Glyph(t.NamedTuple):
+    advance: float
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+
+class TextMetrics:
+    """Precomputed glyph metrics for measuring text in a font.
+
+    Measuring a string with PIL lays out the entire string again on
+    every call. This class instead asks PIL for the advance width and
+    bounding box of every glyph once, and afterwards combines them in
+    the same way that FreeType's basic layout does. Glyphs outside of
+    the precomputed set are measured and stored on first use.
+
+    Kerning pairs are only considered if the font has a ``kern`` table,
+    which is the only source of kerning used by the basic layout.
+
+    Use :func:`get_text_metrics` to obtain a shared instance.
+    """
+
+    PRECOMPUTED = "".join(map(chr, range(0x20, 0x7F))) + "".join(
+        map(chr, range(0xA0, 0x100))
+    )
+    """Glyphs that are measured eagerly."""
+    PRECOMPUTED_KERNING = string.ascii_letters + string.digits + ".,:;-"
+    """Glyphs between which kerning is measured eagerly."""
+
+    def __init__(self, font: ImageFont.FreeTypeFont) -> None:
+        self.font = font
+        self.__glyphs: dict[str, _Glyph] = {}
+        for char in self.PRECOMPUTED:
+            self.__glyph(char)
+
+        self.__kerning: dict[str, float] | None
+        if _has_kern_table(font):
+            self.__kerning = {}
+            for pair in itertools.product(self.PRECOMPUTED_KERNING, repeat=2):
+                self.__kern(*pair)
+        else:
+            self.__kerning = None
+
+    def __glyph(self, char: str) -> _Glyph:
+        try:
+            return self.__glyphs[char]
+        except KeyError:
+            pass
+
+        (width, height), (left, top) = self.font.font.getsize(char)
+        glyph = _Glyph(
+            self.font.getlength(char), left, top, left + width, top + height
+        )
+        self.__glyphs[char] = glyph
+        return glyph
+
+    def __kern(self, prev: str, char: str) -> float:
+        assert self.__kerning is not None
+        pair = prev + char
+        try:
+            return self.__kerning[pair]
+        except KeyError:
+            pass
+
+        kerning = (
+            self.font.getlength(pair)
+            - self.__glyph(prev).advance
+            - self.__glyph(char).advance
+        )
+        self.__kerning[pair] = kerning
+        return kerning
+
+    def extent(self, text: str) -> tuple[float, float]:
+        """Calculate the size of a single line of text.
+
+        The result is the same as PIL's ``font.font.getsize(text)[0]``.
+        """
+        extent = (0.0, 0.0)
+        for extent in self.iter_extents((text,)):
+            pass
+        return extent
+
+    def iter_extents(
+        self, chunks: cabc.Iterable[str]
+    ) -> cabc.Iterator[tuple[float, float]]:
+        """Measure a line of text incrementally.
+
+        Yields the size of the concatenation of all chunks up to and
+        including the current one. Stopping the iteration early skips
+        measuring the remaining chunks.
+        """
+        pen = left = right = 0.0
+        top: int | None = None
+        bottom: int | None = None
+        prev: str | None = None
+        for chunk in chunks:
+            for char in chunk:
+                glyph = self.__glyph(char)
+                if prev is not None and self.__kerning is not None:
+                    pen += self.__kern(prev, char)
+                left = min(left, pen + glyph.left)
+                right = max(right, pen + glyph.right)
+                if top is None or glyph.top < top:
+                    top = glyph.top
+                if bottom is None or glyph.bottom > bottom:
+                    bottom = glyph.bottom
+                pen += glyph.advance
+                prev = char
+
+            if top is None or bottom is None:
+                yield (0, 0)
+            else:
+                yield (max(right, pen) - left, bottom - top)
+
+
+def _has_kern_table(font: ImageFont.FreeTypeFont) -> bool:
+    if isinstance(font.path, io.BytesIO):
+        header = font.path.getvalue()
+    elif isinstance(font.path, (str, bytes, os.PathLike)):
+        try:
+            with open(font.path, "rb") as f:
+                header = f.read(4096)
+        except OSError:
+            return True
+    else:
+        return True
+
+    if len(header) < 12 or header[:4] == b"ttcf":
+        return True
+    (num_tables,) = struct.unpack_from(">H", header, 4)
+    end = 12 + 16 * num_tables
+    if len(header) < end:
+        return True
+    return any(header[i : i + 4] == b"kern" for i in range(12, end, 16))
+
+
+@functools.lru_cache(maxsize=8)
+def get_text_metrics(
+    fonttype: str = "segoeui.ttf", size: int = 8
+) -> TextMetrics:
+    """Get the shared :class:`TextMetrics` for a font."""
+    return TextMetrics(load_font(fonttype, size))
 
 
-@functools.lru_cache(maxsize=256)
 def extent_func(
     text: str,
     fonttype: str = "segoeui.ttf",
@@ -153,9 +309,7 @@ def extent_func(
     height
         The calculated height of the text (px).
     """
-    width = height = 0
-    font = load_font(fonttype, size)
-    (width, height), _ = font.font.getsize(text)
+    width, height = get_text_metrics(fonttype, size).extent(text)
     return (width * 10 / 7, height * 10 / 7)
 
 
@@ -262,6 +416,17 @@ def word_wrap(text: str, width: float | int) -> cabc.Sequence[str]:
             words[0] = match.group(0) + words[0]
         return words
 
+    def fitting(chunks: cabc.Iterable[str]) -> int:
+        # Adding glyphs never makes a line narrower, so the scan can
+        # stop at the first chunk that overflows
+        count = 0
+        for line_width, _ in metrics.iter_extents(chunks):
+            if line_width * 10 / 7 > width:
+                break
+            count += 1
+        return count
+
+    metrics = get_text_metrics()
     output_lines = []
     input_lines = collections.deque(text.splitlines())
     while input_lines:
@@ -270,12 +435,12 @@ def word_wrap(text: str, width: float | int) -> cabc.Sequence[str]:
             output_lines.append("")
             continue
 
-        words_count = len(words)
-        while (
-            extent_func(rejoin(words, 0, words_count))[0] > width
-            and words_count > 0
-        ):
-            words_count -= 1
+        words_count = fitting(
+            itertools.chain(
+                itertools.islice(words, 1),
+                (" " + i for i in itertools.islice(words, 1, None)),
+            )
+        )
 
         if words_count > 0:
             output_lines.append(rejoin(words, 0, words_count))
@@ -284,12 +449,7 @@ def word_wrap(text: str, width: float | int) -> cabc.Sequence[str]:
 
         else:
             word = words.popleft()
-            letters_count = len(word)
-            while (
-                extent_func(word[:letters_count])[0] > width
-                and letters_count > 1
-            ):
-                letters_count -= 1
+            letters_count = max(fitting(word), 1)
 
             output_lines.append(word[:letters_count])
             if letters_count < len(word):
@@ -546,8 +706,12 @@ def xtype_of(elem: etree._Element) -> str | None:
     xtype = elem.get(ATT_XT)
     if xtype:
         return xtype
+    return _xtype_of_tag(elem.tag)
+
 
-    tagmatch = RE_TAG_NS.fullmatch(elem.tag)
+@functools.lru_cache(maxsize=4096)
+def _xtype_of_tag(qualified_tag: str) -> str | None:
+    tagmatch = RE_TAG_NS.fullmatch(qualified_tag)
     assert tagmatch is not None
     ns = tagmatch.group("ns")
     tag = tagmatch.group("tag")
@@ -559,6 +723,24 @@ def xtype_of(elem: etree._Element) -> str | None:
     return f"{nskey}:{tag}"
 
 
+def xtype_cache_info() -> functools._CacheInfo:
+    """Return statistics about the cache used by :func:`xtype_of`.
+
+    Elements without an explicit ``xsi:type`` attribute have their type
+    derived from the namespace and name of their tag. The result of
+    this, including the plugin version check, is cached per qualified
+    tag name.
+
+    Returns
+    -------
+    functools._CacheInfo
+        The cache statistics as returned by
+        :func:`functools.lru_cache`'s ``cache_info()``. The hit rate
+        can be calculated as ``hits / (hits + misses)``.
+    """
+    return _xtype_of_tag.cache_info()
+
+
 # More iteration tools
 @t.overload
 def ntuples(
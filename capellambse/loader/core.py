@@ -7,19 +7,27 @@ from __future__ import annotations
 __all__ = [
     "FragmentType",
     "MelodyLoader",
+    "ParseCache",
 ]
 
 import collections
 import collections.abc as cabc
+import concurrent.futures
 import contextlib
 import enum
+import hashlib
+import io
 import itertools
 import logging
 import operator
 import os.path
 import pathlib
+import pickle
 import re
+import shutil
 import sys
+import tempfile
+import threading
 import typing as t
 import urllib.parse
 import uuid
@@ -90,6 +98,15 @@ def _verify_extension(filename: pathlib.PurePosixPath) -> None:
         raise TypeError(ERR_BAD_EXT.format(file, file.suffix))
 
 
+def _fragment_type(filename: pathlib.PurePosixPath) -> FragmentType:
+    if filename.suffix in SEMANTIC_EXTS:
+        return FragmentType.SEMANTIC
+    elif filename.suffix in VISUAL_EXTS:
+        return FragmentType.VISUAL
+    else:
+        return FragmentType.OTHER
+
+
 def _find_refs(root: etree._Element) -> cabc.Iterable[str]:
     return itertools.chain(
         (x.split("#")[0] for x in root.xpath(".//referencedAnalysis/@href")),
@@ -97,6 +114,66 @@ def _find_refs(root: etree._Element) -> cabc.Iterable[str]:
     )
 
 
+def _scan_refs(
+    filename: pathlib.PurePosixPath, handler: filehandler.FileHandler
+) -> tuple[list[str], list[str]]:
+    """Find the referenced files and IDs of a file without keeping its tree.
+
+    This yields the same references as :func:`_find_refs`, but streams
+    through the file and discards each element after looking at it.
+
+    Returns
+    -------
+    tuple[list[str], list[str]]
+        The referenced files, and the IDs defined in the file.
+    """
+    _verify_extension(filename)
+    idtypes = IDTYPES_PER_FILETYPE[filename.suffix]
+    analyses: list[str] = []
+    resources: list[str] = []
+    ids: list[str] = []
+    with handler.open(filename) as f:
+        for _, elm in etree.iterparse(f, events=("end",), huge_tree=True):
+            for idtype in idtypes:
+                if (elm_id := elm.get(idtype)) is not None:
+                    ids.append(elm_id)
+            if elm.tag == "referencedAnalysis":
+                if (href := elm.get("href")) is not None:
+                    analyses.append(href.split("#")[0])
+            elif elm.tag == "semanticResources" and elm.text:
+                resources.append(elm.text)
+
+            elm.clear()
+            parent = elm.getparent()
+            if parent is not None:
+                while elm.getprevious() is not None:
+                    del parent[0]
+    return analyses + resources, ids
+
+
+def _iter_link_targets(element: etree._Element) -> cabc.Iterator[str]:
+    """Yield the target IDs of all links stored in ``element``'s attributes."""
+    for attr, value in element.items():
+        if "#" not in value or "<" in value or attr in IDTYPES_RESOLVED:
+            continue
+        for part in value.split():
+            _, sep, target = part.partition("#")
+            if sep and target:
+                yield target
+
+
+def _resolve_refs(
+    resource_path: pathlib.PurePosixPath, refs: cabc.Iterable[str]
+) -> list[pathlib.PurePosixPath]:
+    """Resolve references found in a file to resource paths."""
+    return [
+        helpers.normalize_pure_path(
+            _unquote_ref(ref), base=resource_path.parent
+        )
+        for ref in refs
+    ]
+
+
 def _unquote_ref(ref: str) -> str:
     ref = urllib.parse.unquote(ref)
     prefix = "platform:/resource/"
@@ -126,6 +203,141 @@ class CorruptModelError(Exception):
     """
 
 
+class ParseCache:
+    """An on-disk cache for the ID and type indexes of model fragments.
+
+    Indexing a freshly parsed fragment requires inspecting every single
+    element in Python, which dominates the load time of large models.
+    This cache stores the indexes that :class:`ModelFile` builds,
+    keyed by a hash over the fragment's raw contents. Elements are
+    recorded by their position in document order, so that a cache hit
+    only requires a (fast) parse of the XML and a cheap remapping of
+    positions to elements.
+
+    As the cache key only depends on the file contents, it works the
+    same for all file handlers.
+
+    .. warning:: Cache entries are stored as pickles. Only use cache
+       directories that are not writable by untrusted users.
+
+    Parameters
+    ----------
+    path
+        The directory in which to store the cache entries. Defaults to
+        a subdirectory of the user's cache directory.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: str | os.PathLike | None = None) -> None:
+        if path is None:
+            path = pathlib.Path(capellambse.dirs.user_cache_dir, "parsed")
+        self.path = pathlib.Path(path)
+
+    def key(self, filename: pathlib.PurePosixPath, content: bytes) -> str:
+        """Calculate the cache key for a file with the given contents."""
+        hasher = hashlib.sha256()
+        hasher.update(
+            f"{capellambse.__version__}\0{self.FORMAT_VERSION}\0".encode()
+        )
+        hasher.update(filename.suffix.encode("utf-8") + b"\0")
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def load(self, key: str) -> dict[str, t.Any] | None:
+        """Load the cached indexes for ``key``, if they exist."""
+        try:
+            with open(self.path / f"{key}.pickle", "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            LOGGER.warning(
+                "Ignoring broken parse cache entry %s: %s", key, err
+            )
+            return None
+
+    def store(self, key: str, indexes: dict[str, t.Any]) -> None:
+        """Store the indexes under ``key``."""
+        target = self.path / f"{key}.pickle"
+        tmpfile = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(tmpfile, "wb") as f:
+                pickle.dump(indexes, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmpfile.replace(target)
+        except OSError as err:
+            LOGGER.warning("Cannot write parse cache entry %s: %s", key, err)
+            tmpfile.unlink(missing_ok=True)
+
+
+class _ParsedFile(t.NamedTuple):
+    tree: etree._ElementTree
+    cache_key: str | None
+    cached_indexes: dict[str, t.Any] | None
+
+
+class _FetchedFile(t.NamedTuple):
+    parsed: _ParsedFile | None
+    """The parsed file, or None if parsing was deferred."""
+    refs: list[pathlib.PurePosixPath]
+    deferred_ids: tuple[str, ...] = ()
+    """The IDs defined in the file, if parsing was deferred."""
+
+
+def _parse_file(
+    filename: pathlib.PurePosixPath,
+    handler: filehandler.FileHandler,
+    parse_cache: ParseCache | None,
+) -> _ParsedFile:
+    """Read and parse a model file, and look it up in the ``parse_cache``.
+
+    This function does not touch any shared state, so that it can be
+    used to fetch multiple files concurrently.
+    """
+    _verify_extension(filename)
+    parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+    with handler.open(filename) as f:
+        if parse_cache is None:
+            return _ParsedFile(etree.parse(f, parser), None, None)
+        content = f.read()
+
+    tree = etree.parse(io.BytesIO(content), parser)
+    key = parse_cache.key(filename, content)
+    return _ParsedFile(tree, key, parse_cache.load(key))
+
+
+def _line_length(filename: pathlib.PurePosixPath) -> float | int:
+    if filename.suffix in SEMANTIC_EXTS:
+        return exs.LINE_LENGTH
+    return sys.maxsize
+
+
+def _serialize_file(
+    source: str,
+    target: str,
+    encoding: str,
+    line_length: float | int,
+    engine: exs.Engine,
+) -> None:
+    """Serialize the XML document in ``source`` in Capella's format.
+
+    This function is used to serialize fragments in worker processes.
+    The fragment's tree is passed in and out through temporary files,
+    so that neither side needs to hold a serialized copy of it in
+    memory.
+    """
+    parser = etree.XMLParser(huge_tree=True)
+    tree = etree.parse(source, parser)
+    exs.write(
+        tree,
+        target,
+        encoding=encoding,
+        line_length=line_length,
+        engine=engine,
+    )
+
+
 class ResourceLocationManager(dict):
     def __missing__(self, key: str) -> t.NoReturn:
         raise MissingResourceLocationError(key)
@@ -134,18 +346,38 @@ class ResourceLocationManager(dict):
 class ModelFile:
     """Represents a single file in the model (i.e. a fragment)."""
 
+    uuid_index: dict[str, ModelFile | tuple[ModelFile, ...]]
+    """Model-wide mapping from IDs to the fragment(s) defining them.
+
+    This mapping may be shared between all fragments of a model. Each
+    ID maps to the :class:`ModelFile` that contains it, or, if the ID
+    is duplicated across multiple fragments, to a tuple of all these
+    files.
+    """
+
     __xtypecache: dict[str, set[etree._Element]]
     __idcache: dict[str, etree._Element]
     __hrefsources: dict[str, etree._Element]
+    __referrers: dict[str, set[etree._Element]]
 
     @property
     def fragment_type(self) -> FragmentType:
-        if self.filename.suffix in SEMANTIC_EXTS:
-            return FragmentType.SEMANTIC
-        elif self.filename.suffix in VISUAL_EXTS:
-            return FragmentType.VISUAL
-        else:
-            return FragmentType.OTHER
+        return _fragment_type(self.filename)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether this file has been parsed and indexed yet."""
+        return self.__tree is not None
+
+    @property
+    def tree(self) -> etree._ElementTree:
+        self.load()
+        assert self.__tree is not None
+        return self.__tree
+
+    @property
+    def root(self) -> etree._Element:
+        return self.tree.getroot()
 
     def __init__(
         self,
@@ -153,25 +385,69 @@ class ModelFile:
         handler: filehandler.FileHandler,
         *,
         ignore_uuid_dups: bool,
+        uuid_index: dict[str, ModelFile | tuple[ModelFile, ...]] | None = None,
+        parse_cache: ParseCache | None = None,
+        parsed: _ParsedFile | None = None,
+        lazy: bool = False,
+        deferred_ids: cabc.Iterable[str] = (),
     ) -> None:
         self.filename = filename
         self.filehandler = handler
+        self.uuid_index = uuid_index if uuid_index is not None else {}
         self.__ignore_uuid_dups = ignore_uuid_dups
-        _verify_extension(filename)
+        self.__idcache = {}
 
-        with handler.open(filename) as f:
-            self.tree = etree.parse(
-                f, etree.XMLParser(remove_blank_text=True, huge_tree=True)
-            )
+        # Cached indexes would skip the duplicate checks, therefore the
+        # cache is only used if duplicates are considered an error.
+        if ignore_uuid_dups:
+            parse_cache = None
+        self.__parse_cache = parse_cache
 
-        self.root = self.tree.getroot()
-        self.idcache_rebuild()
+        self.__tree: etree._ElementTree | None = None
+        self.__deferred_ids: frozenset[str] = frozenset()
+        if not lazy:
+            self.__load(parsed)
+            return
+
+        # Register the IDs of deferred files up front, so that looking
+        # up or generating IDs does not need to load them
+        self.__deferred_ids = frozenset(deferred_ids)
+        for elm_id in self.__deferred_ids:
+            self.__uuid_register(elm_id)
+
+    def load(self) -> None:
+        """Parse and index this file, if that was deferred until now."""
+        if self.__tree is None:
+            LOGGER.debug("Loading deferred file %s", self.filename)
+            self.__load(None)
+
+    def __load(self, parsed: _ParsedFile | None) -> None:
+        for elm_id in self.__deferred_ids:
+            self.__uuid_unregister(elm_id)
+        self.__deferred_ids = frozenset()
+
+        parse_cache = self.__parse_cache
+        if parsed is None:
+            parsed = _parse_file(self.filename, self.filehandler, parse_cache)
+        self.__tree = parsed.tree
+
+        if parse_cache is None or parsed.cache_key is None:
+            self.idcache_rebuild()
+        elif parsed.cached_indexes is not None and self.__idcache_restore(
+            parsed.cached_indexes
+        ):
+            LOGGER.debug("Loaded indexes of %s from cache", self.filename)
+        else:
+            self.idcache_rebuild()
+            parse_cache.store(parsed.cache_key, self.__idcache_export())
 
     def __getitem__(self, key: str) -> etree._Element:
+        self.load()
         return self.__idcache[key]
 
     def enumerate_uuids(self) -> set[str]:
         """Enumerate all UUIDs used in this fragment."""
+        self.load()
         return set(self.__idcache)
 
     def idcache_index(self, subtree: etree._Element) -> None:
@@ -197,11 +473,14 @@ class ModelFile:
                     else:
                         raise CorruptModelError(msg)
                 self.__idcache[elm_id] = elm
+                self.__uuid_register(elm_id)
 
             href = elm.get("href")
             if href is not None:
                 self.__hrefsources[href.split("#")[-1]] = elm
 
+            self.linkcache_index(elm)
+
     def idcache_remove(self, source: str | etree._Element) -> None:
         """Remove the ID or all IDs below the source from the ID cache."""
         if isinstance(source, str):
@@ -209,6 +488,8 @@ class ModelFile:
                 del self.__idcache[source]
             except KeyError:
                 pass
+            else:
+                self.__uuid_unregister(source)
 
         else:
             for elm in source.iter():
@@ -224,27 +505,121 @@ class ModelFile:
                         del self.__idcache[elm_id]
                     except KeyError:
                         pass
+                    else:
+                        self.__uuid_unregister(elm_id)
                 href = elm.get("href")
                 if href is not None:
                     del self.__hrefsources[href.split("#")[-1]]
 
+                self.linkcache_remove(elm)
+
     def idcache_rebuild(self) -> None:
         """Invalidate and rebuild this file's ID cache."""
+        if self.__tree is None:
+            self.load()
+            return
+
         LOGGER.debug("Indexing file %s...", self.filename)
+        for elm_id in self.__idcache:
+            self.__uuid_unregister(elm_id)
         self.__xtypecache = collections.defaultdict(set)
         self.__idcache = {}
         self.__hrefsources = {}
+        self.__referrers = collections.defaultdict(set)
         self.idcache_index(self.root)
         LOGGER.debug("Cached %d element IDs", len(self.__idcache))
 
+    def __idcache_export(self) -> dict[str, t.Any]:
+        positions = {elm: i for i, elm in enumerate(self.root.iter())}
+        return {
+            "count": len(positions),
+            "xtypes": {
+                k: [positions[i] for i in v]
+                for k, v in self.__xtypecache.items()
+            },
+            "ids": {
+                k: positions[v]
+                for k, v in self.__idcache.items()
+                if v is not None
+            },
+            "hrefs": {k: positions[v] for k, v in self.__hrefsources.items()},
+            "referrers": {
+                k: [positions[i] for i in v]
+                for k, v in self.__referrers.items()
+            },
+        }
+
+    def __idcache_restore(self, indexes: dict[str, t.Any]) -> bool:
+        elements = list(self.root.iter())
+        if indexes.get("count") != len(elements):
+            LOGGER.warning("Parse cache mismatch for %s", self.filename)
+            return False
+
+        self.__xtypecache = collections.defaultdict(set)
+        for k, v in indexes["xtypes"].items():
+            self.__xtypecache[k] = {elements[i] for i in v}
+        self.__idcache = {k: elements[v] for k, v in indexes["ids"].items()}
+        self.__hrefsources = {
+            k: elements[v] for k, v in indexes["hrefs"].items()
+        }
+        self.__referrers = collections.defaultdict(set)
+        for k, v in indexes["referrers"].items():
+            self.__referrers[k] = {elements[i] for i in v}
+        for elm_id in self.__idcache:
+            self.__uuid_register(elm_id)
+        return True
+
     def idcache_reserve(self, new_id: str) -> None:
         """Reserve the given ID for an element to be inserted later."""
         self.__idcache[new_id] = None
+        self.__uuid_register(new_id)
+
+    def __uuid_register(self, elm_id: str) -> None:
+        owner = self.uuid_index.get(elm_id)
+        if owner is None:
+            self.uuid_index[elm_id] = self
+        elif isinstance(owner, tuple):
+            if self not in owner:
+                self.uuid_index[elm_id] = (*owner, self)
+        elif owner is not self:
+            self.uuid_index[elm_id] = (owner, self)
+
+    def __uuid_unregister(self, elm_id: str) -> None:
+        owner = self.uuid_index.get(elm_id)
+        if owner is self:
+            del self.uuid_index[elm_id]
+        elif isinstance(owner, tuple) and self in owner:
+            remaining = tuple(i for i in owner if i is not self)
+            if len(remaining) == 1:
+                self.uuid_index[elm_id] = remaining[0]
+            else:
+                self.uuid_index[elm_id] = remaining
+
+    def linkcache_index(self, element: etree._Element) -> None:
+        """Record the links stored in ``element``'s attributes."""
+        for target in _iter_link_targets(element):
+            self.__referrers[target].add(element)
+
+    def linkcache_remove(self, element: etree._Element) -> None:
+        """Forget the links stored in ``element``'s attributes."""
+        for target in _iter_link_targets(element):
+            referrers = self.__referrers.get(target)
+            if referrers is None:
+                continue
+            referrers.discard(element)
+            if not referrers:
+                del self.__referrers[target]
+
+    def find_references(self, element_id: str) -> cabc.Set[etree._Element]:
+        """Find all elements in this file that link to ``element_id``."""
+        self.load()
+        return self.__referrers.get(element_id, frozenset())
 
     def iterall_xt(
         self, xtypes: cabc.Container[str]
     ) -> cabc.Iterator[etree._Element]:
         """Iterate over all elements in this tree by ``xsi:type``."""
+        self.load()
         for xtype, elms in self.__xtypecache.items():
             if xtype in xtypes:
                 yield from elms
@@ -253,21 +628,32 @@ class ModelFile:
         self,
         filename: pathlib.PurePosixPath,
         encoding: str = "utf-8",
+        *,
+        engine: exs.Engine = "python",
+        serialized: pathlib.Path | None = None,
     ) -> None:
-        """Write this file's XML into the file specified by ``path``."""
+        """Write this file's XML into the file specified by ``path``.
+
+        See :data:`capellambse.loader.exs.Engine` for the available
+        serializer engines.
+
+        If ``serialized`` is given, it must be a local file containing
+        the already serialized XML of this file's tree, which is then
+        copied over instead of serializing the tree again.
+        """
         LOGGER.debug("Saving tree %r to file %s", self, filename)
-        if filename.suffix in {
-            ".capella",
-            ".capellafragment",
-            ".melodyfragment",
-            ".melodymodeller",
-        }:
-            line_length = exs.LINE_LENGTH
-        else:
-            line_length = sys.maxsize
         with self.filehandler.open(filename, "wb") as file:
+            if serialized is not None:
+                with serialized.open("rb") as source:
+                    shutil.copyfileobj(source, file, exs.CHUNK_SIZE)
+                return
+
             exs.write(
-                self.tree, file, encoding=encoding, line_length=line_length
+                self.tree,
+                file,
+                encoding=encoding,
+                line_length=_line_length(filename),
+                engine=engine,
             )
 
     def unfollow_href(self, element_id: str) -> etree._Element:
@@ -276,12 +662,21 @@ class ModelFile:
         If the given UUID is not linked to from this file, None is
         returned.
         """
+        self.load()
         return self.__hrefsources.get(element_id)
 
 
 class MelodyLoader:
     """Facilitates extensive access to Polarsys / Capella projects."""
 
+    generation: int
+    """Counter that is increased whenever elements are removed.
+
+    Elements are also removed temporarily while moving them, so this can
+    be used to invalidate caches that depend on the position of elements
+    in the model.
+    """
+
     def __init__(
         self,
         path: str | os.PathLike | filehandler.FileHandler,
@@ -292,9 +687,12 @@ class MelodyLoader:
             filehandler.FileHandler | str | os.PathLike | dict[str, t.Any],
         ]
         | None = None,
+        parse_cache: bool | str | os.PathLike | ParseCache = False,
+        load_workers: int = 1,
+        lazy_load: bool | cabc.Iterable[FragmentType] = False,
         **kwargs: t.Any,
     ) -> None:
-        """Construct a MelodyLoader.
+        r"""Construct a MelodyLoader.
 
         Parameters
         ----------
@@ -307,6 +705,37 @@ class MelodyLoader:
         resources
             Additional file handler instances that provide library
             resources that are referenced from the model.
+        parse_cache
+            Reuse the indexes built for unchanged fragments in previous
+            runs, which greatly speeds up loading large models. Pass
+            ``True`` to store them in the user's cache directory, or a
+            path or :class:`ParseCache` instance to use a different
+            location. Disabled by default.
+        load_workers
+            The number of threads used to fetch and parse model files.
+            With more than one thread, referenced files are fetched
+            concurrently as soon as they are discovered, which mostly
+            helps with file handlers that need a network round trip or
+            a subprocess per file. Files are still indexed one after
+            another in a deterministic order. All file handlers used by
+            the model must support concurrent calls to ``open()``.
+        lazy_load
+            Defer parsing files of these :class:`FragmentType`\ s until
+            they are first needed, for example by following a link into
+            them, by iterating over their elements, or by enumerating
+            the diagrams. ``True`` is a shorthand for deferring only
+            :attr:`FragmentType.VISUAL` files, which avoids keeping
+            the large ``.aird`` files in memory when working only with
+            the semantic model.
+
+            While loading the model, deferred files are only streamed
+            through once to discover the files they reference and the
+            IDs they define. Looking up an ID therefore only loads the
+            deferred file that defines it, and newly generated IDs are
+            unique across deferred files as well. Deferred files are not
+            considered when checking for duplicate UUIDs, and they are
+            not written back when saving unless they have been loaded in
+            the meantime.
         kwargs
             Additional arguments to the primary file handler, if
             necessary.
@@ -357,10 +786,30 @@ class MelodyLoader:
         if self.entrypoint.suffix != ".aird":
             raise ValueError("Invalid entrypoint, specify the ``.aird`` file")
 
+        self.__load_workers = load_workers
+        if lazy_load is True:
+            self.__lazy_load: frozenset[FragmentType] = frozenset(
+                {FragmentType.VISUAL}
+            )
+        elif lazy_load is False:
+            self.__lazy_load = frozenset()
+        else:
+            self.__lazy_load = frozenset(lazy_load)
+        if parse_cache is False or self.__ignore_uuid_dups:
+            self.__parse_cache: ParseCache | None = None
+        elif parse_cache is True:
+            self.__parse_cache = ParseCache()
+        elif isinstance(parse_cache, ParseCache):
+            self.__parse_cache = parse_cache
+        else:
+            self.__parse_cache = ParseCache(parse_cache)
+
+        self.generation = 0
         self.trees: dict[pathlib.PurePosixPath, ModelFile] = {}
-        self.__load_referenced_files(
-            pathlib.PurePosixPath("\0", self.entrypoint)
-        )
+        self.__dirty: set[pathlib.PurePosixPath] = set()
+        self.__uuid_index: dict[str, ModelFile | tuple[ModelFile, ...]] = {}
+        self.__fragment_roots: dict[etree._Element, pathlib.PurePosixPath] = {}
+        self.__load_all_files(pathlib.PurePosixPath("\0", self.entrypoint))
 
         self.check_duplicate_uuids()
 
@@ -368,10 +817,51 @@ class MelodyLoader:
     def filehandler(self) -> filehandler.FileHandler:
         return self.resources["\0"]
 
+    @property
+    def dirty_fragments(self) -> frozenset[pathlib.PurePosixPath]:
+        """Return the fragments that were modified since the last save.
+
+        Modifications are tracked by :meth:`idcache_index`,
+        :meth:`idcache_remove`, :meth:`set_link_attribute` and
+        :meth:`mark_dirty`. The keys are the same as those used in
+        :attr:`trees`.
+        """
+        return frozenset(self.__dirty)
+
+    def mark_dirty(self, element: etree._Element | None = None) -> None:
+        """Mark the fragment containing ``element`` as modified.
+
+        The high-level model API calls this automatically. Code that
+        modifies the XML tree directly, without going through the ID
+        cache methods of this class, must call it in order for the
+        change to be written back by ``save(modified_only=True)``.
+
+        Parameters
+        ----------
+        element
+            An element within the modified fragment. Elements that are
+            not (yet) part of any fragment are ignored, as they will be
+            tracked by :meth:`idcache_index` once they are inserted. If
+            None, all loaded fragments are marked as modified.
+        """
+        if element is None:
+            self.__dirty.update(
+                name for name, tree in self.trees.items() if tree.loaded
+            )
+            return
+
+        try:
+            fragment, _ = self._find_fragment(element)
+        except ValueError:
+            return
+        self.__dirty.add(fragment)
+
     def check_duplicate_uuids(self):
         seen_ids = set[str]()
         has_dups = False
         for fragment, tree in self.trees.items():
+            if not tree.loaded:
+                continue
             tree_ids = set(tree.enumerate_uuids())
             if duplicates := seen_ids & tree_ids:
                 LOGGER.critical(
@@ -400,30 +890,115 @@ class MelodyLoader:
 
         raise ValueError("This type of file handler needs an ``entrypoint``")
 
-    def __load_referenced_files(
+    def __load_all_files(self, entrypoint: pathlib.PurePosixPath) -> None:
+        if self.__load_workers <= 1:
+            self.__load_referenced_files(entrypoint, self.__fetch_file)
+            return
+
+        pool = concurrent.futures.ThreadPoolExecutor(
+            self.__load_workers, thread_name_prefix="capellambse-loader"
+        )
+        pending: dict[
+            pathlib.PurePosixPath, concurrent.futures.Future[_FetchedFile]
+        ] = {}
+        lock = threading.Lock()
+
+        def fetch(resource_path: pathlib.PurePosixPath) -> _FetchedFile:
+            fetched = self.__fetch_file(resource_path)
+            for ref in fetched.refs:
+                submit(ref)
+            return fetched
+
+        def submit(resource_path: pathlib.PurePosixPath) -> None:
+            with lock:
+                if resource_path not in pending:
+                    pending[resource_path] = pool.submit(fetch, resource_path)
+
+        # Files are fetched and parsed concurrently, but indexed strictly
+        # in the same order as when loading sequentially.
+        try:
+            submit(entrypoint)
+            self.__load_referenced_files(
+                entrypoint, lambda i: pending[i].result()
+            )
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def __fetch_file(
         self, resource_path: pathlib.PurePosixPath
+    ) -> _FetchedFile:
+        handler = self.resources[resource_path.parts[0]]
+        filename = pathlib.PurePosixPath(*resource_path.parts[1:])
+        if _fragment_type(filename) in self.__lazy_load:
+            refs, ids = _scan_refs(filename, handler)
+            return _FetchedFile(
+                None, _resolve_refs(resource_path, refs), tuple(ids)
+            )
+
+        parsed = _parse_file(filename, handler, self.__parse_cache)
+        refs = list(_find_refs(parsed.tree.getroot()))
+        return _FetchedFile(parsed, _resolve_refs(resource_path, refs))
+
+    def __load_referenced_files(
+        self,
+        resource_path: pathlib.PurePosixPath,
+        fetch: cabc.Callable[[pathlib.PurePosixPath], _FetchedFile],
     ) -> None:
         if resource_path in self.trees:
             return
 
         handler = self.resources[resource_path.parts[0]]
         filename = pathlib.PurePosixPath(*resource_path.parts[1:])
+        fetched = fetch(resource_path)
         frag = ModelFile(
-            filename, handler, ignore_uuid_dups=self.__ignore_uuid_dups
+            filename,
+            handler,
+            ignore_uuid_dups=self.__ignore_uuid_dups,
+            uuid_index=self.__uuid_index,
+            parse_cache=self.__parse_cache,
+            parsed=fetched.parsed,
+            lazy=fetched.parsed is None,
+            deferred_ids=fetched.deferred_ids,
         )
         self.trees[resource_path] = frag
-        for ref in _find_refs(frag.root):
-            ref_name = helpers.normalize_pure_path(
-                _unquote_ref(ref), base=resource_path.parent
-            )
-            self.__load_referenced_files(ref_name)
+        if frag.loaded:
+            self.__fragment_roots[frag.root] = resource_path
+        for ref_name in fetched.refs:
+            self.__load_referenced_files(ref_name, fetch)
 
-    def save(self, **kw: t.Any) -> None:
+    def save(
+        self,
+        *,
+        serialize_workers: int | None = 1,
+        serialize_engine: exs.Engine = "python",
+        modified_only: bool = False,
+        **kw: t.Any,
+    ) -> None:
         # pylint: disable=line-too-long
         """Save all model files back to their original locations.
 
         Parameters
         ----------
+        serialize_workers
+            The number of processes used to serialize the modified
+            fragments. With more than one process, the fragments are
+            serialized in parallel before being written in the usual
+            order within a single write transaction. Pass None to use
+            one process per CPU core. Defaults to serializing all
+            fragments in the current process.
+
+            The trees are exchanged with the worker processes through
+            temporary files, so this needs additional local disk space
+            of about twice the size of the serialized fragments, but
+            avoids holding extra copies of them in memory.
+        serialize_engine
+            The serializer engine to use. Both engines produce the same
+            output, but ``"lxml"`` is considerably faster. See
+            :data:`capellambse.loader.exs.Engine`.
+        modified_only
+            Only write the fragments listed in :attr:`dirty_fragments`.
+            Changes made directly to the XML trees are only saved in
+            this mode if they were announced with :meth:`mark_dirty`.
         kw
             Additional keyword arguments accepted by the file handler in
             use. Please see the respective documentation for more info.
@@ -454,20 +1029,63 @@ class MelodyLoader:
                 " (hint: pass i_have_a_recent_backup=True)"
             )
 
+        modified: dict[pathlib.PurePosixPath, ModelFile] = {}
+        for fragment, tree in self.trees.items():
+            if fragment.parts[0] != "\0" or not tree.loaded:
+                continue
+            if modified_only and fragment not in self.__dirty:
+                LOGGER.debug("Skipping unmodified file %s", fragment)
+                continue
+            modified[fragment] = tree
+
+        if serialize_workers is None:
+            serialize_workers = os.cpu_count() or 1
+        serialize_workers = min(serialize_workers, len(modified))
+        serialized: dict[
+            pathlib.PurePosixPath,
+            tuple[pathlib.Path, concurrent.futures.Future[None]],
+        ] = {}
+
         LOGGER.debug("Saving model %r", self.get_model_info().title)
-        with self.filehandler.write_transaction(**kw) as unsupported_kws:
-            if unsupported_kws:
-                LOGGER.warning(
-                    "Ignoring unsupported transaction parameters: %s",
-                    ", ".join(repr(k) for k in unsupported_kws),
+        with contextlib.ExitStack() as stack:
+            if serialize_workers > 1:
+                workdir = pathlib.Path(
+                    stack.enter_context(tempfile.TemporaryDirectory())
                 )
-            for fname, tree in self.trees.items():
-                resname = fname.parts[0]
-                fname = pathlib.PurePosixPath(*fname.parts[1:])
-                if resname != "\0":
-                    continue
+                pool = concurrent.futures.ProcessPoolExecutor(
+                    serialize_workers
+                )
+                stack.callback(pool.shutdown, cancel_futures=True)
+                for i, (fragment, tree) in enumerate(modified.items()):
+                    source = workdir / f"{i}.in"
+                    target = workdir / f"{i}.out"
+                    tree.tree.write(os.fspath(source), encoding="utf-8")
+                    future = pool.submit(
+                        _serialize_file,
+                        os.fspath(source),
+                        os.fspath(target),
+                        "utf-8",
+                        _line_length(fragment),
+                        serialize_engine,
+                    )
+                    serialized[fragment] = (target, future)
+
+            with self.filehandler.write_transaction(**kw) as unsupported_kws:
+                if unsupported_kws:
+                    LOGGER.warning(
+                        "Ignoring unsupported transaction parameters: %s",
+                        ", ".join(repr(k) for k in unsupported_kws),
+                    )
+                for fragment, tree in modified.items():
+                    fname = pathlib.PurePosixPath(*fragment.parts[1:])
+                    if fragment in serialized:
+                        target, future = serialized[fragment]
+                        future.result()
+                        tree.write_xml(fname, serialized=target)
+                    else:
+                        tree.write_xml(fname, engine=serialize_engine)
 
-                tree.write_xml(fname)
+        self.__dirty.difference_update(modified)
 
     def idcache_index(self, subtree: etree._Element) -> None:
         """Index the IDs of ``subtree``.
@@ -480,14 +1098,42 @@ class MelodyLoader:
         subtree
             The new element that was just inserted.
         """
-        try:
-            _, tree = self._find_fragment(subtree)
-        except ValueError:
-            raise ValueError(
-                "Call idcache_index() after adding the subtree"
-            ) from None
+        # The ID index may still point to the fragment that the subtree
+        # was moved away from, so look for the actual root instead
+        root = subtree.getroottree().getroot()
+        fragment = self.__fragment_of_root(root)
+        if fragment is None:
+            raise ValueError("Call idcache_index() after adding the subtree")
+        tree = self.trees[fragment]
+
+        # If the subtree was moved here from another fragment, that
+        # fragment needs to be saved as well to not duplicate its IDs
+        for source, other in self.__find_moved_from(subtree, tree):
+            other.idcache_remove(subtree)
+            self.__dirty.add(source)
+            self.generation += 1
 
         tree.idcache_index(subtree)
+        self.__dirty.add(fragment)
+
+    def __find_moved_from(
+        self, subtree: etree._Element, tree: ModelFile
+    ) -> list[tuple[pathlib.PurePosixPath, ModelFile]]:
+        owners: set[ModelFile] = set()
+        for idtype in IDTYPES_RESOLVED:
+            elm_id = subtree.get(idtype)
+            if elm_id is None:
+                continue
+            owner = self.__uuid_index.get(elm_id, ())
+            if not isinstance(owner, tuple):
+                owner = (owner,)
+            for i in owner:
+                if i is tree or not i.loaded:
+                    continue
+                with contextlib.suppress(KeyError):
+                    if i[elm_id] is subtree:
+                        owners.add(i)
+        return [(k, v) for k, v in self.trees.items() if v in owners]
 
     def idcache_remove(self, subtree: etree._Element) -> None:
         """Remove the ``subtree`` from the ID cache.
@@ -501,26 +1147,99 @@ class MelodyLoader:
             The element that is about to be removed.
         """
         try:
-            _, tree = self._find_fragment(subtree)
+            fragment, tree = self._find_fragment(subtree)
         except ValueError:
             raise ValueError(
                 "Call idcache_remove() before removing the subtree"
             ) from None
 
         tree.idcache_remove(subtree)
+        self.__dirty.add(fragment)
+        self.generation += 1
+
+    def set_link_attribute(
+        self, element: etree._Element, attr: str, value: str
+    ) -> None:
+        """Set an attribute that contains links to other elements.
+
+        Unlike setting the attribute directly on the XML element, this
+        keeps the index used by :meth:`find_references` up to date.
+
+        Parameters
+        ----------
+        element
+            The element to modify. If it is not yet part of a fragment,
+            its links will be indexed by :meth:`idcache_index` when it
+            is inserted.
+        attr
+            The name of the attribute.
+        value
+            The new value, consisting of space-separated links as
+            returned by :meth:`create_link`.
+        """
+        try:
+            fragment, tree = self._find_fragment(element)
+        except ValueError:
+            element.set(attr, value)
+            return
+
+        tree.linkcache_remove(element)
+        element.set(attr, value)
+        tree.linkcache_index(element)
+        self.__dirty.add(fragment)
+
+    def find_references(
+        self,
+        target: etree._Element | str,
+        *,
+        trees: cabc.Container[pathlib.PurePosixPath] | None = None,
+    ) -> cabc.Iterator[etree._Element]:
+        """Find all elements that link to ``target`` in an attribute.
+
+        The lookup is served from an index that is built while loading
+        the model, so it does not need to scan the model's elements.
+
+        Parameters
+        ----------
+        target
+            The target element, or its ID.
+        trees
+            Optionally restrict the search to elements that reside in
+            any of the named trees.
+
+        Yields
+        ------
+        etree._Element
+            Each element that has an attribute linking to the target.
+            Both same-fragment (``#uuid``) and cross-fragment links are
+            considered.
+        """
+        if isinstance(target, str):
+            target_ids = [target]
+        else:
+            target_ids = [
+                i for idtype in IDTYPES_RESOLVED if (i := target.get(idtype))
+            ]
+
+        for fragment, tree in self.trees.items():
+            if trees is not None and fragment not in trees:
+                continue
+            for target_id in target_ids:
+                yield from tree.find_references(target_id)
 
     def idcache_rebuild(self) -> None:
-        r"""Rebuild the ID caches of all :class:`ModelFile`\ s."""
+        r"""Rebuild the ID caches of all loaded :class:`ModelFile`\ s."""
         for tree in self.trees.values():
-            tree.idcache_rebuild()
+            if tree.loaded:
+                tree.idcache_rebuild()
 
     def generate_uuid(
         self, parent: etree._Element, *, want: str | None = None
     ) -> str:
         """Generate a unique UUID for a new child of ``parent``.
 
-        The generated ID is guaranteed to be unique across all currently
-        loaded fragments.
+        The generated ID is guaranteed to be unique across all
+        fragments, including those whose loading was deferred.
 
         Parameters
         ----------
@@ -547,9 +1266,7 @@ class MelodyLoader:
         _, tree = self._find_fragment(parent)
 
         for new_id in idstream():
-            try:
-                self[new_id]
-            except KeyError:
+            if new_id not in self.__uuid_index:
                 tree.idcache_reserve(new_id)
                 return new_id
         assert False
@@ -1009,41 +1726,49 @@ class MelodyLoader:
         if fragment is not None:
             fragment = urllib.parse.unquote(_unquote_ref(fragment))
 
-        def find_trees(
-            from_element: etree._Element | None,
-            fragment: pathlib.PurePosixPath | None,
-        ) -> cabc.Iterable[ModelFile]:
-            if fragment and from_element is None:
-                return (
-                    v for k, v in self.trees.items() if k.name == fragment.name
-                )
-            elif fragment:
-                sourcefragment = self._find_fragment(from_element)[0]
-                fragment = capellambse.helpers.normalize_pure_path(
-                    fragment, base=sourcefragment.parent
-                )
-                try:
-                    return [self.trees[fragment]]
-                except KeyError:  # pragma: no cover
-                    raise FileNotFoundError(
-                        f"Fragment not loaded: {fragment}"
-                    ) from None
-            else:
-                sourcefragment = pathlib.PurePosixPath("/")
-                if from_element is not None:
-                    sourcefragment = self._find_fragment(from_element)[0]
-                return map(
-                    operator.itemgetter(1),
-                    sorted(
-                        self.trees.items(),
-                        key=lambda tree: tree[0].name != sourcefragment.name,
-                    ),
+        if fragment is None:
+            owner = self.__uuid_index.get(ref)
+            if owner is None:
+                raise KeyError(link)
+            if isinstance(owner, tuple):
+                raise KeyError(f"Ambiguous reference: {link!r}")
+            match = owner[ref]
+        else:
+            match = self.__follow_fragment_link(
+                from_element, pathlib.PurePosixPath(fragment), ref, link
+            )
+
+        if xtype is not None:
+            actual_xtype = helpers.xtype_of(match)
+            if actual_xtype != xtype:
+                raise TypeError(
+                    f"Bad XML: Expected a {xtype!r}, got {actual_xtype!r}"
                 )
+        return match
 
-        trees = find_trees(
-            from_element,
-            pathlib.PurePosixPath(fragment) if fragment else None,
-        )
+    def __follow_fragment_link(
+        self,
+        from_element: etree._Element | None,
+        fragment: pathlib.PurePosixPath,
+        ref: str,
+        link: str,
+    ) -> etree._Element:
+        trees: cabc.Iterable[ModelFile]
+        if from_element is None:
+            trees = (
+                v for k, v in self.trees.items() if k.name == fragment.name
+            )
+        else:
+            sourcefragment = self._find_fragment(from_element)[0]
+            fragment = capellambse.helpers.normalize_pure_path(
+                fragment, base=sourcefragment.parent
+            )
+            try:
+                trees = [self.trees[fragment]]
+            except KeyError:  # pragma: no cover
+                raise FileNotFoundError(
+                    f"Fragment not loaded: {fragment}"
+                ) from None
 
         matches = []
         for tree in trees:
@@ -1055,12 +1780,6 @@ class MelodyLoader:
             raise KeyError(link)
         if len(matches) > 1:
             raise KeyError(f"Ambiguous reference: {link!r}")
-        if xtype is not None:
-            actual_xtype = helpers.xtype_of(matches[0])
-            if actual_xtype != xtype:
-                raise TypeError(
-                    f"Bad XML: Expected a {xtype!r}, got {actual_xtype!r}"
-                )
         return matches[0]
 
     def follow_links(
@@ -1113,13 +1832,41 @@ class MelodyLoader:
     def _find_fragment(
         self, element: etree._Element
     ) -> tuple[pathlib.PurePosixPath, ModelFile]:
-        root = collections.deque(
-            itertools.chain([element], element.iterancestors()), 1
-        )[0]
+        # Elements with an ID are looked up directly in the ID index.
+        # For all others, the closest ancestor with an ID is used, and
+        # only elements below ID-less ancestors need to walk up to the
+        # root of their tree.
+        top = element
+        for top in itertools.chain([element], element.iterancestors()):
+            for idtype in IDTYPES_RESOLVED:
+                elm_id = top.get(idtype)
+                if elm_id is None:
+                    continue
+                owner = self.__uuid_index.get(elm_id)
+                if isinstance(owner, ModelFile) and owner[elm_id] is top:
+                    fragment = self.__fragment_of_root(owner.root)
+                    assert fragment is not None
+                    return (fragment, owner)
+
+        fragment = self.__fragment_of_root(top)
+        if fragment is None:
+            raise ValueError("Element is not contained in any fragment")
+        return (fragment, self.trees[fragment])
+
+    def __fragment_of_root(
+        self, root: etree._Element
+    ) -> pathlib.PurePosixPath | None:
+        try:
+            return self.__fragment_roots[root]
+        except KeyError:
+            pass
+
+        # Deferred files are only added to the mapping once they're loaded
         for fragment, tree in self.trees.items():
-            if tree.root is root:
-                return (fragment, tree)
-        raise ValueError("Element is not contained in any fragment")
+            if tree.loaded and tree.root is root:
+                self.__fragment_roots[root] = fragment
+                return fragment
+        return None
 
     def _follow_href(self, element: etree._Element) -> etree._Element:
         href = element.get("href")
@@ -1129,6 +1876,8 @@ class MelodyLoader:
 
     def _unfollow_href(self, element_id: str) -> etree._Element:
         for tree in self.trees.values():
+            if not tree.loaded:
+                continue
             element = tree.unfollow_href(element_id)
             if element is not None:
                 return element
@@ -16,7 +16,11 @@ import contextlib
 import html.entities
 import io
 import os
+import pathlib
 import re
+import shutil
+import sys
+import tempfile
 import typing as t
 
 import lxml.etree
@@ -24,6 +28,7 @@ import lxml.etree
 INDENT = b"  "
 LINESEP = os.linesep.encode("ascii")
 LINE_LENGTH = 80
+CHUNK_SIZE = 64 * 1024
 
 ESCAPE_CHARS = r"[\x00-\x1F\x7F{}]"
 P_ESCAPE_TEXT = re.compile(ESCAPE_CHARS.format('"&<'))
@@ -32,6 +37,63 @@ P_NAME = re.compile(r"^(?:\{([^}]*)\})?(.+)$")
 
 ALWAYS_EXPANDED_TAGS = frozenset({"bodies"})
 
+NS_XMI = "http://www.omg.org/XMI"
+UNICODE_SPACES = "\x85\xa0\u1680\u2028\u2029\u202f\u205f\u3000" + "".join(
+    map(chr, range(0x2000, 0x200B))
+)
+LXML_INCOMPATIBLE = lxml.etree.XPath(
+    "boolean(descendant::comment()"
+    " | descendant::processing-instruction()"
+    " | descendant::text()[../* or not(normalize-space(translate("
+    f"., '{UNICODE_SPACES}', '{' ' * len(UNICODE_SPACES)}'"
+    ")))])"
+)
+"""Detect trees whose layout the ``lxml`` engine cannot reproduce.
+
+These are trees with comments or mixed content, or with text that
+consists only of whitespace.
+"""
+LXML_QUOTED_TEXT = lxml.etree.XPath(
+    "boolean(descendant::text()[contains(., '\"')])"
+)
+P_LXML_START_TAG = re.compile(r"( *)<([^\s/>]+)([^>]*?)(/?)>")
+P_LXML_ATTR = re.compile(r'([^\s=]+)="([^"]*)"')
+P_LXML_ENTITY = re.compile(r"&(?:#(\d+)|(\w+));")
+P_LXML_QUOTED_TEXT = re.compile(r'>[^<>"]*"[^<>]*<')
+P_LXML_EMPTY_EXPANDED = re.compile(
+    "<({})((?: [^>]*)?)/>".format("|".join(ALWAYS_EXPANDED_TAGS))
+)
+LXML_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"'}
+LXML_ESCAPES = (
+    ("&gt;", ">"),
+    ("&#10;", "&#xA;"),
+    ("&#13;", "&#xD;"),
+    ("&#9;", "&#x9;"),
+    ("\t", "&#x9;"),
+    ("\x7f", "&#x7F;"),
+)
+"""How lxml's escaping differs from Capella's.
+
+Replacing these is idempotent, so that it can be applied again to
+already converted output.
+"""
+
+Engine = t.Literal["python", "lxml"]
+"""The serializer engines that can be selected.
+
+``python``
+    Walks the tree and serializes each element in Python. This is the
+    reference implementation.
+``lxml``
+    Lets lxml's C serializer produce the indented XML, and only applies
+    Capella's line wrapping and escaping rules in a pass over the
+    result. This is a lot faster and produces the exact same bytes,
+    but holds one serialized copy of the whole tree in memory while
+    writing it. Trees that lxml would lay out differently, for example
+    because they contain mixed content, are transparently passed to the
+    ``python`` engine.
+"""
+
 
 @t.runtime_checkable
 class _HasWrite(t.Protocol):
@@ -39,6 +101,26 @@ class _HasWrite(t.Protocol):
         ...
 
 
+class _ChunkedWriter:
+    """Collects many small writes and passes them on in larger chunks."""
+
+    def __init__(self, file: _HasWrite, chunk_size: int) -> None:
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__buffer = bytearray()
+
+    def write(self, chunk: bytes) -> int:
+        self.__buffer += chunk
+        if len(self.__buffer) >= self.__chunk_size:
+            self.flush()
+        return len(chunk)
+
+    def flush(self) -> None:
+        if self.__buffer:
+            self.__file.write(bytes(self.__buffer))
+            self.__buffer.clear()
+
+
 def to_string(tree: lxml.etree._Element, /) -> str:
     """Serialize an XML tree as a ``str``.
 
@@ -66,6 +148,7 @@ def to_bytes(
     encoding: str = "utf-8",
     errors: str = "strict",
     declare_encoding: bool = True,
+    engine: Engine = "python",
 ) -> bytes:
     """Serialize an XML tree as a ``str``.
 
@@ -82,6 +165,8 @@ def to_bytes(
         inserted which declares the used encoding.
     errors
         How to handle errors during encoding.
+    engine
+        The serializer engine to use, see :data:`Engine`.
 
     Returns
     -------
@@ -92,7 +177,9 @@ def to_bytes(
         declaration = _declare(encoding)
     else:
         declaration = b""
-    return declaration + serialize(tree, encoding=encoding, errors=errors)
+    return declaration + serialize(
+        tree, encoding=encoding, errors=errors, engine=engine
+    )
 
 
 def write(
@@ -103,34 +190,96 @@ def write(
     encoding: str = "utf-8",
     errors: str = "strict",
     line_length: float | int = LINE_LENGTH,
+    chunk_size: int = CHUNK_SIZE,
+    engine: Engine = "python",
 ) -> None:
     """Write the XML tree to ``file``.
 
+    The XML is serialized while writing, and passed on to the file in
+    chunks of about ``chunk_size`` bytes. This avoids keeping a second,
+    serialized copy of the whole tree in memory.
+
     Parameters
     ----------
     tree
         The XML tree to serialize.
     file
-        An open file or a PathLike to write the XML into.
+        An open file or a PathLike to write the XML into. If a path to
+        an existing file is given, the XML is first written to a
+        temporary file next to it, which replaces the target only after
+        serialization succeeded. Symbolic links are followed, and the
+        file's permissions and (where possible) ownership are retained.
+        Files with multiple hard links are written in place instead.
     encoding
         The file encoding to use when opening a file.
     errors
         Set the encoding error handling behavior of newly opened files.
     line_length
         The number of characters after which to force a line break.
+    chunk_size
+        The minimum size of each chunk written to the file, except for
+        the last one.
+    engine
+        The serializer engine to use, see :data:`Engine`.
     """
     ctx: t.ContextManager[_HasWrite]
     if isinstance(file, _HasWrite):
         ctx = contextlib.nullcontext(file)
     else:
-        ctx = open(file, "wb")
+        ctx = _replace_on_success(pathlib.Path(os.fsdecode(file)))
 
-    payload = serialize(
-        tree, encoding=encoding, errors=errors, line_length=line_length
-    )
     with ctx as f:
-        f.write(_declare(encoding))
-        f.write(payload)
+        buffer = _ChunkedWriter(f, chunk_size)
+        buffer.write(_declare(encoding))
+        _serialize_tree(
+            buffer,
+            tree,
+            encoding=encoding,
+            errors=errors,
+            line_length=line_length,
+            engine=engine,
+        )
+        buffer.flush()
+
+
+@contextlib.contextmanager
+def _replace_on_success(
+    path: pathlib.Path,
+) -> cabc.Iterator[t.BinaryIO]:
+    path = path.resolve()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        stat = None
+
+    if stat is None or stat.st_nlink > 1:
+        # Nothing to protect, or replacing would break up the hard link
+        with path.open("wb") as f:
+            yield f
+        return
+
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        tmppath = pathlib.Path(f.name)
+        try:
+            yield t.cast(t.BinaryIO, f)
+        except BaseException:
+            f.close()
+            tmppath.unlink(missing_ok=True)
+            raise
+
+    try:
+        shutil.copymode(path, tmppath)
+        if hasattr(os, "chown") and (
+            stat.st_uid != os.getuid() or stat.st_gid != os.getgid()
+        ):
+            with contextlib.suppress(OSError):
+                os.chown(tmppath, stat.st_uid, stat.st_gid)
+        tmppath.replace(path)
+    except BaseException:
+        tmppath.unlink(missing_ok=True)
+        raise
 
 
 def serialize(
@@ -140,12 +289,10 @@ def serialize(
     encoding: str = "utf-8",
     errors: str = "strict",
     line_length: float | int = LINE_LENGTH,
+    engine: Engine = "python",
 ) -> bytes:
     """Serialize an XML tree.
 
-    The iterator returned by this function yields the serialized XML
-    piece by piece.
-
     Parameters
     ----------
     tree
@@ -156,13 +303,40 @@ def serialize(
         The encoding error handling behavior.
     line_length
         The number of characters after which to force a line break.
+    engine
+        The serializer engine to use, see :data:`Engine`.
 
     Returns
     -------
-    Iterator[str]
-        An iterator that yields the serialized XML piece by piece.
+    bytes
+        The serialized XML.
+
+    See Also
+    --------
+    write : Serialize directly into a file.
     """
     buffer = io.BytesIO()
+    _serialize_tree(
+        buffer,
+        tree,
+        encoding=encoding,
+        errors=errors,
+        line_length=line_length,
+        engine=engine,
+    )
+    return buffer.getvalue()
+
+
+def _serialize_tree(
+    buffer: _HasWrite,
+    tree: lxml.etree._Element | lxml.etree._ElementTree,
+    /,
+    *,
+    encoding: str,
+    errors: str,
+    line_length: float | int,
+    engine: Engine = "python",
+) -> None:
     root: lxml.etree._Element
     preceding_siblings: cabc.Iterable[lxml.etree._Comment]
     following_siblings: cabc.Iterable[lxml.etree._Comment]
@@ -181,15 +355,35 @@ def serialize(
             buffer, i, encoding=encoding, errors=errors, pos=pos, indent=0
         )
 
-    _serialize_element(
-        buffer,
-        root,
-        0,
-        encoding=encoding,
-        errors=errors,
-        line_length=line_length,
-        pos=pos,
+    if engine not in ("python", "lxml"):
+        raise ValueError(f"Unknown serializer engine: {engine!r}")
+    fast = (
+        engine == "lxml"
+        and not (root.tail or "").strip()
+        and "<".encode(encoding, errors) == b"<"
+        and not LXML_INCOMPATIBLE(root)
     )
+    try:
+        if not fast:
+            raise _LxmlUnsupported
+        _serialize_element_lxml(
+            buffer,
+            root,
+            encoding=encoding,
+            errors=errors,
+            line_length=line_length,
+            pos=pos,
+        )
+    except _LxmlUnsupported:
+        _serialize_element(
+            buffer,
+            root,
+            0,
+            encoding=encoding,
+            errors=errors,
+            line_length=line_length,
+            pos=pos,
+        )
     if (root.tail or "").strip():
         pos = _serialize_text(
             buffer,
@@ -206,7 +400,6 @@ def serialize(
         )
 
     buffer.write(b"\n")
-    return buffer.getvalue()
 
 
 def _declare(encoding: str) -> bytes:
@@ -391,6 +584,160 @@ def _serialize_element(
     return pos + len(tag) + 3
 
 
+class _LxmlUnsupported(Exception):
+    """The ``lxml`` engine cannot reproduce the layout of this tree."""
+
+
+def _serialize_element_lxml(
+    buffer: _HasWrite,
+    element: lxml.etree._Element,
+    *,
+    encoding: str,
+    errors: str,
+    pos: int,
+    line_length: float | int,
+) -> None:
+    """Serialize ``element`` like :func:`_serialize_element` does.
+
+    The element must not match :data:`LXML_INCOMPATIBLE`, and the
+    ``encoding`` must be ASCII compatible. Nothing is written to the
+    ``buffer`` if an :class:`_LxmlUnsupported` exception is raised.
+
+    lxml serializes the whole element into a single string, which is
+    then post-processed and written out line by line. Unlike with the
+    ``python`` engine, this needs memory for one serialized copy of the
+    element.
+    """
+    parent = element.getparent()
+    scope: dict[str, str] = {}
+    if parent is not None:
+        scope = {k: v for k, v in parent.nsmap.items() if k}
+    content = lxml.etree.tostring(
+        element, encoding="unicode", pretty_print=True, with_tail=False
+    ).rstrip("\n")
+
+    root_end = content.index(">")
+    if content.find("xmlns:", root_end) >= 0:
+        raise _LxmlUnsupported
+    if content.find(':version="', root_end) >= 0:
+        raise _LxmlUnsupported
+
+    # lxml escapes all ">" in attribute values, so at this point every
+    # ">" ends a tag. This no longer holds after unescaping them below.
+    content = P_LXML_EMPTY_EXPANDED.sub(r"<\1\2></\1>", content)
+    if LXML_QUOTED_TEXT(element):
+        content = P_LXML_QUOTED_TEXT.sub(_escape_lxml_quotes, content)
+
+    # Without any descendants of ``element`` being mixed content, each
+    # start tag is at the beginning of a line. Only lines that are too
+    # long or contain escaped characters need to be looked at.
+    lines = content.split("\n")
+    del content
+    root = P_LXML_START_TAG.match(lines[0])
+    assert root is not None
+    lines[0] = _format_start_tag(
+        root,
+        pos=pos,
+        line_length=line_length,
+        scope=scope,
+        is_root=parent is None,
+    )
+    wrap = line_length < sys.maxsize
+    for i, line in enumerate(lines):
+        if i > 0:
+            buffer.write(LINESEP)
+        if (
+            i > 0
+            and wrap
+            and (len(line) > line_length or "&" in line or "\x7f" in line)
+            and (tag := P_LXML_START_TAG.match(line)) is not None
+        ):
+            line = _format_start_tag(
+                tag,
+                pos=0,
+                line_length=line_length,
+                scope=None,
+                is_root=False,
+            )
+
+        for old, new in LXML_ESCAPES:
+            if old in line:
+                line = line.replace(old, new)
+        buffer.write(line.encode(encoding, errors))
+
+
+def _escape_lxml_quotes(match: re.Match[str]) -> str:
+    return match.group(0).replace('"', "&quot;")
+
+
+def _format_start_tag(
+    match: re.Match[str],
+    *,
+    pos: int,
+    line_length: float | int,
+    scope: dict[str, str] | None,
+    is_root: bool,
+) -> str:
+    """Format a line starting with a tag in lxml's output like Capella.
+
+    If ``scope`` is None, namespace declarations are not supported.
+    Otherwise it contains the namespaces declared by the ancestors.
+    """
+    indent, tag, attrs, empty = match.groups()
+    version: list[tuple[str, str]] = []
+    nsdecls: list[tuple[str, str]] = []
+    others: list[tuple[str, str]] = []
+    for attr, value in P_LXML_ATTR.findall(attrs):
+        if "&" in value:
+            value = P_LXML_ENTITY.sub(_unescape_lxml, value)
+        if attr.startswith("xmlns:"):
+            if scope is None:
+                raise _LxmlUnsupported
+            prefix = attr[6:]
+            if prefix not in scope:
+                scope = {**scope, prefix: value}
+                nsdecls.append((attr, value))
+            continue
+
+        value = _escape(value)
+        prefix, _, name = attr.rpartition(":")
+        if scope is not None and name == "version":
+            if scope.get(prefix) == NS_XMI:
+                version.append(("xmi:version", value))
+                continue
+        others.append((attr, value))
+
+    parts = [indent, "<", tag]
+    pos += len(indent) + 1 + len(tag)
+    attr_indent = INDENT.decode("ascii") * (len(indent) // len(INDENT) + 2)
+    force_break = False
+    for attr, value in version + nsdecls + others:
+        if pos > line_length or force_break:
+            parts.append(LINESEP.decode("ascii"))
+            parts.append(attr_indent)
+            pos = len(attr_indent)
+            force_break = False
+        else:
+            parts.append(" ")
+            pos += 1
+
+        parts.append(f'{attr}="{value}"')
+        pos += len(attr) + len(value) + 3
+
+        if is_root and attr == "id":
+            force_break = True
+
+    parts.append(f"{empty}>")
+    parts.append(match.string[match.end() :])
+    return "".join(parts)
+
+
+def _unescape_lxml(match: re.Match[str]) -> str:
+    if codepoint := match.group(1):
+        return chr(int(codepoint))
+    return LXML_ENTITIES[match.group(2)]
+
+
 def _serialize_text(
     buffer: _HasWrite,
     text: str,
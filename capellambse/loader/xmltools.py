@@ -20,6 +20,14 @@ import capellambse.loader
 from capellambse import helpers
 
 
+def _mark_dirty(obj: t.Any, element: etree._Element) -> None:
+    """Inform the loader owning ``obj`` that ``element`` was modified."""
+    model = getattr(obj, "_model", None)
+    loader = getattr(model, "_loader", None) or getattr(obj, "model", None)
+    if isinstance(loader, capellambse.loader.MelodyLoader):
+        loader.mark_dirty(element)
+
+
 class AttributeProperty:
     """A property that forwards access to the underlying XML element."""
 
@@ -147,6 +155,7 @@ class AttributeProperty:
             )
 
         xml_element.attrib[self.attribute] = stringified
+        _mark_dirty(obj, xml_element)
 
     def __delete__(self, obj: t.Any) -> None:
         if not self.writable:
@@ -160,6 +169,8 @@ class AttributeProperty:
             del xml_element.attrib[self.attribute]
         except KeyError:
             pass
+        else:
+            _mark_dirty(obj, xml_element)
 
     def __set_name__(self, owner: type[t.Any], name: str) -> None:
         self.__name__ = name
@@ -526,6 +537,8 @@ class XMLDictProxy(cabc.MutableMapping):
             if self.model is not None:
                 self.model.idcache_index(elem)
         self._insert_value(elem, value)
+        if self.model is not None:
+            self.model.mark_dirty(elem)
 
     def __delitem__(self, key: str) -> None:
         for elem in self.xml_element.iterchildren(self.__childtag):
@@ -23,7 +23,7 @@ import capellambse
 import capellambse.helpers
 import capellambse.pvmt
 from capellambse import filehandler, loader
-from capellambse.loader import xmltools
+from capellambse.loader import exs, xmltools
 
 from . import common, diagram  # isort:skip
 
@@ -74,6 +74,12 @@ class MelodyModel:
 
     _diagram_cache: filehandler.FileHandler
     _diagram_cache_subdir: pathlib.PurePosixPath
+    _diagram_cache_write: bool
+    _wrapper_classes: dict[
+        etree._Element,
+        tuple[dict[str | None, type[t.Any]], type[common.GenericElement]],
+    ]
+    _wrapper_classes_generation: int
 
     def __init__(
         self,
@@ -87,6 +93,7 @@ class MelodyModel:
             | None
         ) = None,
         diagram_cache_subdir: str | pathlib.PurePosixPath | None = None,
+        diagram_cache_write: bool = False,
         jupyter_untrusted: bool = False,
         **kwargs: t.Any,
     ) -> None:
@@ -153,13 +160,30 @@ class MelodyModel:
         password: str
             The password to use for logging in. Will be ignored when
             ``identity_file`` is passed as well.
+        parse_cache: bool | str | pathlib.Path
+            Reuse the indexes of unchanged model files from previous
+            runs. See :class:`~capellambse.loader.core.MelodyLoader`.
+
+            *This argument is **not** passed to the file handler.*
+        load_workers: int
+            Number of threads used to fetch and parse the model's files.
+            See :class:`~capellambse.loader.core.MelodyLoader`.
+
+            *This argument is **not** passed to the file handler.*
+        lazy_load: bool | ~collections.abc.Iterable[~capellambse.loader.core.FragmentType]
+            Defer parsing the files of these fragment types until they
+            are first used. ``True`` defers only the visual fragments
+            (``.aird`` files). See
+            :class:`~capellambse.loader.core.MelodyLoader`.
+
+            *This argument is **not** passed to the file handler.*
         diagram_cache: str | pathlib.Path | ~capellambse.filehandler.FileHandler | dict[str, ~typing.Any]
             An optional place where to find pre-rendered, cached
             diagrams. When a diagram is found in this cache, it will be
             loaded from there instead of being rendered on access. Note
             that diagrams will only be loaded from there, but not be put
             back, i.e. to use it effectively, the cache has to be
-            pre-populated.
+            pre-populated (see ``diagram_cache_write`` to change this).
 
             This argument accepts the following values:
 
@@ -177,7 +201,7 @@ class MelodyModel:
             .. warning:: When using the diagram cache, always make sure
                that the cached diagrams actually match the model version
                that is being used. There is no way to check this
-               automatically.
+               automatically, unless ``diagram_cache_write`` is enabled.
 
             The file names looked up in the cache built in the format
             ``uuid.ext``, where ``uuid`` is the UUID of the diagram (as
@@ -193,6 +217,24 @@ class MelodyModel:
             A sub-directory prefix to prepend to diagram UUIDs before
             looking them up in the ``diagram_cache``.
 
+            *This argument is **not** passed to the file handler.*
+        diagram_cache_write: bool
+            Turn the ``diagram_cache`` into a write-through cache. Every
+            freshly rendered diagram is stored in the cache (in all
+            formats that support it), and later renders are served from
+            there.
+
+            In this mode, the cache file names additionally contain a
+            digest of everything that influences the rendered diagram,
+            i.e. the diagram's representation in the ``.aird`` file, the
+            semantic elements shown on it, the render parameters and the
+            version of capellambse. The names have the format
+            ``uuid-digest.ext``. Cache entries that do not match the
+            current state of the model are therefore never served.
+
+            The cache's file handler must support write transactions.
+            Using a local directory is recommended.
+
             *This argument is **not** passed to the file handler.*
         jupyter_untrusted: bool
             If set to True, restricts or disables some features that are
@@ -218,6 +260,8 @@ class MelodyModel:
         capellambse.load_model_extensions()
 
         self._loader = loader.MelodyLoader(path, **kwargs)
+        self._wrapper_classes = {}
+        self._wrapper_classes_generation = self._loader.generation
         self.info = self._loader.get_model_info()
         self.jupyter_untrusted = jupyter_untrusted
 
@@ -246,10 +290,13 @@ class MelodyModel:
             self._diagram_cache_subdir = pathlib.PurePosixPath(
                 diagram_cache_subdir or "/"
             )
+            self._diagram_cache_write = diagram_cache_write
 
     @property
     def _element(self) -> etree._Element:
         for tree in self._loader.trees.values():
+            if tree.fragment_type is not loader.FragmentType.SEMANTIC:
+                continue
             if capellambse.helpers.xtype_of(tree.root) in {
                 XT_PROJECT,
                 XT_LIBRARY,
@@ -261,12 +308,30 @@ class MelodyModel:
     def _model(self) -> MelodyModel:
         return self
 
-    def save(self, **kw: t.Any) -> None:
+    def save(
+        self,
+        *,
+        serialize_workers: int | None = 1,
+        serialize_engine: exs.Engine = "python",
+        modified_only: bool = False,
+        **kw: t.Any,
+    ) -> None:
         # pylint: disable=line-too-long
         """Save the model back to where it was loaded from.
 
         Parameters
         ----------
+        serialize_workers
+            The number of processes used to serialize modified files in
+            parallel, or None to use all CPU cores. See
+            :meth:`capellambse.loader.core.MelodyLoader.save`.
+        serialize_engine
+            The XML serializer to use, see
+            :data:`capellambse.loader.exs.Engine`.
+        modified_only
+            Only write the files that were modified through the model
+            API, see
+            :attr:`capellambse.loader.core.MelodyLoader.dirty_fragments`.
         kw
             Additional keyword arguments accepted by the file handler in
             use. Please see the respective documentation for more info.
@@ -288,7 +353,12 @@ class MelodyModel:
         of ``True`` if you intend to save changes.
         """
         # pylint: enable=line-too-long
-        self._loader.save(**kw)
+        self._loader.save(
+            serialize_workers=serialize_workers,
+            serialize_engine=serialize_engine,
+            modified_only=modified_only,
+            **kw,
+        )
 
     def search(
         self,
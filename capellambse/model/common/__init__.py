@@ -43,7 +43,34 @@ layer-specific wrappers have precedence over layer-agnostic ones.
 
 These keys map to a further dictionary.  This second layer maps from the
 ``xsi:type``\ (s) that each wrapper handles to the wrapper class.
+
+Register new handlers with the :func:`xtype_handler` decorator, which
+also keeps the lookup caches derived from this mapping up to date.
 """
+_HANDLERS_BY_XTYPE: dict[str, dict[str | None, type[t.Any]]] = {}
+"""Cache of the handlers in ``XTYPE_HANDLERS``, per ``xsi:type``."""
+
+
+def handlers_for_xtype(xtype: str) -> dict[str | None, type[t.Any]]:
+    """Find the handlers that are registered for ``xtype``.
+
+    Returns
+    -------
+    dict[str | None, type]
+        A mapping from the keys of :data:`XTYPE_HANDLERS`, i.e. the
+        layers' ``xsi:type`` or None, to the handler registered for the
+        given ``xsi:type`` in that layer. The returned dict is cached
+        and must not be modified. Registering a new handler discards
+        the cache, so that a different dict will be returned afterwards.
+    """
+    try:
+        return _HANDLERS_BY_XTYPE[xtype]
+    except KeyError:
+        pass
+
+    handlers = {k: v[xtype] for k, v in XTYPE_HANDLERS.items() if xtype in v}
+    _HANDLERS_BY_XTYPE[xtype] = handlers
+    return handlers
 
 
 def build_xtype(class_: type[ModelObject]) -> str:
@@ -136,6 +163,7 @@ def xtype_handler(  # pylint: disable=keyword-arg-before-vararg  # PEP-570
             if xtype in XTYPE_HANDLERS[arch]:  # pragma: no cover
                 raise LookupError(f"Duplicate xsi:type {xtype} in {arch}")
             XTYPE_HANDLERS[arch][xtype] = cls
+        _HANDLERS_BY_XTYPE.clear()
         return cls
 
     return register_xtype_handler
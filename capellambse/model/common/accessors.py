@@ -26,6 +26,7 @@ __all__ = [
 
 import abc
 import collections.abc as cabc
+import inspect
 import itertools
 import operator
 import sys
@@ -847,7 +848,9 @@ class AttrProxyAccessor(WritableAccessor[T], PhysicalAccessor[T]):
                 )
             link = obj._model._loader.create_link(obj._element, value._element)
             parts.append(link)
-        obj._element.set(self.attr, " ".join(parts))
+        obj._model._loader.set_link_attribute(
+            obj._element, self.attr, " ".join(parts)
+        )
 
 
 class PhysicalLinkEndsAccessor(AttrProxyAccessor[T]):
@@ -1078,6 +1081,7 @@ class _Specification(t.MutableMapping[str, str], element.ModelObject):
         body_elem = self._body_at(k, i)
         self._element.remove(lang_elem)
         self._element.remove(body_elem)
+        self._model._loader.mark_dirty(self._element)
 
     def __getitem__(self, k: str) -> str:
         k = self._aliases.get(k, k)
@@ -1110,6 +1114,7 @@ class _Specification(t.MutableMapping[str, str], element.ModelObject):
         else:
             body = self._body_at(k, i)
             body.text = v
+        self._model._loader.mark_dirty(self._element)
 
     def _index_of(self, k: str) -> tuple[int, etree._Element]:
         for i, elm in enumerate(self._element.iterchildren("languages")):
@@ -1166,7 +1171,7 @@ class SpecificationAccessor(Accessor[_Specification]):
 class ReferenceSearchingAccessor(PhysicalAccessor[T]):
     """Searches for references to the current element elsewhere."""
 
-    __slots__ = ("attrs",)
+    __slots__ = ("attrs", "__attrnames", "__indexed_xtypes")
 
     attrs: tuple[operator.attrgetter, ...]
 
@@ -1192,14 +1197,23 @@ class ReferenceSearchingAccessor(PhysicalAccessor[T]):
         """
         super().__init__(class_, aslist=aslist)
         self.attrs = tuple(operator.attrgetter(i) for i in attrs)
+        self.__attrnames = attrs
+        self.__indexed_xtypes: t.Any = _NOT_SPECIFIED
 
     def __get__(self, obj, objtype=None):
         del objtype
         if obj is None:  # pragma: no cover
             return self
 
+        candidates: cabc.Iterable[element.GenericElement]
+        xtypes = self.__get_indexed_xtypes()
+        if xtypes is None:
+            candidates = obj._model.search(self.class_.__name__)
+        else:
+            candidates = self.__find_referencing(obj, xtypes)
+
         matches: list[etree._Element] = []
-        for candidate in obj._model.search(self.class_.__name__):
+        for candidate in candidates:
             for attr in self.attrs:
                 try:
                     value = attr(candidate)
@@ -1215,6 +1229,69 @@ class ReferenceSearchingAccessor(PhysicalAccessor[T]):
                     break
         return self._make_list(obj, matches)
 
+    def __get_indexed_xtypes(self) -> frozenset[str] | None:
+        r"""Return the candidate ``xsi:type``\ s if the index can be used.
+
+        The loader's reference index can only be used if every searched
+        attribute is a plain link stored in the XML, i.e. handled by an
+        :class:`AttrProxyAccessor` (link in an attribute of the
+        candidate) or a :class:`LinkAccessor` (link in an attribute of a
+        direct child of the candidate) on every candidate class.
+        Otherwise ``None`` is returned, and the whole model needs to be
+        searched.
+        """
+        if self.__indexed_xtypes is not _NOT_SPECIFIED:
+            return self.__indexed_xtypes
+
+        suffix = ":" + self.class_.__name__
+        xtypes: set[str] = set()
+        classes: set[type[t.Any]] = set()
+        for handlers in XTYPE_HANDLERS.values():
+            for xtype, cls in handlers.items():
+                if xtype.endswith(suffix):
+                    xtypes.add(xtype)
+                    classes.add(cls)
+
+        indexable = bool(xtypes) and all(
+            isinstance(
+                inspect.getattr_static(cls, name, None),
+                (AttrProxyAccessor, LinkAccessor),
+            )
+            for cls in classes
+            for name in self.__attrnames
+        )
+        self.__indexed_xtypes = frozenset(xtypes) if indexable else None
+        return self.__get_indexed_xtypes()
+
+    def __find_referencing(
+        self, obj: element.ModelObject, xtypes: frozenset[str]
+    ) -> list[element.GenericElement]:
+        loader = obj._model._loader
+        semantic = {
+            k
+            for k, v in loader.trees.items()
+            if v.fragment_type is capellambse.loader.FragmentType.SEMANTIC
+        }
+        roots = {
+            v.root: i
+            for i, (k, v) in enumerate(loader.trees.items())
+            if k in semantic
+        }
+
+        candidates: set[etree._Element] = set()
+        for ref in loader.find_references(obj._element, trees=semantic):
+            for elm in (ref, ref.getparent()):
+                if elm is not None and helpers.xtype_of(elm) in xtypes:
+                    candidates.add(elm)
+
+        # Return the candidates in the same order as a full model search
+        return [
+            element.GenericElement.from_model(obj._model, elm)
+            for elm in sorted(
+                candidates, key=lambda e: _document_position(e, roots)
+            )
+        ]
+
 
 class RoleTagAccessor(PhysicalAccessor):
     __slots__ = ("role_tag",)
@@ -1243,6 +1320,20 @@ class RoleTagAccessor(PhysicalAccessor):
         return self._make_list(obj, elts)
 
 
+def _document_position(
+    elm: etree._Element, roots: cabc.Mapping[etree._Element, int]
+) -> list[int]:
+    """Return a sort key that orders elements like a model search."""
+    position: list[int] = []
+    parent = elm.getparent()
+    while parent is not None:
+        position.append(parent.index(elm))
+        elm, parent = parent, parent.getparent()
+    position.append(roots.get(elm, len(roots)))
+    position.reverse()
+    return position
+
+
 def no_list(
     desc: Accessor,
     model: capellambse.MelodyModel,
@@ -1318,6 +1409,7 @@ class ElementListCouplingMixin(element.ElementList[T], t.Generic[T]):
             )
 
         accessor.__set__(self._parent, new_objs)
+        self._invalidate_indexes()
 
     def __delitem__(self, index: int | slice) -> None:
         if self.fixed_length and len(self) <= self.fixed_length:
@@ -28,7 +28,7 @@ import capellambse
 from capellambse import helpers
 from capellambse.loader import xmltools
 
-from . import XTYPE_HANDLERS, T, U, accessors
+from . import T, U, accessors, handlers_for_xtype
 
 _NOT_SPECIFIED = object()
 "Used to detect unspecified optional arguments"
@@ -160,20 +160,9 @@ class GenericElement:
         if class_ is GenericElement:
             xtype = helpers.xtype_of(element)
             if xtype is not None:
-                ancestors = model._loader.iterancestors(element)
-                for ancestor in ancestors:
-                    anc_xtype = helpers.xtype_of(ancestor)
-                    try:
-                        class_ = XTYPE_HANDLERS[anc_xtype][xtype]
-                    except KeyError:
-                        pass
-                    else:
-                        break
-                else:
-                    try:
-                        class_ = XTYPE_HANDLERS[None][xtype]
-                    except KeyError:
-                        pass
+                class_ = t.cast(
+                    "type[T]", _find_wrapper_class(model, element, xtype)
+                )
         self = class_.__new__(class_)
         self._model = model
         self._element = element
@@ -346,12 +335,46 @@ class GenericElement:
         return self.__html__()
 
 
+def _find_wrapper_class(
+    model: capellambse.MelodyModel, element: etree._Element, xtype: str
+) -> type[GenericElement]:
+    handlers = handlers_for_xtype(xtype)
+    class_ = handlers.get(None, GenericElement)
+    if len(handlers) == (None in handlers):
+        return class_
+
+    # Layer-specific handlers depend on the element's position, which
+    # requires walking up its ancestors. Remember the outcome until the
+    # next time elements are removed or moved in the model, or until new
+    # handlers are registered for this xsi:type.
+    loader = model._loader
+    if model._wrapper_classes_generation != loader.generation:
+        model._wrapper_classes.clear()
+        model._wrapper_classes_generation = loader.generation
+    try:
+        known_handlers, known_class = model._wrapper_classes[element]
+    except KeyError:
+        pass
+    else:
+        if known_handlers is handlers:
+            return known_class
+
+    for ancestor in loader.iterancestors(element):
+        anc_xtype = helpers.xtype_of(ancestor)
+        if anc_xtype in handlers:
+            class_ = handlers[anc_xtype]
+            break
+    model._wrapper_classes[element] = (handlers, class_)
+    return class_
+
+
 class ElementList(cabc.MutableSequence, t.Generic[T]):
     """Provides access to elements without affecting the underlying model."""
 
     __slots__ = (
         "_elemclass",
         "_elements",
+        "_ElementList__indexes",
         "_ElementList__mapkey",
         "_ElementList__mapvalue",
         "_model",
@@ -432,12 +455,16 @@ class ElementList(cabc.MutableSequence, t.Generic[T]):
             if single is None:
                 single = self._single
             valueset = self.make_values_container(*values)
-            indices = []
-            elements = []
-            for i, elm in enumerate(self._parent):
-                if self.ismatch(elm, valueset):
-                    indices.append(i)
-                    elements.append(self._parent._elements[i])
+            indices = None
+            if self._positive:
+                indices = self._parent._find_indexed(self, valueset)
+            if indices is None:
+                indices = [
+                    i
+                    for i, elm in enumerate(self._parent)
+                    if self.ismatch(elm, valueset)
+                ]
+            elements = [self._parent._elements[i] for i in indices]
 
             if not single:
                 return self._parent._newlist(elements)
@@ -469,6 +496,10 @@ class ElementList(cabc.MutableSequence, t.Generic[T]):
 
         def __contains__(self, value: U) -> bool:
             valueset = self.make_values_container(value)
+            if self._positive:
+                indices = self._parent._find_indexed(self, valueset)
+                if indices is not None:
+                    return bool(indices)
             for elm in self._parent:
                 if self.ismatch(elm, valueset):
                     return True
@@ -496,6 +527,10 @@ class ElementList(cabc.MutableSequence, t.Generic[T]):
         # pylint: disable=assigning-non-slot # false-positive
         self._model = model
         self._elements = elements
+        self.__indexes: dict[
+            tuple[type[ElementList._Filter], str],
+            dict[t.Any, list[int]] | None,
+        ] | None = None
         if elemclass is not None:
             self._elemclass = elemclass
         else:
@@ -627,6 +662,7 @@ class ElementList(cabc.MutableSequence, t.Generic[T]):
 
     def __delitem__(self, index: int | slice) -> None:
         del self._elements[index]
+        self._invalidate_indexes()
 
     def __getattr__(
         self,
@@ -739,6 +775,69 @@ class ElementList(cabc.MutableSequence, t.Generic[T]):
     def insert(self, index: int, value: T) -> None:
         elm: etree._Element = value._element
         self._elements.insert(index, elm)
+        self._invalidate_indexes()
+
+    def indexed(self) -> ElementList[T]:
+        """Speed up repeated filtering of this list with hash indexes.
+
+        Afterwards, each kind of filter (like ``by_name`` or
+        ``by_uuid``) builds an index over all elements when it is first
+        used on this list, so that subsequent lookups no longer need to
+        look at every element. The indexes are discarded when elements
+        are added to or removed from this list.
+
+        Changes to the attributes of the contained elements are not
+        tracked though. If elements are renamed, for example, call this
+        method again to discard outdated indexes.
+
+        Returns
+        -------
+        ElementList
+            This list, to allow chaining like
+            ``model.search("LogicalComponent").indexed()``.
+        """
+        self.__indexes = {}
+        return self
+
+    def _invalidate_indexes(self) -> None:
+        if self.__indexes:
+            self.__indexes = {}
+
+    def _find_indexed(
+        self, filter_: ElementList._Filter, valueset: cabc.Container[t.Any]
+    ) -> list[int] | None:
+        """Look up the indices of matching elements in an index.
+
+        Returns None if this list is not indexed, or if the filter
+        cannot use an index (e.g. because of unhashable values, or a
+        values container that cannot be iterated over).
+        """
+        if self.__indexes is None or not isinstance(valueset, cabc.Iterable):
+            return None
+
+        key = (type(filter_), filter_._attr)
+        try:
+            index = self.__indexes[key]
+        except KeyError:
+            index = {}
+            try:
+                for i, elm in enumerate(self):
+                    try:
+                        value = filter_.extract_key(elm)
+                    except AttributeError:
+                        continue
+                    index.setdefault(value, []).append(i)
+            except TypeError:
+                index = None
+            self.__indexes[key] = index
+        if index is None:
+            return None
+
+        try:
+            matches = {i for v in valueset for i in index.get(v, ())}
+        except TypeError:
+            return None
+        return sorted(matches)
 
     def items(self) -> ElementListMapItemsView[T]:
         return ElementListMapItemsView(self)
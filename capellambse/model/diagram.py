@@ -7,7 +7,9 @@ from __future__ import annotations
 import abc
 import base64
 import collections.abc as cabc
+import hashlib
 import importlib.metadata as imm
+import json
 import logging
 import operator
 import traceback
@@ -15,6 +17,7 @@ import typing as t
 import uuid
 
 import markupsafe
+from lxml import etree
 
 import capellambse
 from capellambse import aird, diagram, helpers, svg
@@ -36,6 +39,19 @@ class DiagramFormat(t.Protocol):
         ...
 
 
+@t.runtime_checkable
+class WritableDiagramFormat(DiagramFormat, t.Protocol):
+    """A DiagramFormat whose renders can be stored in the diagram cache."""
+
+    @classmethod
+    def to_cache(cls, dg: diagram.Diagram) -> bytes:
+        """Convert the diagram into the raw form used in the cache.
+
+        The result must be accepted by the ``from_cache`` method of all
+        formats that share the same ``filename_extension``.
+        """
+
+
 DiagramConverter = t.Union[
     t.Callable[[diagram.Diagram], t.Any],
     DiagramFormat,
@@ -71,6 +87,7 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
     _model: capellambse.MelodyModel
     _render: diagram.Diagram
     _error: BaseException
+    _cache_keys: dict[str, str | None]
     _last_render_params: dict[str, t.Any] = {}
     """
     Additional rendering parameters for the cached rendered diagram.
@@ -162,7 +179,7 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
         bundle: dict[str, t.Any] = {}
         for mime, conv in formats.items():
             try:
-                bundle[mime] = self.__load_cache(conv)
+                bundle[mime] = self.__load_cache(conv, {})
             except KeyError:
                 pass
 
@@ -172,10 +189,7 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
         render = self.__render_fresh({})
         for mime, conv in formats.items():
             try:
-                if isinstance(conv, DiagramFormat):
-                    bundle[mime] = conv.convert(render)
-                else:
-                    bundle[mime] = conv(render)
+                bundle[mime] = self.__convert(conv, render, {})
             except Exception:
                 LOGGER.exception("Failed converting diagram with %r", conv)
         if not bundle:
@@ -226,15 +240,12 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
                 return i
 
         try:
-            return self.__load_cache(conv)
+            return self.__load_cache(conv, params)
         except KeyError:
             pass
 
         render = self.__render_fresh(params)
-        if isinstance(conv, DiagramFormat):
-            return conv.convert(render)
-        else:
-            return conv(render)
+        return self.__convert(conv, render, params)
 
     @abc.abstractmethod
     def _create_diagram(self, params: dict[str, t.Any]) -> diagram.Diagram:
@@ -244,6 +255,17 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
         method, as it handles caching of the results.
         """
 
+    def _cache_key(self, params: dict[str, t.Any]) -> str | None:
+        """Calculate a digest over everything that affects the render.
+
+        The digest is used to name entries in a write-through diagram
+        cache. Subclasses that cannot reliably determine the inputs of
+        their rendering return None (the default), which disables the
+        write-through cache for them.
+        """
+        del params
+        return None
+
     def __create_error_image(
         self, stage: str, error: Exception
     ) -> diagram.Diagram:
@@ -292,7 +314,30 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
         diag.calculate_viewport()
         return diag
 
-    def __load_cache(self, converter: DiagramConverter):
+    def __cache_filename(
+        self, converter: DiagramFormat, params: dict[str, t.Any]
+    ) -> str:
+        ext = converter.filename_extension
+        if not getattr(self._model, "_diagram_cache_write", False):
+            return self.uuid + ext
+
+        # Rendering may touch the XML, so the key is calculated once
+        # before the first render and kept along with the render itself
+        params_key = json.dumps(params, sort_keys=True, default=repr)
+        try:
+            key = self._cache_keys[params_key]
+        except AttributeError:
+            self._cache_keys = {}
+            key = self._cache_keys[params_key] = self._cache_key(params)
+        except KeyError:
+            key = self._cache_keys[params_key] = self._cache_key(params)
+        if key is None:
+            raise KeyError(self.uuid)
+        return f"{self.uuid}-{key}{ext}"
+
+    def __load_cache(
+        self, converter: DiagramConverter, params: dict[str, t.Any]
+    ):
         cache_handler = getattr(self._model, "_diagram_cache", None)
         cachedir = getattr(self._model, "_diagram_cache_subdir", None)
         if cache_handler is None or cachedir is None:
@@ -302,8 +347,8 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
             raise KeyError(self.uuid)
 
         try:
-            ext = converter.filename_extension
-            with cache_handler.open(cachedir / (self.uuid + ext)) as f:
+            filename = self.__cache_filename(converter, params)
+            with cache_handler.open(cachedir / filename) as f:
                 cache = f.read()
         except FileNotFoundError:
             LOGGER.debug("Diagram not in cache: %s (%s)", self.uuid, self.name)
@@ -311,10 +356,43 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
 
         return converter.from_cache(cache)
 
+    def __convert(
+        self,
+        converter: DiagramConverter,
+        render: diagram.Diagram,
+        params: dict[str, t.Any],
+    ) -> t.Any:
+        """Convert a fresh render, storing it in the cache if enabled."""
+        if not isinstance(converter, DiagramFormat):
+            return converter(render)
+
+        if not isinstance(converter, WritableDiagramFormat) or not getattr(
+            self._model, "_diagram_cache_write", False
+        ):
+            return converter.convert(render)
+
+        try:
+            filename = self.__cache_filename(converter, params)
+        except KeyError:
+            return converter.convert(render)
+
+        cache = converter.to_cache(render)
+        cache_handler = self._model._diagram_cache
+        path = self._model._diagram_cache_subdir / filename
+        try:
+            with cache_handler.write_transaction():
+                with cache_handler.open(path, "wb") as f:
+                    f.write(cache)
+        except (OSError, NotImplementedError, RuntimeError) as err:
+            LOGGER.warning("Cannot store diagram in cache: %s: %s", path, err)
+        else:
+            LOGGER.debug("Stored diagram in cache: %s", path)
+        return converter.from_cache(cache)
+
     def __render_fresh(self, params: dict[str, t.Any]) -> diagram.Diagram:
         # pylint: disable=broad-except
         if not hasattr(self, "_render") or self._last_render_params != params:
-            self.invalidate_cache()
+            self.__discard_render()
             try:
                 self._render = self._create_diagram(params)
             except Exception as err:
@@ -327,6 +405,13 @@ class AbstractDiagram(metaclass=abc.ABCMeta):
 
     def invalidate_cache(self) -> None:
         """Reset internal diagram cache."""
+        self.__discard_render()
+        try:
+            del self._cache_keys
+        except AttributeError:
+            pass
+
+    def __discard_render(self) -> None:
         try:
             del self._render
         except AttributeError:
@@ -413,6 +498,83 @@ class Diagram(AbstractDiagram):
     def _create_diagram(self, params: dict[str, t.Any]) -> diagram.Diagram:
         return aird.parse_diagram(self._model._loader, self._element, **params)
 
+    def _cache_key(self, params: dict[str, t.Any]) -> str | None:
+        """Calculate a digest over everything that affects the render.
+
+        This includes the diagram's subtree in the ``.aird``, the
+        semantic elements it shows (along with the elements that these
+        directly refer to, like the types of parts), the render
+        parameters and the version of capellambse.
+        """
+        loader = self._model._loader
+        dgtree = loader.follow_link(
+            loader.trees[self._element.fragment].root, self._element.uid
+        )
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(capellambse.__version__.encode("utf-8"))
+        digest.update(
+            json.dumps(params, sort_keys=True, default=repr).encode("utf-8")
+        )
+        digest.update(etree.tostring(self._element.descriptor))
+        digest.update(etree.tostring(dgtree))
+
+        seen: set[int] = set()
+        for elem in dgtree.iter():
+            href = elem.get("href")
+            if href is None or href.startswith("platform:"):
+                continue
+            try:
+                target = loader.follow_link(elem, href)
+            except (KeyError, ValueError, TypeError, FileNotFoundError):
+                continue
+            _digest_element(digest, loader, target, seen, follow=True)
+        return digest.hexdigest()
+
+
+def _digest_element(
+    digest: hashlib.blake2b,
+    loader: capellambse.loader.MelodyLoader,
+    elem: etree._Element,
+    seen: set[int],
+    *,
+    follow: bool,
+) -> None:
+    """Feed the state of a semantic element into ``digest``.
+
+    The state consists of the element's tag, attributes and text, and
+    those of all descendants that are not model objects of their own
+    (i.e. have no ``id``). If ``follow`` is True, the same is done for
+    the elements referenced in the attributes.
+    """
+    if id(elem) in seen:
+        return
+    seen.add(id(elem))
+
+    links: list[str] = []
+    stack = [elem]
+    while stack:
+        current = stack.pop()
+        digest.update(f"<{current.tag}".encode("utf-8"))
+        for key, value in sorted(current.attrib.items()):
+            digest.update(f" {key}={value!r}".encode("utf-8"))
+            if follow and "#" in value:
+                links.append(value)
+        digest.update(f">{current.text or ''}".encode("utf-8"))
+        stack.extend(
+            i
+            for i in reversed(current)
+            if isinstance(i.tag, str) and "id" not in i.attrib
+        )
+
+    for value in links:
+        try:
+            targets = loader.follow_links(elem, value)
+        except (ValueError, TypeError, FileNotFoundError):
+            continue
+        for target in targets:
+            if target is not None:
+                _digest_element(digest, loader, target, seen, follow=False)
+
 
 class DiagramAccessor(c.Accessor):
     """Provides access to a list of diagrams below the specified viewpoint."""
@@ -462,6 +624,34 @@ class SVGFormat:
     def from_cache(cache: bytes) -> str:
         return cache.decode("utf-8")
 
+    @staticmethod
+    def to_cache(dg: diagram.Diagram) -> bytes:
+        return SVGFormat.convert(dg).encode("utf-8")
+
+
+class StreamSVGFormat:
+    """Convert the diagram to SVG using the streaming backend.
+
+    The result is the same as with :class:`SVGFormat`, but the SVG is
+    written directly instead of building an svgwrite object tree first.
+    See :mod:`capellambse.svg.stream`.
+    """
+
+    filename_extension = ".svg"
+    mimetype = "image/svg+xml"
+
+    @staticmethod
+    def convert(dg: diagram.Diagram) -> str:
+        return convert_svgdiagram(dg, backend="stream").to_string()
+
+    @staticmethod
+    def from_cache(cache: bytes) -> str:
+        return cache.decode("utf-8")
+
+    @staticmethod
+    def to_cache(dg: diagram.Diagram) -> bytes:
+        return StreamSVGFormat.convert(dg).encode("utf-8")
+
 
 class PNGFormat:
     """Convert the diagram to PNG."""
@@ -485,13 +675,35 @@ class PNGFormat:
     def from_cache(cache: bytes) -> bytes:
         return cache
 
+    @staticmethod
+    def to_cache(dg: diagram.Diagram) -> bytes:
+        return PNGFormat.convert(dg)
+
 
 def convert_svgdiagram(
     dg: diagram.Diagram,
+    *,
+    backend: str = "svgwrite",
 ) -> svg.generate.SVGDiagram:
-    """Convert the diagram to a SVGDiagram."""
-    jsondata = diagram.DiagramJSONEncoder().encode(dg)
-    return svg.generate.SVGDiagram.from_json(jsondata)
+    """Convert the diagram to a SVGDiagram.
+
+    The diagram elements are encoded one at a time and drawn right away,
+    without going through the intermediate JSON representation.
+    """
+    # The encoders produce the same dicts as the JSON representation,
+    # which is what the svg module's TypedDicts describe
+    metadata = t.cast(
+        "svg.generate.DiagramMetadataDict", diagram.encode_metadata(dg)
+    )
+    objects = t.cast(
+        "cabc.Iterator[svg.generate.ContentsDict]",
+        diagram.iter_encoded_elements(dg),
+    )
+    return svg.generate.SVGDiagram(
+        svg.generate.DiagramMetadata.from_dict(metadata),
+        objects,
+        backend=backend,
+    )
 
 
 class ConfluenceSVGFormat:
@@ -513,6 +725,10 @@ class ConfluenceSVGFormat:
     def from_cache(cls, cache: bytes) -> str:
         return "".join((cls.prefix, cache.decode("utf-8"), cls.postfix))
 
+    @classmethod
+    def to_cache(cls, dg: diagram.Diagram) -> bytes:
+        return SVGFormat.to_cache(dg)
+
 
 class SVGDataURIFormat:
     filename_extension = ".svg"
@@ -529,6 +745,10 @@ class SVGDataURIFormat:
         b64 = base64.standard_b64encode(cache)
         return "".join((cls.preamble, b64.decode("ascii")))
 
+    @classmethod
+    def to_cache(cls, dg: diagram.Diagram) -> bytes:
+        return SVGFormat.to_cache(dg)
+
 
 class SVGInHTMLIMGFormat:
     filename_extension = ".svg"
@@ -544,6 +764,10 @@ class SVGInHTMLIMGFormat:
         payload = SVGDataURIFormat.from_cache(cache)
         return markupsafe.Markup(f'<img src="{payload}"/>')
 
+    @staticmethod
+    def to_cache(dg: diagram.Diagram) -> bytes:
+        return SVGFormat.to_cache(dg)
+
 
 class JSONFormat:
     filename_extension = ".json"
@@ -556,6 +780,10 @@ class JSONFormat:
     def from_cache(cache: bytes) -> str:
         return cache.decode("utf-8")
 
+    @staticmethod
+    def to_cache(dg: diagram.Diagram) -> bytes:
+        return JSONFormat.convert(dg).encode("utf-8")
+
 
 class PrettyJSONFormat:
     filename_extension = ".json"
@@ -567,7 +795,12 @@ class PrettyJSONFormat:
 
     @staticmethod
     def from_cache(cache: bytes) -> str:
-        return cache.decode("utf-8")
+        return json.dumps(json.loads(cache), indent=4)
+
+    @staticmethod
+    def to_cache(dg: diagram.Diagram) -> bytes:
+        # Shares the cache file with JSONFormat, which expects it compact
+        return JSONFormat.to_cache(dg)
 
 
 def _find_format_converter(fmt: str) -> DiagramConverter:
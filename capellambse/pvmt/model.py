@@ -10,6 +10,7 @@ import typing as t
 from lxml import etree
 
 import capellambse._namespaces as _n
+from capellambse import loader
 
 from . import exceptions
 from .core import AttributeProperty, XMLDictProxy
@@ -189,8 +190,15 @@ def load_pvmt_from_model(model):
     can be used to easily access the property values of the model given
     during intialization.
     """
+    semantic_roots = [
+        tree.root
+        for tree in model.trees.values()
+        if tree.fragment_type is loader.FragmentType.SEMANTIC
+    ]
     pkgs = model.xpath(
-        XPTH_FIND_BY_XTYPE.format(X_PVMT), namespaces=_n.NAMESPACES
+        XPTH_FIND_BY_XTYPE.format(X_PVMT),
+        namespaces=_n.NAMESPACES,
+        roots=semantic_roots,
     )
     if not pkgs:
         raise ValueError("Provided model does not have a PropertyValuePkg")
@@ -5,7 +5,6 @@
 from __future__ import annotations
 
 import collections.abc as cabc
-import copy
 import dataclasses
 import logging
 import os
@@ -13,18 +12,39 @@ import re
 import typing as t
 
 from svgwrite import base, container, drawing, shapes
-from svgwrite import text as svgtext
 
 from capellambse import diagram
 from capellambse import helpers as chelpers
 
-from . import decorations, generate, helpers, style, symbols
+from . import decorations, generate, helpers, stream, style, symbols
 
 LOGGER = logging.getLogger(__name__)
 DEBUG = "CAPELLAMBSE_SVG_DEBUG" in os.environ
 """Debug flag to render helping lines."""
 LABEL_ICON_PADDING = 2
 """Default padding between a label's icon and text."""
+BACKENDS: dict[str, t.Callable[..., t.Any]] = {
+    "svgwrite": drawing.Drawing,
+    "stream": stream.StreamDrawing,
+}
+"""The available backends that SVG elements can be drawn with.
+
+``svgwrite`` builds a tree of validated :mod:`svgwrite` objects, which
+is serialized at the end. ``stream`` writes the diagram objects into a
+buffer as they are drawn, see :mod:`capellambse.svg.stream`. Both
+produce the same output.
+"""
+
+
+class DefsTemplate(t.NamedTuple):
+    """The static definitions shared by all drawings of a diagram class."""
+
+    stylesheet: style.SVGStylesheet
+    elements: tuple[stream.Prerendered, ...]
+    """The stylesheet, static decorations and gradients, in this order."""
+
+
+_DEFS_CACHE: dict[str, tuple[str, DefsTemplate]] = {}
 
 
 LabelDict = t.TypedDict(
@@ -42,9 +62,25 @@ LabelDict = t.TypedDict(
 
 
 class Drawing:
-    """The main container that stores all svg elements."""
+    """The main container that stores all svg elements.
+
+    Parameters
+    ----------
+    metadata
+        The metadata of the diagram to draw.
+    backend
+        The name of the backend to draw with, one of the keys of
+        :data:`BACKENDS`.
+    """
+
+    def __init__(
+        self, metadata: generate.DiagramMetadata, *, backend: str = "svgwrite"
+    ):
+        try:
+            factory = BACKENDS[backend]
+        except KeyError:
+            raise ValueError(f"Unknown SVG backend: {backend!r}") from None
 
-    def __init__(self, metadata: generate.DiagramMetadata):
         superparams = {
             "filename": f"{metadata.name}.svg",
             "size": metadata.size,
@@ -53,7 +89,9 @@ class Drawing:
         if metadata.class_:
             superparams["class_"] = re.sub(r"\s+", "", metadata.class_)
 
-        self.__drawing = drawing.Drawing(**superparams)
+        self.__drawing = factory(**superparams)
+        self.__defs_ids: set[str] = set()
+        self.__deployed_styles: set[tuple[str | None, str, str, str]] = set()
         self.diagram_class = metadata.class_
         self.stylesheet = self.make_stylesheet()
         self.add_backdrop(pos=metadata.pos, size=metadata.size)
@@ -95,16 +133,20 @@ class Drawing:
         self.__drawing.add(self.__backdrop)
 
     def make_stylesheet(self) -> style.SVGStylesheet:
-        """Return created stylesheet and add sheet and decorations to defs."""
-        stylesheet = style.SVGStylesheet(class_=self.diagram_class or "")
-        self.__drawing.defs.add(stylesheet.sheet)
-        for name in stylesheet.static_deco:
-            self.__drawing.defs.add(decorations.deco_factories[name]())
+        """Return the stylesheet and add it and the decorations to defs.
 
-        for grad in stylesheet.yield_gradients():
-            self.__drawing.defs.add(grad)
+        The definitions are shared with all other drawings of the same
+        diagram class, see :func:`get_defs_template`.
+        """
+        template = get_defs_template(self.diagram_class or "")
+        for element in template.elements:
+            self.__add_def(element)
+        return template.stylesheet
 
-        return stylesheet
+    def __add_def(self, element: t.Any) -> None:
+        self.__drawing.defs.add(element)
+        if (id_ := element.attribs.get("id")) is not None:
+            self.__defs_ids.add(id_)
 
     def __repr__(self) -> str:
         return self.__drawing._repr_svg_()
@@ -329,8 +371,8 @@ class Drawing:
         y = get_label_position_y(builder, lines)
         for line in lines.lines:
             text.add(
-                svgtext.TSpan(
-                    insert=(x, y), text=line, **{"xml:space": "preserve"}
+                self.__drawing.tspan(
+                    line, insert=(x, y), **{"xml:space": "preserve"}
                 )
             )
             y += lines.line_height
@@ -455,15 +497,16 @@ class Drawing:
         except AttributeError:
             raise ValueError(f'Invalid object type: {obj["type"]}') from None
 
-        mobj = copy.deepcopy(obj)
         objparams = {
             f"{k}_": v for k, v in obj.items() if k not in {"type", "style"}
         }
         if obj["class"] in decorations.all_ports:
-            mobj["type"] = "box"  # type: ignore[index]
+            type_ = "box"
+        else:
+            type_ = obj["type"]
 
-        class_: str = mobj["type"].capitalize() + (
-            f".{mobj['class']}" if "class" in obj else ""
+        class_: str = type_.capitalize() + (
+            f".{obj['class']}" if "class" in obj else ""
         )
         obj_style = style.Styling(
             self.diagram_class,
@@ -481,7 +524,7 @@ class Drawing:
             },
         )
 
-        self.obj_cache[mobj["id"]] = obj
+        self.obj_cache[obj["id"]] = obj
 
         drawfunc(**objparams, obj_style=obj_style, text_style=text_style)
 
@@ -489,7 +532,26 @@ class Drawing:
         self._deploy_defs(text_style)
 
     def _deploy_defs(self, styling: style.Styling) -> None:
-        defs_ids = {d.attribs.get("id") for d in self.__drawing.defs.elements}
+        """Add the gradients and markers used by ``styling`` to the defs.
+
+        They only depend on the diagram class, the element class and the
+        overridden style attributes, so each combination of these is
+        only resolved once per drawing.
+        """
+        overrides = sorted(
+            (k, v) for k, v in vars(styling).items() if not k.startswith("_")
+        )
+        key = (
+            styling._diagram_class,
+            styling._class,
+            styling._prefix,
+            repr(overrides),
+        )
+        if key in self.__deployed_styles:
+            return
+        self.__deployed_styles.add(key)
+
+        defs_ids = self.__defs_ids
         for attr in styling:
             val = getattr(styling, attr)
             if isinstance(val, cabc.Iterable) and not isinstance(
@@ -500,10 +562,9 @@ class Drawing:
                     gradient = symbols._make_lgradient(
                         id_=grad_id, stop_colors=val
                     )
-                    self.__drawing.defs.add(gradient)
-                    defs_ids.add(grad_id)
+                    self.__add_def(gradient)
 
-        defaultstyles = diagram.get_style(self.diagram_class, styling._class)
+        defaultstyles = styling._defaultstyles
 
         def getstyleattr(sobj: object, attr: str) -> t.Any:
             return getattr(sobj, attr, None) or defaultstyles.get(
@@ -522,7 +583,7 @@ class Drawing:
             stroke_width = str(getstyleattr(styling, "stroke-width"))
             marker_id = styling._generate_id(marker, [stroke])
             if marker_id not in defs_ids:
-                self.__drawing.defs.add(
+                self.__add_def(
                     decorations.deco_factories[marker](
                         marker_id,
                         style=style.Styling(
@@ -534,7 +595,6 @@ class Drawing:
                         ),
                     )
                 )
-                defs_ids.add(marker_id)
 
     def _draw_symbol(
         self,
@@ -953,3 +1013,61 @@ def get_label_icon_position(
     ):
         icon_x = builder.label["x"] - decorations.icon_padding
     return icon_x, icon_y
+
+
+def get_defs_template(class_: str) -> DefsTemplate:
+    """Return the static definitions for the given diagram class.
+
+    The stylesheet, the static decorations and the gradients only depend
+    on the diagram class and the default styles in
+    :data:`capellambse.diagram.STYLES`. They are built and serialized
+    once per process, and reused by every subsequent drawing of the same
+    class.
+
+    The cache entry of a class is rebuilt automatically if its styles
+    or its :data:`~capellambse.svg.style.STATIC_DECORATIONS` were
+    customized in the meantime. Use :func:`clear_defs_cache` after
+    changing anything else that influences the definitions, like the
+    decoration factories.
+
+    Parameters
+    ----------
+    class_
+        The diagram class, or an empty string for unclassified diagrams.
+    """
+    fingerprint = _styles_fingerprint(class_)
+    try:
+        cached_fingerprint, template = _DEFS_CACHE[class_]
+    except KeyError:
+        pass
+    else:
+        if cached_fingerprint == fingerprint:
+            return template
+
+    stylesheet = style.SVGStylesheet(class_=class_)
+    defs: list[t.Any] = [stylesheet.sheet]
+    for name in stylesheet.static_deco:
+        defs.append(decorations.deco_factories[name]())
+    defs.extend(stylesheet.yield_gradients())
+
+    template = DefsTemplate(
+        stylesheet, tuple(stream.Prerendered(i) for i in defs)
+    )
+    _DEFS_CACHE[class_] = (fingerprint, template)
+    return template
+
+
+def clear_defs_cache() -> None:
+    """Discard the definitions cached by :func:`get_defs_template`."""
+    _DEFS_CACHE.clear()
+
+
+def _styles_fingerprint(class_: str) -> str:
+    return repr(
+        (
+            diagram.STYLES["__GLOBAL__"],
+            diagram.STYLES.get(class_),
+            style.STATIC_DECORATIONS["__GLOBAL__"],
+            style.STATIC_DECORATIONS.get(class_),
+        )
+    )
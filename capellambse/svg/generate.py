@@ -59,25 +59,36 @@ class SVGDiagram:
                 }
             ]
         }
+
+    The ``objects`` can also be given as an iterator, e.g. one that
+    encodes the elements of a :class:`capellambse.diagram.Diagram` on
+    the fly. Each object is drawn as soon as the iterator yields it.
     """
 
     def __init__(
         self,
         metadata: DiagramMetadata,
-        objects: cabc.Sequence[ContentsDict],
+        objects: cabc.Iterable[ContentsDict],
+        *,
+        backend: str = "svgwrite",
     ) -> None:
-        self.drawing = Drawing(metadata)
+        self.drawing = Drawing(metadata, backend=backend)
         for obj in objects:
             self.draw_object(obj)
 
     @classmethod
-    def from_json(cls, jsonstring: str) -> SVGDiagram:
+    def from_json(
+        cls, jsonstring: str, *, backend: str = "svgwrite"
+    ) -> SVGDiagram:
         """Create an SVGDiagram from the given JSON string.
 
         Parameters
         ----------
         jsonstring
             Json/dictionary in ``str`` format
+        backend
+            The backend to draw with, see
+            :data:`~capellambse.svg.drawing.BACKENDS`.
 
         Returns
         -------
@@ -86,16 +97,21 @@ class SVGDiagram:
         """
         jsondict = json.loads(jsonstring)
         metadata = DiagramMetadata.from_dict(jsondict)
-        return cls(metadata, jsondict["contents"])
+        return cls(metadata, jsondict["contents"], backend=backend)
 
     @classmethod
-    def from_json_path(cls, path: str | os.PathLike) -> SVGDiagram:
+    def from_json_path(
+        cls, path: str | os.PathLike, *, backend: str = "svgwrite"
+    ) -> SVGDiagram:
         """Create an SVGDiagram from the given JSON file.
 
         Parameters
         ----------
         path
             path to .json file
+        backend
+            The backend to draw with, see
+            :data:`~capellambse.svg.drawing.BACKENDS`.
 
         Returns
         -------
@@ -103,7 +119,7 @@ class SVGDiagram:
             SVG diagram object
         """
         conf = pathlib.Path(path).read_text(encoding="utf-8")
-        return cls.from_json(conf)
+        return cls.from_json(conf, backend=backend)
 
     def draw_object(self, obj: ContentsDict) -> None:
         """Draw the given ``obj`` on the underlaying ``Drawing``."""
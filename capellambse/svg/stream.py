@@ -0,0 +1,342 @@
+# SPDX-FileCopyrightText: Copyright DB Netz AG and the capellambse contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""A streaming SVG backend for :class:`~capellambse.svg.drawing.Drawing`.
+
+The :class:`StreamDrawing` implements the subset of the
+:class:`svgwrite.drawing.Drawing` API that is used to draw diagram
+objects. Instead of building a tree of validated svgwrite objects and
+converting it to an ElementTree for serialization, it creates plain
+:class:`Element` records. A top-level element is written into a text
+buffer as soon as the next one is added, and is then discarded.
+
+The output is identical to that of svgwrite, i.e. attributes are sorted
+and escaped the same way, and empty attributes are omitted.
+
+Definitions (the stylesheet, symbols, markers and gradients) are still
+added as svgwrite objects, or as :class:`Prerendered` definitions that
+are shared between drawings. They are serialized once when the drawing
+is finished.
+"""
+from __future__ import annotations
+
+__all__ = ["Element", "Prerendered", "StreamDrawing"]
+
+import collections.abc as cabc
+import io
+import typing as t
+from xml.etree import ElementTree as etree
+
+from svgwrite import base, container
+from svgwrite import utils as svgutils
+
+SVG_ATTRIBUTES = {
+    "baseProfile": "full",
+    "version": "1.1",
+    "xmlns": "http://www.w3.org/2000/svg",
+    "xmlns:ev": "http://www.w3.org/2001/xml-events",
+    "xmlns:xlink": "http://www.w3.org/1999/xlink",
+}
+"""Attributes that svgwrite adds to the root ``svg`` element."""
+
+_E = t.TypeVar("_E", bound="Element | Prerendered | base.BaseElement")
+
+
+class Element:
+    """A light-weight SVG element without attribute validation."""
+
+    def __init__(
+        self,
+        elementname: str,
+        attribs: dict[str, t.Any],
+        text: str | None = None,
+    ) -> None:
+        self.elementname = elementname
+        self.attribs = attribs
+        self.elements: list[Element | Prerendered | base.BaseElement] = []
+        self.text = text
+
+    def add(self, element: _E) -> _E:
+        """Add an SVG element as subelement."""
+        self.elements.append(element)
+        return element
+
+    def write(self, write: cabc.Callable[[str], t.Any]) -> None:
+        """Serialize this element and all its subelements."""
+        write("<" + self.elementname)
+        _write_attributes(write, self.attribs)
+        if not self.text and not self.elements:
+            write(" />")
+            return
+
+        write(">")
+        if self.text:
+            write(_escape_cdata(self.text))
+        for element in self.elements:
+            _write_element(write, element)
+        write(f"</{self.elementname}>")
+
+    def tostring(self) -> str:
+        """Get the XML representation as string."""
+        buffer = io.StringIO()
+        self.write(buffer.write)
+        return buffer.getvalue()
+
+
+class Prerendered:
+    """A definition that was serialized ahead of time.
+
+    It can be added to the ``defs`` of both svgwrite and stream drawings
+    in place of the svgwrite element it was created from. The XML tree
+    is shared between all drawings that use it, and must therefore not
+    be modified.
+
+    Parameters
+    ----------
+    element
+        The svgwrite element to serialize.
+    """
+
+    def __init__(self, element: base.BaseElement) -> None:
+        self.elementname: str = element.elementname
+        self.attribs: dict[str, t.Any] = dict(element.attribs)
+        self.xml = element.get_xml()
+        self.text = etree.tostring(self.xml, encoding="unicode")
+
+    def get_xml(self) -> etree.Element:
+        """Return the shared XML tree of this definition."""
+        return self.xml
+
+    def tostring(self) -> str:
+        """Get the XML representation as string."""
+        return self.text
+
+
+class StreamDrawing:
+    """An SVG drawing that is serialized while it is being drawn."""
+
+    def __init__(
+        self,
+        filename: str = "noname.svg",
+        size: tuple[t.Any, t.Any] = ("100%", "100%"),
+        **extra: t.Any,
+    ) -> None:
+        self.filename = filename
+        self.attribs = _attributes(extra)
+        self.attribs["width"], self.attribs["height"] = size
+        self.attribs.update(SVG_ATTRIBUTES)
+        self.defs = container.Defs(debug=False)
+        self.elements: list[Element | Prerendered | base.BaseElement] = []
+        self.__body = io.StringIO()
+
+    def add(self, element: _E) -> _E:
+        """Add a top-level element.
+
+        All previously added top-level elements are considered complete
+        and are written to the buffer.
+        """
+        self.__flush()
+        self.elements.append(element)
+        return element
+
+    def __flush(self) -> None:
+        for element in self.elements:
+            _write_element(self.__body.write, element)
+        self.elements.clear()
+
+    def __write_defs(self, write: cabc.Callable[[str], t.Any]) -> None:
+        write("<defs")
+        _write_attributes(write, self.defs.attribs)
+        if not self.defs.elements:
+            write(" />")
+            return
+
+        write(">")
+        for element in self.defs.elements:
+            _write_element(write, element)
+        write("</defs>")
+
+    def tostring(self) -> str:
+        """Get the XML representation of the drawing as string."""
+        self.__flush()
+        buffer = io.StringIO()
+        buffer.write("<svg")
+        _write_attributes(buffer.write, self.attribs)
+        buffer.write(">")
+        self.__write_defs(buffer.write)
+        buffer.write(self.__body.getvalue())
+        buffer.write("</svg>")
+        return buffer.getvalue()
+
+    def _repr_svg_(self) -> str:
+        return self.tostring()
+
+    def write(
+        self, fileobj: t.IO[str], pretty: bool = False, indent: int = 2
+    ) -> None:
+        """Write the drawing, including the XML declaration, to a file."""
+        fileobj.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        xml_string = self.tostring()
+        if pretty:
+            xml_string = svgutils.pretty_xml(xml_string, indent=indent)
+        fileobj.write(xml_string)
+
+    def save(self, pretty: bool = False, indent: int = 2) -> None:
+        """Write the drawing to :attr:`filename`."""
+        with open(self.filename, "w", encoding="utf-8") as fileobj:
+            self.write(fileobj, pretty=pretty, indent=indent)
+
+    def saveas(
+        self, filename: str, pretty: bool = False, indent: int = 2
+    ) -> None:
+        """Write the drawing to a new filename."""
+        self.filename = filename
+        self.save(pretty=pretty, indent=indent)
+
+    def g(self, **extra: t.Any) -> Element:
+        return Element("g", _attributes(extra))
+
+    def rect(
+        self,
+        insert: tuple[t.Any, t.Any] = (0, 0),
+        size: tuple[t.Any, t.Any] = (1, 1),
+        rx: t.Any = None,
+        ry: t.Any = None,
+        **extra: t.Any,
+    ) -> Element:
+        attribs = _attributes(extra)
+        attribs["x"], attribs["y"] = insert
+        attribs["width"], attribs["height"] = size
+        if rx is not None:
+            attribs["rx"] = rx
+        if ry is not None:
+            attribs["ry"] = ry
+        return Element("rect", attribs)
+
+    def line(
+        self,
+        start: tuple[t.Any, t.Any] = (0, 0),
+        end: tuple[t.Any, t.Any] = (0, 0),
+        **extra: t.Any,
+    ) -> Element:
+        attribs = _attributes(extra)
+        attribs["x1"], attribs["y1"] = start
+        attribs["x2"], attribs["y2"] = end
+        return Element("line", attribs)
+
+    def circle(
+        self,
+        center: tuple[t.Any, t.Any] = (0, 0),
+        r: t.Any = 1,
+        **extra: t.Any,
+    ) -> Element:
+        attribs = _attributes(extra)
+        attribs["cx"], attribs["cy"] = center
+        attribs["r"] = r
+        return Element("circle", attribs)
+
+    def path(self, d: t.Any = None, **extra: t.Any) -> Element:
+        attribs = _attributes(extra)
+        attribs["d"] = svgutils.strlist([d], " ")
+        return Element("path", attribs)
+
+    def use(
+        self,
+        href: str | base.BaseElement,
+        insert: tuple[t.Any, t.Any] | None = None,
+        size: tuple[t.Any, t.Any] | None = None,
+        **extra: t.Any,
+    ) -> Element:
+        attribs = _attributes(extra)
+        if not isinstance(href, str):
+            href = href.get_iri()
+        attribs["xlink:href"] = href
+        if insert is not None:
+            attribs["x"], attribs["y"] = insert
+        if size is not None:
+            attribs["width"], attribs["height"] = size
+        return Element("use", attribs)
+
+    def text(
+        self,
+        text: str,
+        insert: tuple[t.Any, t.Any] | None = None,
+        **extra: t.Any,
+    ) -> Element:
+        return _text_element("text", text, insert, extra)
+
+    def tspan(
+        self,
+        text: str,
+        insert: tuple[t.Any, t.Any] | None = None,
+        **extra: t.Any,
+    ) -> Element:
+        return _text_element("tspan", text, insert, extra)
+
+
+def _attributes(extra: dict[str, t.Any]) -> dict[str, t.Any]:
+    """Convert keyword arguments to attribute names like svgwrite."""
+    return {k.rstrip("_").replace("_", "-"): v for k, v in extra.items()}
+
+
+def _text_element(
+    elementname: str,
+    text: str,
+    insert: tuple[t.Any, t.Any] | None,
+    extra: dict[str, t.Any],
+) -> Element:
+    attribs = _attributes(extra)
+    if insert is not None:
+        attribs["x"] = str(insert[0])
+        attribs["y"] = str(insert[1])
+    return Element(elementname, attribs, str(text))
+
+
+def _write_attributes(
+    write: cabc.Callable[[str], t.Any], attribs: dict[str, t.Any]
+) -> None:
+    for key, value in sorted(attribs.items()):
+        if value is None:
+            continue
+        value = str(value)
+        if value:
+            write(f' {key}="{_escape_attrib(value)}"')
+
+
+def _write_element(
+    write: cabc.Callable[[str], t.Any],
+    element: Element | Prerendered | base.BaseElement,
+) -> None:
+    if isinstance(element, Element):
+        element.write(write)
+    elif isinstance(element, Prerendered):
+        write(element.text)
+    else:
+        write(_tostring(element))
+
+
+def _tostring(element: base.BaseElement) -> str:
+    return etree.tostring(element.get_xml(), encoding="unicode")
+
+
+def _escape_cdata(text: str) -> str:
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _escape_attrib(text: str) -> str:
+    text = _escape_cdata(text)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
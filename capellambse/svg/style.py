@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 import collections.abc as cabc
+import functools
 import io
 import itertools
 import logging
@@ -180,7 +181,7 @@ class Styling:
 
     def __getattribute__(self, attr: str) -> str:
         if attr in {"marker-start", "marker-end"}:
-            defaultstyles = diagram.get_style(self._diagram_class, self._class)
+            defaultstyles = self._defaultstyles
             try:
                 value = super().__getattribute__(attr)
             except AttributeError as err:
@@ -206,7 +207,7 @@ class Styling:
         return True
 
     def __iter__(self) -> cabc.Iterator[str]:
-        defaultstyles = diagram.get_style(self._diagram_class, self._class)
+        defaultstyles = self._defaultstyles
         for attr in ("marker-start", "marker-end"):
             if (
                 not self._marker
@@ -216,9 +217,14 @@ class Styling:
                 yield attr
 
         yield from itertools.filterfalse(
-            operator.methodcaller("startswith", "_"), dir(self)
+            operator.methodcaller("startswith", "_"), sorted(vars(self))
         )
 
+    @functools.cached_property
+    def _defaultstyles(self) -> dict[str, t.Any]:
+        """Return the default styles of the element class."""
+        return diagram.get_style(self._diagram_class, self._class)
+
     def __getitem__(self, attrs: str | cabc.Iterable[str]) -> str | None:
         if isinstance(attrs, str):
             attrs = (attrs,) if attrs else self
@@ -393,7 +399,7 @@ class StyleBuilder:
         self.styles = self._make_styles()
 
     def _make_styles(self) -> dict[str, dict[str, diagram.CSSdef]]:
-        styles = diagram.STYLES["__GLOBAL__"].copy()
+        styles = {k: v.copy() for k, v in diagram.STYLES["__GLOBAL__"].items()}
         try:
             deep_update_dict(
                 styles, diagram.STYLES[self.class_]  # type: ignore[index]
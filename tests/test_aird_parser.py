@@ -92,3 +92,24 @@ def test_airdparser_msm_produces_valid_json_without_error(
 
     generated_json = diagram.DiagramJSONEncoder(indent=4).encode(parsed)
     json.loads(generated_json)
+
+
+@pytest.mark.parametrize(
+    "diag_name",
+    [
+        "[LAB] Wizzard Education",
+        "[MSM] States of Functional Human Being",
+        "[OPD] Obtain food via hunting",
+        "[PAB] Physical System",
+    ],
+)
+def test_encoded_elements_match_the_decoded_json(
+    model: capellambse.MelodyModel, diag_name: str
+):
+    parsed = model.diagrams.by_name(diag_name).render(None)
+    expected = json.loads(diagram.DiagramJSONEncoder().encode(parsed))
+
+    metadata = diagram.encode_metadata(parsed)
+    contents = list(diagram.iter_encoded_elements(parsed))
+
+    assert {**metadata, "contents": contents} == expected
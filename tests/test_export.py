@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: Copyright DB Netz AG and the capellambse contributors
+# SPDX-License-Identifier: Apache-2.0
+
+import pathlib
+
+import pytest
+
+import capellambse
+from capellambse import export, filehandler
+from capellambse.model import diagram
+
+from .conftest import TEST_MODEL, TEST_ROOT
+
+MODEL_ARGS = {"path": str(TEST_ROOT / "5_0" / TEST_MODEL)}
+DIAGRAMS = [
+    "_7FWu4KrxEeqOgqWuHJrXFA",
+    "_APMboAPhEeynfbzU12yy7w",
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_diagrams_writes_all_formats_to_the_file_handler(
+    model: capellambse.MelodyModel, tmp_path: pathlib.Path, workers: int
+) -> None:
+    target = filehandler.get_filehandler(tmp_path)
+    seen: list[export.ExportResult] = []
+
+    results = export.export_diagrams(
+        MODEL_ARGS,
+        target,
+        ["svg", "json"],
+        uuids=DIAGRAMS,
+        workers=workers,
+        progress=seen.append,
+    )
+
+    assert seen == results
+    assert len(results) == len(DIAGRAMS) * 2
+    assert all(i.error is None and i.duration > 0 for i in results)
+    assert sorted(i.name for i in tmp_path.iterdir()) == sorted(
+        f"{u}{e}" for u in DIAGRAMS for e in (".svg", ".json")
+    )
+    for uuid in DIAGRAMS:
+        expected = model.diagrams.by_uuid(uuid).render("svg")
+        assert (tmp_path / f"{uuid}.svg").read_text() == expected
+        expected = model.diagrams.by_uuid(uuid).render("json")
+        assert (tmp_path / f"{uuid}.json").read_text() == expected
+
+
+def test_export_diagrams_reports_failures_per_diagram(
+    tmp_path: pathlib.Path,
+) -> None:
+    target = filehandler.get_filehandler(tmp_path)
+
+    results = export.export_diagrams(
+        MODEL_ARGS, target, ["svg"], uuids=["not-a-diagram"], workers=1
+    )
+
+    assert len(results) == 1
+    assert results[0].filename is None
+    assert results[0].error
+    assert not list(tmp_path.iterdir())
+
+
+def test_export_diagrams_rejects_unknown_formats(
+    tmp_path: pathlib.Path,
+) -> None:
+    target = filehandler.get_filehandler(tmp_path)
+
+    with pytest.raises(diagram.UnknownOutputFormat):
+        export.export_diagrams(MODEL_ARGS, target, ["no-such-format"])
+
+
+def test_export_diagrams_writes_cacheable_svg_for_wrapping_formats(
+    model: capellambse.MelodyModel, tmp_path: pathlib.Path
+) -> None:
+    target = filehandler.get_filehandler(tmp_path)
+
+    results = export.export_diagrams(
+        MODEL_ARGS, target, ["datauri_svg"], uuids=DIAGRAMS[:1], workers=1
+    )
+
+    assert [i.filename for i in results] == [f"{DIAGRAMS[0]}.svg"]
+    expected = model.diagrams.by_uuid(DIAGRAMS[0]).render("svg")
+    assert (tmp_path / f"{DIAGRAMS[0]}.svg").read_text() == expected
+
+
+@pytest.mark.parametrize(
+    "formats",
+    [
+        pytest.param(["svg", "datauri_svg"], id="svg"),
+        pytest.param(["json", "json_pretty"], id="json"),
+        pytest.param(["svgdiagram"], id="not-writable"),
+    ],
+)
+def test_export_diagrams_rejects_formats_that_cannot_be_written(
+    tmp_path: pathlib.Path, formats: list[str]
+) -> None:
+    target = filehandler.get_filehandler(tmp_path)
+
+    with pytest.raises(ValueError):
+        export.export_diagrams(MODEL_ARGS, target, formats, workers=1)
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_export_cli_writes_diagrams_and_timings(
+    tmp_path: pathlib.Path,
+) -> None:
+    testing = pytest.importorskip("click.testing")
+    runner = testing.CliRunner()
+    args = ["-m", MODEL_ARGS["path"], "-o", str(tmp_path / "out"), "-j", "1"]
+    args += ["-f", "json", "-u", DIAGRAMS[0]]
+
+    result = runner.invoke(export._main, args)
+
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "out" / f"{DIAGRAMS[0]}.json").is_file()
+    assert "Exported 1 of 1 files" in result.output
@@ -0,0 +1,200 @@
+# SPDX-FileCopyrightText: Copyright DB Netz AG and the capellambse contributors
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import os
+import pathlib
+import stat
+import sys
+
+import pytest
+from lxml import etree
+
+from capellambse.loader import exs
+
+from .conftest import TEST_MODEL, TEST_ROOT
+
+TEST_FILE = (TEST_ROOT / "5_0" / TEST_MODEL).with_suffix(".capella")
+
+
+@pytest.fixture
+def tree() -> etree._ElementTree:
+    parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+    return etree.parse(TEST_FILE, parser)
+
+
+class _RecordingFile(io.BytesIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: list[int] = []
+
+    def write(self, chunk) -> int:
+        self.chunks.append(len(chunk))
+        return super().write(chunk)
+
+
+def test_writing_to_a_path_leaves_no_temporary_files(
+    tree: etree._ElementTree, tmp_path: pathlib.Path
+):
+    outfile = tmp_path / "out.capella"
+
+    exs.write(tree, outfile)
+
+    assert outfile.read_bytes() == exs.to_bytes(tree)
+    assert list(tmp_path.iterdir()) == [outfile]
+
+
+def test_writing_to_a_path_keeps_the_file_mode(
+    tree: etree._ElementTree, tmp_path: pathlib.Path
+):
+    outfile = tmp_path / "out.capella"
+    outfile.write_bytes(b"")
+    outfile.chmod(0o640)
+
+    exs.write(tree, outfile)
+
+    assert outfile.read_bytes() == exs.to_bytes(tree)
+    assert stat.S_IMODE(outfile.stat().st_mode) == 0o640
+
+
+def test_writing_to_a_symlink_replaces_its_target(
+    tree: etree._ElementTree, tmp_path: pathlib.Path
+):
+    target = tmp_path / "target.capella"
+    target.write_bytes(b"")
+    link = tmp_path / "link.capella"
+    link.symlink_to(target.name)
+
+    exs.write(tree, link)
+
+    assert link.is_symlink()
+    assert target.read_bytes() == exs.to_bytes(tree)
+    assert sorted(tmp_path.iterdir()) == [link, target]
+
+
+def test_writing_to_a_hard_linked_path_updates_all_links(
+    tree: etree._ElementTree, tmp_path: pathlib.Path
+):
+    outfile = tmp_path / "out.capella"
+    outfile.write_bytes(b"")
+    other = tmp_path / "other.capella"
+    os.link(outfile, other)
+
+    exs.write(tree, outfile)
+
+    assert other.read_bytes() == exs.to_bytes(tree)
+    assert outfile.stat().st_ino == other.stat().st_ino
+
+
+def test_write_streams_the_xml_in_chunks(tree: etree._ElementTree):
+    file = _RecordingFile()
+
+    exs.write(tree, file, chunk_size=4096)
+
+    assert file.getvalue() == exs.to_bytes(tree)
+    assert len(file.chunks) > 1
+    assert all(i >= 4096 for i in file.chunks[:-1])
+
+
+MODEL_FILES = sorted(
+    i
+    for i in TEST_ROOT.parent.rglob("*")
+    if i.suffix in {".afm", ".aird", ".capella"}
+)
+
+
+@pytest.mark.parametrize("line_length", [exs.LINE_LENGTH, sys.maxsize])
+@pytest.mark.parametrize(
+    "path",
+    [
+        pytest.param(i, id=i.relative_to(TEST_ROOT.parent).as_posix())
+        for i in MODEL_FILES
+    ],
+)
+def test_engines_produce_identical_output_for_test_models(
+    path: pathlib.Path, line_length: int
+):
+    parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+    tree = etree.parse(path, parser)
+
+    expected = exs.serialize(tree, line_length=line_length, engine="python")
+    actual = exs.serialize(tree, line_length=line_length, engine="lxml")
+
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "xml",
+    [
+        pytest.param(
+            '<a:root xmlns:a="urn:a" xmlns:xmi="http://www.omg.org/XMI"'
+            ' xmi:version="2.0" id="root" name="x"><child/></a:root>',
+            id="root-attributes",
+        ),
+        pytest.param(
+            '<root><child name="&lt;&amp;&gt;&quot;&#9;&#10;&#13;&#127;"/>'
+            "</root>",
+            id="escaped-attributes",
+        ),
+        pytest.param(
+            '<root><bodies>&lt;p&gt;"quoted"&#13;\n\tline&#127;</bodies>'
+            "<bodies/><languages>en</languages></root>",
+            id="escaped-text",
+        ),
+        pytest.param(
+            '<root><bodies a="x&gt;y"/><bodies b="&gt;"></bodies></root>',
+            id="expanded-with-escaped-attributes",
+        ),
+        pytest.param(
+            "<root><child><sub a='{0}' b='{0}' c='{0}'/></child></root>".format(
+                "x" * 30
+            ),
+            id="line-wrapping",
+        ),
+        pytest.param(
+            '<root xmlns:a="urn:a"><a:child xmlns:b="urn:b" b:x="1"/></root>',
+            id="nested-namespace",
+        ),
+        pytest.param(
+            "<root><child>text<sub/></child></root>",
+            id="mixed-content",
+        ),
+        pytest.param("<root><child> </child></root>", id="blank-text"),
+    ],
+)
+def test_engines_produce_identical_output_for_special_cases(xml: str):
+    tree = etree.ElementTree(etree.fromstring(xml))
+
+    expected = exs.to_bytes(tree, engine="python")
+    actual = exs.to_bytes(tree, engine="lxml")
+
+    assert actual == expected
+
+
+def test_engines_produce_identical_output_for_subtrees(
+    tree: etree._ElementTree,
+):
+    element = tree.getroot()[0]
+
+    expected = exs.serialize(element, engine="python")
+    actual = exs.serialize(element, engine="lxml")
+
+    assert actual == expected
+
+
+def test_engines_produce_identical_output_with_windows_line_endings(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(exs, "LINESEP", b"\r\n")
+    xml = (
+        '<a:root xmlns:a="urn:a" xmlns:xmi="http://www.omg.org/XMI"'
+        ' xmi:version="2.0" id="root" name="x"><child><sub a="{0}" b="{0}"'
+        ' c="{0}"/></child></a:root>'
+    ).format("x" * 30)
+    tree = etree.ElementTree(etree.fromstring(xml))
+
+    expected = exs.to_bytes(tree, engine="python")
+    actual = exs.to_bytes(tree, engine="lxml")
+
+    assert b"\r\n" in expected
+    assert actual == expected
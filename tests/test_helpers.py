@@ -4,6 +4,7 @@
 import pathlib
 
 import pytest
+from lxml import etree
 
 from capellambse import helpers
 
@@ -93,3 +94,60 @@ def test_flatten_html_formats_unordered_lists(
     input: str, expected: str
 ) -> None:
     assert helpers.flatten_html_string(input) == expected
+
+
+def test_xtype_of_caches_types_derived_from_the_tag() -> None:
+    tag = helpers.resolve_namespace("org.polarsys.capella.core.data.la:Foo")
+    before = helpers.xtype_cache_info()
+
+    for _ in range(3):
+        xtype = helpers.xtype_of(etree.Element(tag))
+
+    after = helpers.xtype_cache_info()
+    assert xtype == "org.polarsys.capella.core.data.la:Foo"
+    assert after.hits - before.hits >= 2
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        " ",
+        "Hello World",
+        "  indented",
+        "AVA To. jump",
+        "tab\tstop",
+        "Umlaute äöü and € — 中文",
+    ],
+)
+def test_TextMetrics_measures_text_like_PIL(text: str) -> None:
+    metrics = helpers.get_text_metrics()
+
+    (expected_width, expected_height), _ = metrics.font.font.getsize(text)
+
+    assert metrics.extent(text) == (expected_width, expected_height)
+
+
+def test_TextMetrics_iter_extents_measures_growing_prefixes() -> None:
+    metrics = helpers.get_text_metrics()
+    chunks = ["Lorem", " ipsum", " dolor", " sit"]
+
+    actual = list(metrics.iter_extents(chunks))
+
+    expected = [
+        metrics.extent("".join(chunks[: i + 1])) for i in range(len(chunks))
+    ]
+    assert actual == expected
+
+
+@pytest.mark.parametrize("width", [60, 100, 250])
+def test_word_wrap_fills_lines_as_far_as_possible(width: int) -> None:
+    text = " ".join(["lorem", "ipsum", "dolor", "sit", "amet"] * 40)
+
+    lines = helpers.word_wrap(text, width)
+
+    assert " ".join(lines) == text
+    for line, next_line in zip(lines, lines[1:]):
+        assert helpers.extent_func(line)[0] <= width
+        next_word = next_line.split()[0]
+        assert helpers.extent_func(f"{line} {next_word}")[0] > width
@@ -8,6 +8,7 @@ import pathlib
 import pytest
 
 import capellambse
+import capellambse.model.common as common
 
 TEST_ROOT = pathlib.Path(__file__).parent / "data" / "writemodel"
 TEST_MODEL = "WriteTestModel.aird"
@@ -77,3 +78,40 @@ def test_delete_all_deletes_matching_objects(model: capellambse.MelodyModel):
     comps.delete_all(name="Delete Me")
     assert len(comps) == 1
     assert comps[0].name == "Keep Me"
+
+
+def test_wrapper_class_is_resolved_again_after_moving_between_layers(
+    model: capellambse.MelodyModel,
+):
+    element = model.la.root_function.functions.create(name="Moving")._element
+    function = capellambse.model.GenericElement.from_model(model, element)
+    assert isinstance(function, capellambse.model.layers.la.LogicalFunction)
+
+    model._loader.idcache_remove(element)
+    element.getparent().remove(element)
+    model.sa.root_function._element.append(element)
+    model._loader.idcache_index(element)
+    moved = capellambse.model.GenericElement.from_model(model, element)
+
+    assert not isinstance(moved, capellambse.model.layers.la.LogicalFunction)
+
+
+def test_wrapper_class_is_resolved_again_after_registering_handlers(
+    model: capellambse.MelodyModel, monkeypatch: pytest.MonkeyPatch
+):
+    element = model.la.root_function.functions.create(name="Custom")._element
+    function = capellambse.model.GenericElement.from_model(model, element)
+    assert type(function) is capellambse.model.layers.la.LogicalFunction
+
+    class CustomFunction(capellambse.model.layers.la.LogicalFunction):
+        pass
+
+    layer = capellambse.helpers.xtype_of(model.la._element)
+    xtype = capellambse.helpers.xtype_of(element)
+    assert layer is not None and xtype is not None
+    monkeypatch.setattr(common, "_HANDLERS_BY_XTYPE", {})
+    monkeypatch.delitem(common.XTYPE_HANDLERS[layer], xtype)
+    common.xtype_handler(layer, xtype)(CustomFunction)
+    custom = capellambse.model.GenericElement.from_model(model, element)
+
+    assert type(custom) is CustomFunction
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import math
 import operator
+import pathlib
 import typing as t
 
 import markupsafe
@@ -65,6 +66,34 @@ def test_ElementList_filter_contains(model: MelodyModel):
     assert "LogicalComponent" not in involvements.by_type
 
 
+def test_indexed_ElementList_filters_like_an_unindexed_one(
+    model: MelodyModel,
+):
+    caps = model.oa.all_capabilities
+    indexed = model.oa.all_capabilities.indexed()
+
+    for name in caps.by_name:
+        assert indexed.by_name(name) == caps.by_name(name)
+        assert indexed.by_uuid(caps.by_name(name).uuid).name == name
+    assert indexed.by_name("Eat food", "Sleep", single=False) == (
+        caps.by_name("Eat food", "Sleep", single=False)
+    )
+    assert "This capability does not exist" not in indexed.by_name
+    with pytest.raises(KeyError):
+        indexed.by_name("This capability does not exist")
+
+
+def test_indexed_ElementList_is_updated_when_modified(model: MelodyModel):
+    components = model.la.root_component.components.indexed()
+    assert "New component" not in components.by_name
+
+    new = components.create(name="New component")
+
+    assert components.by_name("New component") == new
+    del components[components.index(new)]
+    assert "New component" not in components.by_name
+
+
 def test_ElementList_filter_iter(model: MelodyModel):
     caps = model.oa.all_capabilities
     assert sorted(i.name for i in caps) == sorted(caps.by_name)
@@ -1051,6 +1080,67 @@ def test_diagram_without_documentation_has_None_description(
     assert actual == expected
 
 
+def test_diagram_cache_write_through_stores_renders_and_skips_stale_ones(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def load() -> capellambse.MelodyModel:
+        return capellambse.MelodyModel(
+            TEST_ROOT / "5_0" / TEST_MODEL,
+            diagram_cache=tmp_path,
+            diagram_cache_write=True,
+        )
+
+    svg = load().diagrams.by_uuid("_7FWu4KrxEeqOgqWuHJrXFA").render("svg")
+    (cached,) = tmp_path.glob("_7FWu4KrxEeqOgqWuHJrXFA-*.svg")
+    assert cached.read_text(encoding="utf-8") == svg
+
+    model = load()
+    diagram = model.diagrams.by_uuid("_7FWu4KrxEeqOgqWuHJrXFA")
+    node = model.by_uuid(diagram.target.uuid).states[0]
+    real_create = type(diagram)._create_diagram
+    renders: list[str] = []
+
+    def create_diagram(self, params):
+        renders.append(self.uuid)
+        return real_create(self, params)
+
+    monkeypatch.setattr(type(diagram), "_create_diagram", create_diagram)
+    assert diagram.render("svg") == svg
+    assert renders == []
+
+    node.name = "Renamed state"
+    diagram.invalidate_cache()
+    new_svg = diagram.render("svg")
+
+    assert renders == [diagram.uuid]
+    assert "Renamed state" in new_svg
+    assert len(list(tmp_path.glob("_7FWu4KrxEeqOgqWuHJrXFA-*.svg"))) == 2
+
+
+@pytest.mark.parametrize(
+    "formats", [("json", "json_pretty"), ("json_pretty", "json")]
+)
+def test_diagram_cache_write_through_keeps_json_formats_apart(
+    tmp_path: pathlib.Path, formats: tuple[str, str]
+) -> None:
+    uncached = capellambse.MelodyModel(TEST_ROOT / "5_0" / TEST_MODEL)
+    expected = {
+        i: uncached.diagrams.by_uuid("_7FWu4KrxEeqOgqWuHJrXFA").render(i)
+        for i in formats
+    }
+
+    for fmt in formats:
+        model = capellambse.MelodyModel(
+            TEST_ROOT / "5_0" / TEST_MODEL,
+            diagram_cache=tmp_path,
+            diagram_cache_write=True,
+        )
+        diagram = model.diagrams.by_uuid("_7FWu4KrxEeqOgqWuHJrXFA")
+        assert diagram.render(fmt) == expected[fmt]
+    assert len(list(tmp_path.glob("_7FWu4KrxEeqOgqWuHJrXFA-*.json"))) == 1
+    assert expected["json"] != expected["json_pretty"]
+
+
 def test_lists_of_links_appear_to_contain_target_objects(
     model: capellambse.MelodyModel,
 ):
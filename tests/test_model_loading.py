@@ -5,16 +5,25 @@
 from __future__ import annotations
 
 import base64
+import collections.abc as cabc
+import concurrent.futures
+import hashlib
+import http.server
 import pathlib
 import re
 import shutil
+import subprocess
 import sys
+import threading
+import types
+import typing as t
 from importlib import metadata
 
 import pytest
 import requests_mock
 
 import capellambse
+import capellambse.filehandler.git
 
 # pylint: disable-next=relative-beyond-top-level
 from .conftest import TEST_MODEL, TEST_ROOT
@@ -46,6 +55,305 @@ def test_model_loading_via_GitFileHandler():
     )
 
 
+def test_GitFileHandler_reads_files_through_long_running_processes(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    path = "git+" + pathlib.Path.cwd().as_uri()
+    handler = capellambse.get_filehandler(path)
+    files = [
+        "tests/data/melodymodel/5_0/Melody Model Test.aird",
+        "tests/data/melodymodel/5_0/Melody Model Test.capella",
+        "tests/data/melodymodel/5_0/Melody Model Test.afm",
+    ]
+    runs: list[t.Any] = []
+
+    def read(file: str) -> bytes:
+        with handler.open(file) as f:
+            return f.read()
+
+    real_run = subprocess.run
+    monkeypatch.setattr(
+        subprocess,
+        "run",
+        lambda *args, **kw: runs.append(args) or real_run(*args, **kw),
+    )
+
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        contents = list(pool.map(read, files * 4))
+
+    assert runs == []
+    for file, content in zip(files * 4, contents):
+        assert content == pathlib.Path(file).read_bytes()
+    with pytest.raises(FileNotFoundError):
+        read("tests/data/melodymodel/5_0/Missing.aird")
+
+
+@pytest.mark.skipif(
+    shutil.which("git-lfs") is None, reason="git-lfs is not installed"
+)
+def test_GitFileHandler_serves_prefetched_LFS_files_from_object_store(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(
+        capellambse,
+        "dirs",
+        types.SimpleNamespace(user_cache_dir=str(tmp_path / "cache")),
+    )
+    source = tmp_path / "source"
+    shutil.copytree(TEST_ROOT / "5_0", source)
+    remote = tmp_path / "remote.git"
+    content = (source / TEST_MODEL).read_bytes()
+    oid = hashlib.sha256(content).hexdigest()
+
+    def git(*args: str, cwd: pathlib.Path = source) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            check=True,
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    git("init", "--bare", str(remote), cwd=tmp_path)
+    git("init", "-b", "master")
+    git("lfs", "install", "--local")
+    git("lfs", "track", "*.aird")
+    # Use the bare remote as file based LFS store for all clones
+    git("config", "-f", ".lfsconfig", "lfs.url", remote.as_uri())
+    git("add", ".")
+    git("commit", "-m", "Add model")
+    git("push", str(remote), "master")
+    assert list(remote.joinpath("lfs", "objects").rglob(oid))
+    handler = capellambse.filehandler.git.GitFileHandler(
+        str(remote), revision="master", prefetch_lfs=True, lfs_concurrency=2
+    )
+    (cache,) = (tmp_path / "cache" / "models").glob("*/*")
+    assert list(cache.rglob(f"lfs/objects/*/*/{oid}"))
+    runs: list[t.Any] = []
+    real_run = subprocess.run
+    monkeypatch.setattr(
+        subprocess,
+        "run",
+        lambda *args, **kw: runs.append(args) or real_run(*args, **kw),
+    )
+
+    with handler.open(TEST_MODEL) as f:
+        assert f.read() == content
+    assert runs == []
+
+    with handler.write_transaction(push=False):
+        with handler.open(TEST_MODEL, "wb") as f:
+            f.write(b"new content")
+    with handler.open(TEST_MODEL) as f:
+        assert f.read() == b"new content"
+
+
+@pytest.mark.parametrize("fast_import", [False, True])
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_GitFileHandler_commits_written_files(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fast_import: bool,
+    dry_run: bool,
+):
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Committer")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "committer@example.com")
+    repo = tmp_path / "repo"
+    (repo / "dir").mkdir(parents=True)
+    (repo / "a.txt").write_bytes(b"a")
+    (repo / "dir" / "b.txt").write_bytes(b"b")
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            check=True,
+            cwd=repo,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    git("init", "-b", "master")
+    git("add", ".")
+    git("commit", "-m", "Initial commit")
+    old_commit = git("rev-parse", "master")
+    handler = capellambse.filehandler.git.GitFileHandler(
+        repo.as_uri(), revision="master"
+    )
+
+    with handler.write_transaction(
+        dry_run=dry_run,
+        push=False,
+        fast_import=fast_import,
+        author_name="Author",
+        author_email="author@example.com",
+        commit_msg="Update files",
+    ):
+        with handler.open("dir/b.txt", "wb") as f:
+            f.write(b"new b")
+        with handler.open('dir/"new"/c.txt', "wb") as f:
+            f.write(b"c")
+
+    assert git("for-each-ref", "refs/capellambse") == ""
+    if dry_run:
+        assert git("rev-parse", "master") == old_commit
+        return
+    assert git("rev-parse", "master^") == old_commit
+    assert git("log", "-1", "--format=%an <%ae>%n%B", "master") == (
+        "Author <author@example.com>\nUpdate files"
+    )
+    files = git("ls-tree", "-r", "-z", "--name-only", "master")
+    assert files.split("\0")[:-1] == [
+        "a.txt",
+        'dir/"new"/c.txt',
+        "dir/b.txt",
+    ]
+    assert git("show", "master:dir/b.txt") == "new b"
+    assert git("show", 'master:dir/"new"/c.txt') == "c"
+
+
+def test_GitFileHandler_fast_import_streams_files_into_one_process(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.txt").write_bytes(b"a")
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            check=True,
+            cwd=repo,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    git("init", "-b", "master")
+    git("add", ".")
+    git("commit", "-m", "Initial commit")
+    handler = capellambse.filehandler.git.GitFileHandler(
+        repo.as_uri(), revision="master"
+    )
+    spawned: list[list[str]] = []
+    real_popen = subprocess.Popen
+
+    def popen(args, *posargs, **kw):
+        if {"fast-import", "hash-object"} & {str(i) for i in args}:
+            spawned.append([str(i) for i in args])
+        return real_popen(args, *posargs, **kw)
+
+    monkeypatch.setattr(subprocess, "Popen", popen)
+
+    with handler.write_transaction(push=False, fast_import=True):
+        with handler.open("a.txt", "wb") as f:
+            f.write(b"new a")
+        assert [i[:2] for i in spawned] == [["git", "fast-import"]]
+        with handler.open("b.txt", "wb") as f:
+            f.write(b"b")
+
+    assert [i[:2] for i in spawned] == [["git", "fast-import"]]
+    assert git("show", "master:a.txt") == "new a"
+    assert git("show", "master:b.txt") == "b"
+
+
+def test_GitFileHandler_fast_import_leaves_no_changes_on_errors(
+    tmp_path: pathlib.Path,
+):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.txt").write_bytes(b"a")
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            check=True,
+            cwd=repo,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    git("init", "-b", "master")
+    git("add", ".")
+    git("commit", "-m", "Initial commit")
+    old_commit = git("rev-parse", "master")
+    handler = capellambse.filehandler.git.GitFileHandler(
+        repo.as_uri(), revision="master"
+    )
+
+    with pytest.raises(RuntimeError, match="^Abort$"):
+        with handler.write_transaction(push=False, fast_import=True):
+            with handler.open("a.txt", "wb") as f:
+                f.write(b"new a")
+            raise RuntimeError("Abort")
+
+    assert git("rev-parse", "master") == old_commit
+    assert git("for-each-ref", "refs/capellambse") == ""
+    assert not list((repo / ".git").glob("fast_import_crash_*"))
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_GitFileHandler_partial_clone_fetches_blobs_on_demand(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, sparse: bool
+):
+    monkeypatch.setattr(
+        capellambse,
+        "dirs",
+        types.SimpleNamespace(user_cache_dir=str(tmp_path / "cache")),
+    )
+    source = tmp_path / "source"
+    shutil.copytree(TEST_ROOT / "5_0", source / "model")
+    (source / "assets").mkdir()
+    (source / "assets" / "large.bin").write_bytes(b"\0" * 1_000_000)
+
+    def git(*args: str, cwd: pathlib.Path = source) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test"]
+            + list(args),
+            check=True,
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    git("init", "-b", "master")
+    git("add", ".")
+    git("commit", "-m", "Add model")
+    remote = tmp_path / "remote.git"
+    git("clone", "--bare", str(source), str(remote))
+    git("config", "uploadpack.allowFilter", "true", cwd=remote)
+    handler = capellambse.filehandler.git.GitFileHandler(
+        str(remote),
+        revision="master",
+        subdir="model",
+        partial_clone=True,
+        sparse=sparse,
+    )
+
+    (cache,) = (tmp_path / "cache" / "models").glob("*/*")
+
+    def missing_files() -> set[str]:
+        listing = git(
+            "rev-list", "--objects", "--missing=print", "master", cwd=cache
+        )
+        blobs = git("ls-tree", "-r", "master")
+        names = {i.split()[2]: i.split("\t")[1] for i in blobs.splitlines()}
+        return {names[i[1:]] for i in listing.splitlines() if i[0] == "?"}
+
+    if sparse:
+        assert missing_files() == {"assets/large.bin"}
+    else:
+        assert "model/" + TEST_MODEL in missing_files()
+    with handler.open(TEST_MODEL) as f:
+        content = f.read()
+
+    assert content == (source / "model" / TEST_MODEL).read_bytes()
+    assert "model/" + TEST_MODEL not in missing_files()
+    assert "assets/large.bin" in missing_files()
+
+
 def test_model_loading_from_badpath_raises_FileNotFoundError():
     badpath = TEST_ROOT / "Missing.aird"
     with pytest.raises(FileNotFoundError):
@@ -150,6 +458,66 @@ def test_MelodyLoader_follow_link_finds_target(link: str):
         assert loader.follow_link(None, link) is not None
 
 
+def test_MelodyLoader_detects_ambiguous_ids_across_fragments():
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0)
+    elm_id = "0d2edb8f-fa34-4e73-89ec-fb9a63001440"
+    original = loader[elm_id]
+    other_tree = loader.trees[pathlib.PurePosixPath("\0", TEST_MODEL)]
+    duplicate = other_tree.root.makeelement("duplicate", {"uid": elm_id})
+    other_tree.root.append(duplicate)
+    other_tree.idcache_index(duplicate)
+
+    with pytest.raises(KeyError, match="Ambiguous"):
+        loader[elm_id]  # pylint: disable=pointless-statement
+
+    other_tree.idcache_remove(duplicate)
+    other_tree.root.remove(duplicate)
+
+    assert loader[elm_id] is original
+
+
+def test_MelodyLoader_find_fragment_finds_elements_with_and_without_id():
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0)
+    expected = pathlib.PurePosixPath("\0", TEST_MODEL).with_suffix(".capella")
+    component = loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+    child = component.makeelement("child")
+    grandchild = child.makeelement("grandchild")
+    child.append(grandchild)
+    component.append(child)
+
+    assert loader.find_fragment(component) == expected
+    assert loader.find_fragment(grandchild) == expected
+
+    component.remove(child)
+
+    with pytest.raises(ValueError):
+        loader.find_fragment(grandchild)
+
+
+def test_MelodyLoader_find_references_finds_link_sources():
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0)
+    component = loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+
+    part = loader["101ffa60-f8a2-4ea2-a0d8-d10910ceac06"]
+
+    refs = list(loader.find_references(component))
+
+    assert part in refs
+    assert part.get("abstractType") == f"#{component.get('id')}"
+
+
+def test_MelodyLoader_find_references_is_updated_on_link_changes():
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0)
+    part = loader["101ffa60-f8a2-4ea2-a0d8-d10910ceac06"]
+    old_target = "0d2edb8f-fa34-4e73-89ec-fb9a63001440"
+    new_target = "6583b560-6d2f-4190-baa2-94eef179c8ea"
+
+    loader.set_link_attribute(part, "abstractType", f"#{new_target}")
+
+    assert part not in list(loader.find_references(old_target))
+    assert part in list(loader.find_references(new_target))
+
+
 @pytest.mark.parametrize(
     ["path", "subdir", "req_url"],
     [
@@ -235,6 +603,73 @@ def test_http_file_handlers_passed_through_custom_headers(
     assert endpoint.called_once
 
 
+@pytest.fixture
+def http_server() -> cabc.Iterator[tuple[str, list[int]]]:
+    statuses: list[int] = []
+
+    class RequestHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args: t.Any, **kw: t.Any) -> None:
+            super().__init__(*args, directory=str(TEST_ROOT / "5_0"), **kw)
+
+        def log_request(self, code: t.Any = "-", size: t.Any = "-") -> None:
+            statuses.append(int(code))
+
+        def log_message(self, *args: t.Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}", statuses
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_http_file_handler_revalidates_cached_files(
+    http_server: tuple[str, list[int]], tmp_path: pathlib.Path
+) -> None:
+    url, statuses = http_server
+    files = [
+        TEST_MODEL,
+        TEST_MODEL.replace(".aird", ".capella"),
+        TEST_MODEL.replace(".aird", ".afm"),
+    ]
+    handler = capellambse.get_filehandler(url, cache_dir=tmp_path)
+    handler.prefetch(files)
+    assert statuses == [200, 200, 200]
+    statuses.clear()
+
+    capellambse.MelodyModel(url, entrypoint=TEST_MODEL, cache_dir=tmp_path)
+
+    assert statuses == [304, 304, 304]
+
+
+def test_http_file_handler_caches_files_by_etag(
+    requests_mock: requests_mock.Mocker, tmp_path: pathlib.Path
+) -> None:
+    requests_mock.get(
+        "https://example.com/test.svg",
+        [
+            {"content": b"<svg/>", "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    file_handler = capellambse.get_filehandler(
+        "https://example.com", cache_dir=tmp_path
+    )
+    with file_handler.open("test.svg") as f:
+        assert f.read() == b"<svg/>"
+
+    with file_handler.open("test.svg") as f:
+        assert f.read() == b"<svg/>"
+
+    assert requests_mock.call_count == 2
+    second = requests_mock.request_history[1]
+    assert second.headers["If-None-Match"] == '"v1"'
+
+
 @pytest.fixture
 def model_path_with_patched_version(
     request: pytest.FixtureRequest, tmp_path: pathlib.Path
@@ -292,3 +727,221 @@ def test_loading_model_with_unsupported_plugin_fails(
 ) -> None:
     with pytest.raises(capellambse.UnsupportedPluginError):
         capellambse.MelodyModel(model_path_with_patched_version)
+
+
+def test_MelodyLoader_restores_indexes_from_parse_cache(
+    tmp_path: pathlib.Path,
+):
+    reference = capellambse.loader.MelodyLoader(TEST_MODEL_5_0)
+    capellambse.loader.MelodyLoader(TEST_MODEL_5_0, parse_cache=tmp_path)
+    assert len(list(tmp_path.iterdir())) == len(reference.trees)
+
+    loader = capellambse.loader.MelodyLoader(
+        TEST_MODEL_5_0, parse_cache=tmp_path
+    )
+
+    for fragment, tree in reference.trees.items():
+        cached_tree = loader.trees[fragment]
+        assert cached_tree.enumerate_uuids() == tree.enumerate_uuids()
+    assert len(list(loader.iterall_xt())) == len(list(reference.iterall_xt()))
+    component = loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+    part = loader["101ffa60-f8a2-4ea2-a0d8-d10910ceac06"]
+    assert part in list(loader.find_references(component))
+    assert loader.find_fragment(part).suffix == ".capella"
+
+
+@pytest.mark.parametrize("parse_cache", [True, "path"])
+def test_MelodyLoader_does_not_use_the_parse_cache_when_ignoring_dups(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    parse_cache: bool | str,
+):
+    def fail(*_: t.Any) -> t.NoReturn:
+        raise AssertionError("ParseCache should not be used")
+
+    monkeypatch.setattr(capellambse.loader.core, "ParseCache", fail)
+
+    loader = capellambse.loader.MelodyLoader(
+        TEST_MODEL_5_0,
+        parse_cache=tmp_path if parse_cache == "path" else parse_cache,
+        ignore_duplicate_uuids_and_void_all_warranties=True,
+    )
+
+    assert loader.trees
+    assert not list(tmp_path.iterdir())
+
+
+def test_MelodyLoader_loads_fragments_in_parallel_in_a_stable_order():
+    reference = capellambse.loader.MelodyLoader(TEST_MODEL_5_0)
+
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0, load_workers=4)
+
+    assert list(loader.trees) == list(reference.trees)
+    for fragment, tree in reference.trees.items():
+        assert loader.trees[fragment].enumerate_uuids() == (
+            tree.enumerate_uuids()
+        )
+    component = loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+    part = loader["101ffa60-f8a2-4ea2-a0d8-d10910ceac06"]
+    assert part in list(loader.find_references(component))
+
+
+def test_MelodyLoader_defers_loading_visual_fragments_until_used():
+    aird = pathlib.PurePosixPath("\0", TEST_MODEL)
+    capella = aird.with_suffix(".capella")
+
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0, lazy_load=True)
+
+    assert capella in loader.trees and loader.trees[capella].loaded
+    assert not loader.trees[aird].loaded
+    project = loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+    assert loader.find_fragment(project) == capella
+    assert not loader.trees[aird].loaded
+
+    diagram = loader["_APMboAPhEeynfbzU12yy7w"]
+
+    assert loader.trees[aird].loaded
+    assert loader.find_fragment(diagram) == aird
+
+
+def test_lazily_loaded_model_only_parses_visual_fragments_for_diagrams():
+    model = capellambse.MelodyModel(TEST_MODEL_5_0, lazy_load=True)
+    aird = model._loader.trees[pathlib.PurePosixPath("\0", TEST_MODEL)]
+
+    assert model.search("LogicalComponent")
+    assert model.la.all_components.by_name("Hogwarts").parts
+    assert not aird.loaded
+
+    assert model.diagrams
+    assert aird.loaded
+
+
+def test_MelodyLoader_only_saves_modified_fragments(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    ignored = shutil.ignore_patterns("*.license")
+    shutil.copytree(
+        TEST_MODEL_5_0.parent, tmp_path, dirs_exist_ok=True, ignore=ignored
+    )
+    capella = pathlib.PurePosixPath(TEST_MODEL).with_suffix(".capella")
+    written: list[pathlib.PurePosixPath] = []
+    write_xml = capellambse.loader.core.ModelFile.write_xml
+
+    def spy_write_xml(self, filename, *args, **kwargs):
+        written.append(filename)
+        return write_xml(self, filename, *args, **kwargs)
+
+    monkeypatch.setattr(
+        capellambse.loader.core.ModelFile, "write_xml", spy_write_xml
+    )
+    model = capellambse.MelodyModel(tmp_path / TEST_MODEL)
+    assert not model._loader.dirty_fragments
+
+    model.by_uuid("0d2edb8f-fa34-4e73-89ec-fb9a63001440").name = "Hogwartz"
+
+    dirty = {pathlib.PurePosixPath("\0", capella)}
+    assert model._loader.dirty_fragments == dirty
+    model.save(modified_only=True)
+    assert written == [capella]
+    assert not model._loader.dirty_fragments
+    model.save(modified_only=True)
+    assert written == [capella]
+    reloaded = capellambse.MelodyModel(tmp_path / TEST_MODEL)
+    hogwarts = reloaded.by_uuid("0d2edb8f-fa34-4e73-89ec-fb9a63001440")
+    assert hogwarts.name == "Hogwartz"
+
+
+def test_MelodyLoader_saves_untracked_modifications_by_default(
+    tmp_path: pathlib.Path,
+):
+    ignored = shutil.ignore_patterns("*.license")
+    shutil.copytree(
+        TEST_MODEL_5_0.parent, tmp_path, dirs_exist_ok=True, ignore=ignored
+    )
+    loader = capellambse.loader.MelodyLoader(tmp_path / TEST_MODEL)
+    loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"].set("name", "Hogwartz")
+    assert not loader.dirty_fragments
+
+    loader.save()
+
+    reloaded = capellambse.loader.MelodyLoader(tmp_path / TEST_MODEL)
+    hogwarts = reloaded["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+    assert hogwarts.get("name") == "Hogwartz"
+
+
+def test_MelodyLoader_marks_both_fragments_dirty_when_moving_elements(
+    tmp_path: pathlib.Path,
+):
+    ignored = shutil.ignore_patterns("*.license")
+    shutil.copytree(
+        TEST_MODEL_5_0.parent, tmp_path, dirs_exist_ok=True, ignore=ignored
+    )
+    aird_path = tmp_path / TEST_MODEL
+    resource = "<semanticResources>{}</semanticResources>"
+    aird_path.write_text(
+        aird_path.read_text().replace(
+            resource.format("Melody%20Model%20Test.capella"),
+            resource.format("Melody%20Model%20Test.capella")
+            + resource.format("Fragment.capellafragment"),
+        )
+    )
+    (tmp_path / "Fragment.capellafragment").write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<ownedDataPkg id="b1c5ae1b-6a5a-4fb6-9d7e-cf3f9a7ebc3b"/>\n'
+    )
+    capella = pathlib.PurePosixPath("\0", TEST_MODEL).with_suffix(".capella")
+    fragment = pathlib.PurePosixPath("\0", "Fragment.capellafragment")
+    loader = capellambse.loader.MelodyLoader(aird_path)
+    part = loader["101ffa60-f8a2-4ea2-a0d8-d10910ceac06"]
+
+    loader.trees[fragment].root.append(part)
+    loader.idcache_index(part)
+
+    assert loader.dirty_fragments == {capella, fragment}
+    assert loader.find_fragment(part) == fragment
+    loader.save(modified_only=True)
+    reloaded = capellambse.loader.MelodyLoader(aird_path)
+    part = reloaded["101ffa60-f8a2-4ea2-a0d8-d10910ceac06"]
+    assert reloaded.find_fragment(part) == fragment
+
+
+@pytest.mark.parametrize("engine", ["python", "lxml"])
+def test_MelodyLoader_serializes_fragments_in_worker_processes(
+    tmp_path: pathlib.Path, engine: t.Literal["python", "lxml"]
+):
+    ignored = shutil.ignore_patterns("*.license")
+    for name in ("sequential", "parallel"):
+        shutil.copytree(TEST_MODEL_5_0.parent, tmp_path / name, ignore=ignored)
+    sequential = capellambse.loader.MelodyLoader(
+        tmp_path / "sequential" / TEST_MODEL
+    )
+    parallel = capellambse.loader.MelodyLoader(
+        tmp_path / "parallel" / TEST_MODEL
+    )
+    for loader in (sequential, parallel):
+        loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"].set("name", "Hög & Co")
+        loader.mark_dirty()
+
+    sequential.save()
+    parallel.save(serialize_workers=2, serialize_engine=engine)
+
+    assert not parallel.dirty_fragments
+    for fragment in parallel.trees:
+        name = pathlib.PurePosixPath(*fragment.parts[1:])
+        expected = (tmp_path / "sequential" / name).read_bytes()
+        actual = (tmp_path / "parallel" / name).read_bytes()
+        assert actual == expected
+
+
+def test_MelodyLoader_knows_ids_of_deferred_fragments_without_loading():
+    aird = pathlib.PurePosixPath("\0", TEST_MODEL)
+    loader = capellambse.loader.MelodyLoader(TEST_MODEL_5_0, lazy_load=True)
+    parent = loader["0d2edb8f-fa34-4e73-89ec-fb9a63001440"]
+
+    with pytest.raises(KeyError):
+        loader["00000000-0000-0000-0000-000000000000"]
+    new_id = loader.generate_uuid(parent, want="_APMboAPhEeynfbzU12yy7w")
+
+    assert new_id != "_APMboAPhEeynfbzU12yy7w"
+    assert not loader.trees[aird].loaded
+    assert loader.find_fragment(loader["_APMboAPhEeynfbzU12yy7w"]) == aird
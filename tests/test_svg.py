@@ -15,6 +15,7 @@ import capellambse
 from capellambse.svg import (
     SVGDiagram,
     decorations,
+    drawing,
     generate,
     helpers,
     style,
@@ -36,6 +37,7 @@ TEST_DIAGS = [
     "[LDFB] Test flow",
     "[CC] Capability",
 ]
+TEST_LAB_CLASS = "Logical Architecture Blank"
 TEST_DECO = set(style.STATIC_DECORATIONS.keys()) - {"__GLOBAL__"}
 FREE_SYMBOLS = {
     "OperationalCapabilitySymbol",
@@ -404,6 +406,126 @@ class TestSVG:
         diag = model.diagrams.by_name(diagram_name)
         diag.render("svg")
 
+    @pytest.mark.parametrize("diagram_name", TEST_DIAGS)
+    def test_stream_backend_produces_the_same_svg_as_svgwrite(
+        self, model: capellambse.MelodyModel, diagram_name: str
+    ) -> None:
+        jsondata = model.diagrams.by_name(diagram_name).render("json")
+
+        expected = SVGDiagram.from_json(jsondata).to_string()
+        actual = SVGDiagram.from_json(jsondata, backend="stream").to_string()
+
+        assert actual == expected
+
+    @pytest.mark.parametrize("diagram_name", TEST_DIAGS)
+    def test_svg_format_renders_the_same_svg_as_the_json_format(
+        self, model: capellambse.MelodyModel, diagram_name: str
+    ) -> None:
+        diag = model.diagrams.by_name(diagram_name)
+
+        expected = SVGDiagram.from_json(diag.render("json")).to_string()
+
+        assert diag.render("svg") == expected
+
+    def test_svg_stream_format_renders_the_same_svg(
+        self, model: capellambse.MelodyModel
+    ) -> None:
+        diag = model.diagrams.by_name(TEST_LAB)
+
+        assert diag.render("svg_stream") == diag.render("svg")
+
+    def test_stream_backend_saves(self, tmp_path: pathlib.Path) -> None:
+        meta = generate.DiagramMetadata(
+            pos=(0, 0), size=(1, 1), name="Test svg", class_="TEST"
+        )
+        svg = SVGDiagram(meta, [], backend="stream")
+        filename = tmp_path / "test.svg"
+
+        svg.save_drawing(str(filename))
+
+        expected = SVGDiagram(meta, []).to_string()
+        assert filename.read_text(encoding="utf-8").endswith(expected)
+
+    def test_unknown_backends_are_rejected(self) -> None:
+        meta = generate.DiagramMetadata(
+            pos=(0, 0), size=(1, 1), name="Test svg", class_="TEST"
+        )
+
+        with pytest.raises(ValueError, match="backend"):
+            SVGDiagram(meta, [], backend="no-such-backend")
+
+    @pytest.mark.parametrize("diagram_name", TEST_DIAGS)
+    def test_defs_are_only_deployed_once(
+        self, model: capellambse.MelodyModel, diagram_name: str
+    ) -> None:
+        jsondata = model.diagrams.by_name(diagram_name).render("json")
+
+        svg = SVGDiagram.from_json(jsondata)
+
+        tree = etree.fromstring(svg.to_string())
+        defs = tree.find("{http://www.w3.org/2000/svg}defs")
+        assert defs is not None
+        ids = [i.get("id") for i in defs if i.get("id") is not None]
+        assert len(ids) == len(set(ids))
+
+    def test_drawing_ports_does_not_change_their_type(
+        self, model: capellambse.MelodyModel
+    ) -> None:
+        jsondict = json.loads(model.diagrams.by_name(TEST_LAB).render("json"))
+        meta = generate.DiagramMetadata.from_dict(jsondict)
+        ports = [
+            i
+            for i in jsondict["contents"]
+            if i["class"] in decorations.all_ports
+        ]
+        assert ports
+        expected = [i["type"] for i in ports]
+
+        SVGDiagram(meta, jsondict["contents"])
+
+        assert [i["type"] for i in ports] == expected
+
+    def test_drawings_of_the_same_class_share_their_defs(self) -> None:
+        meta = generate.DiagramMetadata(
+            pos=(0, 0), size=(1, 1), name="Test svg", class_=TEST_LAB_CLASS
+        )
+
+        first = SVGDiagram(meta, [])
+        second = SVGDiagram(meta, [], backend="stream")
+
+        assert second.drawing.stylesheet is first.drawing.stylesheet
+        assert second.to_string() == first.to_string()
+
+    def test_customized_styles_invalidate_the_cached_defs(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        meta = generate.DiagramMetadata(
+            pos=(0, 0), size=(1, 1), name="Test svg", class_=TEST_LAB_CLASS
+        )
+        before = SVGDiagram(meta, []).drawing.stylesheet
+
+        monkeypatch.setitem(
+            capellambse.diagram.STYLES[TEST_LAB_CLASS],
+            "Box.CacheTest",
+            {"fill": capellambse.diagram.RGB(1, 2, 3)},
+        )
+        after = SVGDiagram(meta, [])
+
+        assert after.drawing.stylesheet is not before
+        assert "g.Box.CacheTest > rect" in str(after.drawing.stylesheet)
+        assert "g.Box.CacheTest &gt; rect" in after.to_string()
+
+    def test_clearing_the_defs_cache_rebuilds_the_defs(self) -> None:
+        template = drawing.get_defs_template(TEST_LAB_CLASS)
+
+        drawing.clear_defs_cache()
+
+        rebuilt = drawing.get_defs_template(TEST_LAB_CLASS)
+        assert rebuilt is not template
+        assert [i.text for i in rebuilt.elements] == [
+            i.text for i in template.elements
+        ]
+
 
 class TestSVGStyling:
     LAB = "Logical Architecture Blank"
@@ -74,3 +74,24 @@ def test_PhysicalLink_setting_source_and_target(model: MelodyModel):
     assert source_pp == link.source
     assert target_pp == link.ends[1]
     assert target_pp == link.target
+
+
+def test_Component_parts_follow_changes_to_Part_type(model: MelodyModel):
+    hogwarts = model.by_uuid("0d2edb8f-fa34-4e73-89ec-fb9a63001440")
+    campus = model.by_uuid("6583b560-6d2f-4190-baa2-94eef179c8ea")
+    part = model.by_uuid("101ffa60-f8a2-4ea2-a0d8-d10910ceac06")
+    assert part in hogwarts.parts
+
+    part.type = campus
+
+    assert part not in hogwarts.parts
+    assert part in campus.parts
+
+
+def test_ComponentPort_exchanges_are_in_document_order(model: MelodyModel):
+    port = model.by_uuid("c0645cb3-a9bc-4330-90aa-ab211d5091c4")
+
+    lines = [i._element.sourceline for i in port.exchanges]
+
+    assert len(lines) > 1
+    assert lines == sorted(lines)